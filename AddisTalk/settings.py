@@ -83,6 +83,8 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    # Removes itself unless SERVER_TIMING is on.
+    'blog.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -115,6 +117,102 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'AddisTalk.wsgi.application'
 
+# Cache
+# CACHE_BACKEND picks the store shared by the page cache and the world
+# clock: 'locmem' (per process, default), 'file' (shared by all workers on
+# one machine) or 'redis' (REDIS_URL, shared by every machine).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'addistalk',
+        }
+    }
+
+# Full-page cache for logged-out visitors (blog.page_cache). Pages are
+# purged by signals when posts, comments, likes or the About page change.
+# Off under the test runner, where the cache outlives each test's rollback.
+PAGE_CACHE = 'default'
+PAGE_CACHE_ENABLED = os.environ.get(
+    'PAGE_CACHE_ENABLED', '0' if 'test' in sys.argv else '1') == '1'
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Serve logged-in readers the cached public post page too, with their own
+# parts (navbar, like button, comment form, own comments) filled in from
+# a small endpoint after load.
+PAGE_CACHE_MEMBERS = os.environ.get('PAGE_CACHE_MEMBERS', '1') == '1'
+
+# Likes: 'direct' writes each toggle in its own transaction; 'buffered'
+# queues toggles in the worker and writes them in batches every
+# LIKE_FLUSH_INTERVAL seconds (blog.like_buffer), for very hot posts.
+LIKE_WRITE_MODE = os.environ.get('LIKE_WRITE_MODE', 'direct')
+LIKE_FLUSH_INTERVAL = float(os.environ.get('LIKE_FLUSH_INTERVAL', 1.0))
+
+# Published post slugs -> ids kept per process for the comment views
+# (blog.slug_cache).
+POST_SLUG_CACHE_SIZE = 1024
+
+# Title suggestions are served from memory (blog.autocomplete) and
+# reloaded in the background this often, in seconds, to pick up posts
+# changed by other processes. 0 disables the reload.
+AUTOCOMPLETE_REFRESH = int(os.environ.get('AUTOCOMPLETE_REFRESH', 600))
+
+# "Read next" lists (blog.related): the index built by
+# `manage.py build_related_posts`, and how long after a post is published
+# or edited its lists are refreshed in the background. Schedule the
+# command nightly (and with --incremental more often) to pick up posts
+# changed by other processes. Background refreshes are off under tests.
+RELATED_POSTS_INDEX = os.environ.get(
+    'RELATED_POSTS_INDEX', os.path.join(BASE_DIR, '.cache', 'related.npz'))
+RELATED_POSTS_DELAY = (
+    None if 'test' in sys.argv
+    else float(os.environ.get('RELATED_POSTS_DELAY', 5)))
+
+# Trending feed (blog.trending): likes and comments count half as much
+# every TRENDING_HALF_LIFE seconds. Run `manage.py decay_trending` every
+# hour or so to keep stored scores small and drop faded posts.
+TRENDING_HALF_LIFE = int(os.environ.get('TRENDING_HALF_LIFE', 24 * 60 * 60))
+
+# World clock shown in the footer (blog.context_processors.world_time).
+# Defaults to the local tz database; set WORLD_TIME_SOURCE to
+# 'blog.time_sources.WorldTimeAPISource' to query worldtimeapi.org instead.
+WORLD_TIME_SOURCE = os.environ.get(
+    'WORLD_TIME_SOURCE', 'blog.time_sources.ZoneInfoTimeSource')
+WORLD_TIME_API_URL = os.environ.get(
+    'WORLD_TIME_API_URL', 'https://worldtimeapi.org/api/timezone/')
+WORLD_TIME_API_TIMEOUT = float(os.environ.get('WORLD_TIME_API_TIMEOUT', 3))
+# Remote offsets are shared by all workers through the cache framework,
+# refreshed in the background, and the API is skipped for
+# WORLD_TIME_COOLDOWN seconds after WORLD_TIME_FAILURE_THRESHOLD failures.
+WORLD_TIME_CACHE = 'default'
+WORLD_TIME_CACHE_TTL = 60 * 60
+WORLD_TIME_FAILURE_THRESHOLD = 3
+WORLD_TIME_COOLDOWN = 5 * 60
+
+# Per-request timings (blog.timing): DB queries, context processors,
+# template rendering and Cloudinary URLs, sent to the browser as a
+# Server-Timing header and logged by 'blog.timing'. The header is visible
+# to every visitor, so leave this off unless you are profiling.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
+# Home page pagination: 'offset' (?page=n) or 'cursor' (keyset, ?cursor=)
+POST_LIST_PAGINATION = os.environ.get('POST_LIST_PAGINATION', 'offset')
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -138,7 +236,20 @@ else:
         }
     }
 if 'test' in sys.argv:
-    DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+    if 'TEST_DATABASE_URL' in os.environ:
+        # Run the suite (and its query-plan checks) on e.g. a local
+        # PostgreSQL instead of SQLite.
+        DATABASES = {
+            'default': dj_database_url.parse(os.environ['TEST_DATABASE_URL'])
+        }
+    else:
+        DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
+        # A file rather than the in-memory default, so tests that use
+        # several threads wait on SQLite's lock instead of failing with
+        # "database table is locked".
+        DATABASES['default']['TEST'] = {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        }
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,68 @@
+// Suggest post titles while typing in a search box with data-suggest-url
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('input[data-suggest-url]').forEach(function(input) {
+        const menu = document.createElement('ul');
+        menu.className = 'dropdown-menu w-100';
+        menu.style.top = '100%';
+        input.insertAdjacentElement('afterend', menu);
+
+        let timer = null;
+        let latest = 0;
+
+        function hide() {
+            menu.classList.remove('show');
+        }
+
+        function show(results) {
+            menu.innerHTML = '';
+            results.forEach(result => {
+                const item = document.createElement('li');
+                const link = document.createElement('a');
+                link.className = 'dropdown-item text-truncate';
+                link.href = result.url;
+                link.textContent = result.title;
+                item.appendChild(link);
+                menu.appendChild(item);
+            });
+            menu.classList.toggle('show', results.length > 0);
+        }
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                hide();
+                return;
+            }
+            timer = setTimeout(() => {
+                const request = ++latest;
+                fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(query)}`, {
+                    headers: {'Accept': 'application/json'}
+                })
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`HTTP ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    // Answers can arrive out of order; keep the newest.
+                    if (request === latest) {
+                        show(data.results);
+                    }
+                })
+                .catch(error => {
+                    console.error('Error loading suggestions:', error);
+                });
+            }, 100);
+        });
+
+        input.addEventListener('keydown', function(event) {
+            if (event.key === 'Escape') {
+                hide();
+            }
+        });
+        input.addEventListener('blur', () => setTimeout(hide, 200));
+    });
+});
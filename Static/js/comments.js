@@ -0,0 +1,124 @@
+// Load older pages of a long comment thread on demand, and post and
+// delete comments in place instead of reloading the whole page
+
+document.addEventListener('DOMContentLoaded', function() {
+    const loadMore = document.getElementById('load-more-comments');
+    const list = document.getElementById('comments-list');
+
+    if (!list) {
+        return;
+    }
+
+    if (loadMore) {
+        loadMore.addEventListener('click', function() {
+            const button = this;
+            const url = `${button.dataset.url}?cursor=${encodeURIComponent(button.dataset.cursor)}`;
+            button.disabled = true;
+
+            fetch(url, {
+                headers: {'Accept': 'application/json'},
+                credentials: 'same-origin'
+            })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                // A comment posted on this page may arrive again here;
+                // keep the copy in its proper place in the thread.
+                data.comments.forEach(comment => {
+                    const posted = document.getElementById(`comment-${comment.id}`);
+                    if (posted) {
+                        posted.remove();
+                    }
+                });
+                list.insertAdjacentHTML('beforeend', data.html);
+                if (data.next_cursor) {
+                    button.dataset.cursor = data.next_cursor;
+                    button.disabled = false;
+                } else {
+                    button.remove();
+                }
+            })
+            .catch(error => {
+                console.error('Error loading comments:', error);
+                button.disabled = false;
+            });
+        });
+    }
+
+    function showError(form, html) {
+        const feedback = form.querySelector('[data-comment-feedback]') ||
+            form.closest('.modal-content')?.querySelector('[data-comment-feedback]');
+        if (feedback) {
+            feedback.innerHTML = html;
+        }
+    }
+
+    function commentAdded(form, html) {
+        list.insertAdjacentHTML('beforeend', html);
+        form.reset();
+        const empty = document.getElementById('no-comments');
+        if (empty) {
+            empty.remove();
+        }
+    }
+
+    function commentDeleted(form) {
+        const item = document.getElementById(`comment-${form.dataset.commentId}`);
+        const modal = form.closest('.modal');
+        if (!item) {
+            return;
+        }
+        if (modal && window.bootstrap) {
+            modal.addEventListener('hidden.bs.modal', () => item.remove(), {once: true});
+            bootstrap.Modal.getOrCreateInstance(modal).hide();
+        } else {
+            item.remove();
+        }
+    }
+
+    // Delegated, so forms swapped in later (see holes.js) work too.
+    // Without this script the forms post normally and redirect back.
+    document.addEventListener('submit', function(event) {
+        const form = event.target.closest('form[data-comment-action]');
+        if (!form) {
+            return;
+        }
+        event.preventDefault();
+
+        const submit = form.querySelector('[type="submit"]');
+        if (submit) {
+            submit.disabled = true;
+        }
+
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: {'X-Requested-With': 'XMLHttpRequest'},
+            credentials: 'same-origin'
+        })
+        .then(response => response.text().then(html => {
+            if (response.redirected) {
+                // Signed out in the meantime: follow to the login page.
+                window.location.href = response.url;
+            } else if (!response.ok) {
+                showError(form, html);
+            } else if (form.dataset.commentAction === 'add') {
+                commentAdded(form, html);
+            } else if (form.dataset.commentAction === 'delete') {
+                commentDeleted(form);
+            }
+        }))
+        .catch(error => {
+            console.error('Error saving comment:', error);
+        })
+        .finally(() => {
+            if (submit) {
+                submit.disabled = false;
+            }
+        });
+    });
+});
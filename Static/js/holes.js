@@ -0,0 +1,67 @@
+// Fill the reader's own parts into a page served from the shared cache
+
+document.addEventListener('DOMContentLoaded', function() {
+    const url = document.body.dataset.holesUrl;
+
+    if (!url) {
+        return;
+    }
+
+    // Comments sort by (created_on, id), as on the server.
+    function isAfter(item, comment) {
+        const created = Number(item.dataset.created);
+        const id = Number(item.id.replace('comment-', ''));
+        return created > comment.created_on ||
+            (created === comment.created_on && id > comment.id);
+    }
+
+    function placeComment(list, comment) {
+        const existing = document.getElementById(`comment-${comment.id}`);
+        if (existing) {
+            existing.outerHTML = comment.html;
+            return;
+        }
+        const next = Array.from(list.querySelectorAll('.comment-item'))
+            .find(item => isAfter(item, comment));
+        if (next) {
+            next.insertAdjacentHTML('beforebegin', comment.html);
+        } else if (!document.getElementById('load-more-comments')) {
+            // Only append when the whole thread is on the page.
+            list.insertAdjacentHTML('beforeend', comment.html);
+        }
+    }
+
+    fetch(url, {
+        headers: {'Accept': 'application/json'},
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        Object.entries(data.holes).forEach(([name, html]) => {
+            document.querySelectorAll(`[data-hole="${name}"]`).forEach(hole => {
+                hole.innerHTML = html;
+            });
+        });
+
+        const list = document.getElementById('comments-list');
+        if (list && data.comments.length) {
+            data.comments.forEach(comment => placeComment(list, comment));
+            const empty = document.getElementById('no-comments');
+            if (empty && list.querySelector('.comment-item')) {
+                empty.remove();
+            }
+        }
+
+        if (Object.keys(data.holes).length) {
+            document.querySelectorAll('[data-anonymous-only]').forEach(el => el.remove());
+        }
+    })
+    .catch(error => {
+        console.error('Error loading your page details:', error);
+    });
+});
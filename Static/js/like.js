@@ -1,80 +1,84 @@
 // Like button functionality for blog posts
 
 document.addEventListener('DOMContentLoaded', function() {
-    const likeButton = document.getElementById('like-button');
-    
-    if (likeButton) {
-        likeButton.addEventListener('click', function() {
-            const slug = this.dataset.postSlug;
+    // Delegated, so a button swapped in later (see holes.js) works too.
+    document.addEventListener('click', function(event) {
+        const likeButton = event.target.closest('#like-button');
+        if (likeButton) {
+            toggleLike.call(likeButton);
+        }
+    });
+
+    function toggleLike() {
+        const slug = this.dataset.postSlug;
+        
+        // Save original button state
+        const originalContent = this.innerHTML;
+        const originalClasses = this.className;
+        
+        // Add loading state
+        this.innerHTML = `
+            <span class="spinner-border spinner-border-sm" role="status">
+                <span class="visually-hidden">Loading...</span>
+            </span>
+        `;
+        this.disabled = true;
+        
+        // Send AJAX request
+        fetch(`/post/${slug}/like/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+                'Content-Type': 'application/x-www-form-urlencoded',
+            },
+            credentials: 'same-origin'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+            return response.json();
+        })
+        .then(data => {
+            // Update button based on response
+            if (data.liked) {
+                // User just liked the post
+                this.className = 'btn btn-like btn-danger';
+                this.innerHTML = `<i class="bi bi-heart-fill"></i> <span id="like-count">${data.like_count}</span>`;
+                this.dataset.liked = 'true';
+            } else {
+                // User just unliked the post
+                this.className = 'btn btn-like btn-outline-danger';
+                this.innerHTML = `<i class="bi bi-heart"></i> <span id="like-count">${data.like_count}</span>`;
+                this.dataset.liked = 'false';
+            }
+            
+            // Re-enable the button
+            this.disabled = false;
+            
+            // Update the like text
+            const likeText = document.getElementById('like-text');
+            if (data.like_count === 0) {
+                likeText.textContent = 'Be the first to like this!';
+            } else if (data.like_count === 1) {
+                likeText.textContent = '1 person likes this';
+            } else {
+                likeText.textContent = `${data.like_count} people like this`;
+            }
             
-            // Save original button state
-            const originalContent = this.innerHTML;
-            const originalClasses = this.className;
+            // Show success toast
+            showToast(data.message);
+        })
+        .catch(error => {
+            console.error('Error:', error);
             
-            // Add loading state
-            this.innerHTML = `
-                <span class="spinner-border spinner-border-sm" role="status">
-                    <span class="visually-hidden">Loading...</span>
-                </span>
-            `;
-            this.disabled = true;
+            // Restore original button state on error
+            this.className = originalClasses;
+            this.innerHTML = originalContent;
+            this.disabled = false;
             
-            // Send AJAX request
-            fetch(`/post/${slug}/like/`, {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': getCookie('csrftoken'),
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                },
-                credentials: 'same-origin'
-            })
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
-                return response.json();
-            })
-            .then(data => {
-                // Update button based on response
-                if (data.liked) {
-                    // User just liked the post
-                    this.className = 'btn btn-like btn-danger';
-                    this.innerHTML = `<i class="bi bi-heart-fill"></i> <span id="like-count">${data.like_count}</span>`;
-                    this.dataset.liked = 'true';
-                } else {
-                    // User just unliked the post
-                    this.className = 'btn btn-like btn-outline-danger';
-                    this.innerHTML = `<i class="bi bi-heart"></i> <span id="like-count">${data.like_count}</span>`;
-                    this.dataset.liked = 'false';
-                }
-                
-                // Re-enable the button
-                this.disabled = false;
-                
-                // Update the like text
-                const likeText = document.getElementById('like-text');
-                if (data.like_count === 0) {
-                    likeText.textContent = 'Be the first to like this!';
-                } else if (data.like_count === 1) {
-                    likeText.textContent = '1 person likes this';
-                } else {
-                    likeText.textContent = `${data.like_count} people like this`;
-                }
-                
-                // Show success toast
-                showToast(data.message);
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                
-                // Restore original button state on error
-                this.className = originalClasses;
-                this.innerHTML = originalContent;
-                this.disabled = false;
-                
-                // Show error message
-                showErrorToast('An error occurred. Please try again.');
-            });
+            // Show error message
+            showErrorToast('An error occurred. Please try again.');
         });
     }
     
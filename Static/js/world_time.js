@@ -0,0 +1,22 @@
+// Keep the footer world clock current on pages served from the page cache
+
+document.addEventListener('DOMContentLoaded', function() {
+    const clocks = document.querySelectorAll('[data-world-clock]');
+
+    function tick() {
+        const now = new Date();
+        clocks.forEach(function(clock) {
+            clock.textContent = new Intl.DateTimeFormat('en-US', {
+                timeZone: clock.dataset.worldClock,
+                hour: '2-digit',
+                minute: '2-digit',
+                hour12: true,
+            }).format(now);
+        });
+    }
+
+    if (clocks.length) {
+        tick();
+        setInterval(tick, 30000);
+    }
+});
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.4 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('about', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='about',
+            index=models.Index(fields=['-updated_on'], name='about_updated_idx'),
+        ),
+    ]
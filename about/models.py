@@ -7,5 +7,11 @@ class About(models.Model):
     updated_on = models.DateTimeField(auto_now=True)
     content = models.TextField()
 
+    class Meta:
+        indexes = [
+            # about_me shows the most recently updated entry.
+            models.Index(fields=['-updated_on'], name='about_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
@@ -0,0 +1,13 @@
+# about/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from blog import page_cache
+
+from .models import About
+
+
+@receiver(post_save, sender=About)
+@receiver(post_delete, sender=About)
+def purge_about_page(sender, **kwargs):
+    page_cache.purge_on_commit('about')
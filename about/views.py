@@ -1,9 +1,26 @@
+from django.db.models import Count, Max
 from django.shortcuts import render
+from blog.conditional import conditional_page, page_etag
+from blog.page_cache import cache_anonymous_page
 from .models import About
 
 # Create your views here.
 
 
+def about_validators(request):
+    """
+    ETag / Last-Modified for the About page from the newest entry.
+    """
+    state = About.objects.aggregate(last=Max('updated_on'), total=Count('pk'))
+    if state['last'] is None:
+        return None
+    return (page_etag(request, 'about', state['last'].isoformat(),
+                      state['total']),
+            state['last'])
+
+
+@conditional_page(about_validators)
+@cache_anonymous_page('about')
 def about_me(request):
     """
     Renders the About page
@@ -0,0 +1,105 @@
+"""
+Archive and author sidebars from stored counts vs grouping per request::
+
+    python -m benchmarks.bench_archive [--posts 100000] [--authors 200]
+
+Posts are spread over ten years and ``--authors`` authors. Times the two
+sidebar lists read from ``MonthlyPostCount`` / ``AuthorPostCount``, the
+same lists computed with GROUP BY over the posts, one publish (the save
+plus its count updates), a deep page of one month's archive and of one
+author's posts by cursor, and a full ``archive.recount()``.
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--authors', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.db.models import Count, DateField, F
+    from django.db.models.functions import TruncMonth
+    from django.utils import timezone
+
+    from blog import archive
+    from blog.models import AuthorPostCount, MonthlyPostCount, Post
+    from blog.pagination import CursorPaginator
+    from blog.views import SIDEBAR_AUTHORS
+
+    with test_database():
+        make_posts(args.posts)
+        authors = User.objects.bulk_create(
+            User(username=f"author{i}") for i in range(args.authors))
+        first = authors[0].pk
+        # Ten years of posts, round-robin over the authors.
+        span = timedelta(days=3650) / args.posts
+        start = timezone.now() - timedelta(days=3650)
+        Post.objects.update(author_id=F('pk') % args.authors + first)
+        posts = list(Post.objects.order_by('pk').only('pk'))
+        for i, post in enumerate(posts):
+            post.created_on = start + span * i
+        Post.objects.bulk_update(posts, ['created_on'], batch_size=5000)
+        months, _ = archive.recount()
+        print(f"{args.posts} posts over {months} months and "
+              f"{args.authors} authors")
+
+        def stored():
+            list(MonthlyPostCount.objects.filter(count__gt=0))
+            list(AuthorPostCount.objects.filter(count__gt=0)
+                 .select_related('author')[:SIDEBAR_AUTHORS])
+
+        published = Post.objects.filter(status=1).order_by()
+
+        def grouped():
+            list(published.annotate(month=TruncMonth(
+                'created_on', output_field=DateField()))
+                .values('month').annotate(total=Count('pk'))
+                .order_by('-month'))
+            list(published.values('author__username')
+                 .annotate(total=Count('pk'))
+                 .order_by('-total')[:SIDEBAR_AUTHORS])
+
+        report('sidebar from stored counts',
+               measure(stored, repeat=args.repeat))
+        report('sidebar by GROUP BY', measure(grouped, repeat=5, warmup=1))
+
+        post = Post.objects.get(pk=posts[len(posts) // 2].pk)
+
+        def toggle_status():
+            post.status = 1 - post.status
+            post.save()
+
+        report('publish / unpublish one post',
+               measure(toggle_status, repeat=args.repeat))
+
+        month_start, month_end = archive.month_range(
+            post.created_on.year, post.created_on.month)
+        month = Post.objects.filter(
+            status=1, created_on__gte=month_start, created_on__lt=month_end)
+        author = authors[1].blog_posts.filter(status=1)
+        for label, queryset in (('month', month), ('author', author)):
+            paginator = CursorPaginator(queryset, 6)
+            ordered = queryset.order_by('-created_on', '-id')
+            middle = ordered[ordered.count() // 2]
+            cursor = paginator.encode('n', middle)
+            report(f'deep {label} page by cursor',
+                   measure(lambda: list(paginator.page(cursor)),
+                           repeat=args.repeat))
+
+        started = time.perf_counter()
+        archive.recount()
+        print(f"archive.recount(): "
+              f"{(time.perf_counter() - started) * 1e3:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Title suggestions from the in-memory prefix index::
+
+    python -m benchmarks.bench_autocomplete [--posts 100000]
+
+Loads the index from a synthetic archive of titles built from a few
+thousand random words, and reports memory kept and peak during the
+load (tracemalloc), lookup latency for short and long prefixes, the
+cost of an incremental add, and the full request through the endpoint.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks._django import measure, report, setup, test_database
+
+
+def titles(count, seed=1):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+             for _ in range(5000)]
+    for i in range(count):
+        phrase = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 8)))
+        yield f"{phrase.title()} {i}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    from blog.autocomplete import TitleIndex, titles as shared
+    from blog.models import Post
+
+    with test_database():
+        author = User.objects.create_user(username='bench-author')
+        batch = []
+        for i, title in enumerate(titles(args.posts)):
+            batch.append(Post(title=title, slug=f"post-{i}", author=author,
+                              content='', status=1))
+            if len(batch) == 5000:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+
+        index = TitleIndex()
+        start = time.perf_counter()
+        index.load()
+        elapsed = time.perf_counter() - start
+        # Again under tracemalloc, which slows the load down.
+        index = TitleIndex()
+        tracemalloc.start()
+        index.load()
+        kept, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"loaded {len(index)} titles, {len(index._starts)} word "
+              f"starts in {elapsed:.2f}s; kept {kept / 1e6:.1f} MB, "
+              f"peak {peak / 1e6:.1f} MB")
+
+        sample = [index._entry(i)[1] for i in range(0, len(index), 997)]
+        rng = random.Random(2)
+        for label, length in (('1 char', 1), ('3 chars', 3),
+                              ('8 chars', 8), ('two words', None)):
+            prefixes = [
+                title.lower()[:length] if length else
+                ' '.join(title.lower().split()[1:3])
+                for title in sample
+            ]
+
+            def lookup(prefixes=prefixes):
+                return index.search(rng.choice(prefixes), 8)
+
+            report(f'search, {label}', measure(lookup, repeat=args.repeat))
+
+        counter = iter(range(10**9))
+
+        def add():
+            n = next(counter)
+            index.add(10**7 + n, f"Fresh title number {n}", f"fresh-{n}")
+
+        report('incremental add', measure(add, repeat=200, warmup=0))
+
+        shared.clear()
+        client = Client()
+        client.get('/search/titles/', {'q': 'a'}, secure=True)
+
+        def request():
+            return client.get(
+                '/search/titles/', {'q': rng.choice(sample)[:4]}, secure=True)
+
+        report('GET /search/titles/', measure(request, repeat=500))
+
+
+if __name__ == '__main__':
+    main()
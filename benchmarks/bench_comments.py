@@ -0,0 +1,120 @@
+"""
+Rendering a post with a very long comment thread::
+
+    python -m benchmarks.bench_comments [--comments 50000]
+
+Compares the old approach (every approved comment rendered inline) with
+the first page of the paginated thread, and with fetching pages from the
+start, middle and end of the thread through the JSON endpoint, for
+anonymous and signed-in readers.
+"""
+import argparse
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def make_comments(post, count, batch_size=5000):
+    from datetime import timedelta
+
+    from django.contrib.auth.models import User
+
+    from blog.models import Comment
+
+    readers = User.objects.bulk_create([
+        User(username=f'bench-reader-{i}') for i in range(100)])
+    start = post.created_on
+    field = Comment._meta.get_field('created_on')
+    field.auto_now_add = False
+    try:
+        for offset in range(0, count, batch_size):
+            Comment.objects.bulk_create([
+                Comment(
+                    post=post,
+                    author=readers[i % len(readers)],
+                    body=f"Synthetic comment number {i}.",
+                    approved=True,
+                    created_on=start + timedelta(seconds=i),
+                )
+                for i in range(offset, min(count, offset + batch_size))
+            ])
+    finally:
+        field.auto_now_add = True
+    post.__class__.objects.filter(pk=post.pk).recount_comments()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.template.loader import render_to_string
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from blog.models import Comment, Post
+    from blog.pagination import CursorPaginator
+    from blog.views import COMMENTS_PER_PAGE
+
+    with test_database(), override_settings(PAGE_CACHE_ENABLED=False):
+        make_posts(1)
+        post = Post.objects.get()
+        make_comments(post, args.comments)
+        client = Client()
+
+        def get(url, params=None):
+            response = client.get(url, params or {}, secure=True)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        def render_all():
+            # What post_detail did before: the whole thread inline.
+            comments = (post.comments.filter(approved=True)
+                        .select_related('author').order_by('created_on'))
+            html = render_to_string('blog/post_detail.html#comment-page', {
+                'post': post, 'comments': comments})
+            return len(html)
+
+        print(f"{args.comments} comments, {COMMENTS_PER_PAGE} per page")
+        report('all comments inline (render)',
+               measure(render_all, repeat=3, warmup=1))
+        size = render_all()
+        print(f"{'':<40} html={size / 1024:.0f}KiB")
+
+        detail = reverse('post_detail', args=[post.slug])
+        report('post page, first comment page',
+               measure(lambda: get(detail), repeat=args.repeat))
+        print(f"{'':<40} html={len(get(detail).content) / 1024:.0f}KiB")
+
+        ordered = list(Comment.objects.order_by('created_on', 'id')
+                       .values_list('pk', flat=True))
+        paginator = CursorPaginator(
+            Comment.objects.all(), COMMENTS_PER_PAGE,
+            ordering=('created_on', 'id'))
+        endpoint = reverse('post_comments', args=[post.slug])
+        cursors = [
+            (label, paginator.encode(
+                'n', Comment.objects.get(pk=ordered[index])))
+            for label, index in (
+                ('start', 0), ('middle', len(ordered) // 2),
+                ('end', len(ordered) - COMMENTS_PER_PAGE - 1))]
+        for label, cursor in cursors:
+            report(f'comments endpoint ({label})',
+                   measure(lambda: get(endpoint, {'cursor': cursor}),
+                           repeat=args.repeat))
+
+        # Signed-in readers also see their own pending comments.
+        reader = User.objects.get(username='bench-reader-0')
+        Comment.objects.create(post=post, author=reader, body="Pending.")
+        client.force_login(reader)
+        for label, cursor in cursors:
+            report(f'comments endpoint, signed in ({label})',
+                   measure(lambda: get(endpoint, {'cursor': cursor}),
+                           repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
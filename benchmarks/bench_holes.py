@@ -0,0 +1,72 @@
+"""
+Logged-in post page latency, personal render vs hole-punched cache::
+
+    python -m benchmarks.bench_holes [--comments 40]
+
+"Before" renders the whole post page for the reader on every request.
+"After" serves the shared cached page and then fetches the reader's own
+parts from the holes endpoint, so both requests are timed, separately
+and together.
+"""
+import argparse
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from blog.models import Comment, Post
+
+    with test_database():
+        make_posts(1)
+        post = Post.objects.get()
+        reader = User.objects.create_user(username='bench-reader')
+        Comment.objects.bulk_create([
+            Comment(post=post, author=reader if i % 5 == 0 else post.author,
+                    body=f"Comment {i}", approved=i % 7 != 0)
+            for i in range(args.comments)
+        ])
+        post.likes.add(reader)
+        client = Client()
+        client.force_login(reader)
+        page = reverse('post_detail', args=[post.slug])
+        holes = reverse('post_holes', args=[post.slug])
+
+        def get(url):
+            response = client.get(url, secure=True)
+            assert response.status_code == 200, response.status_code
+
+        with override_settings(PAGE_CACHE_ENABLED=True,
+                               PAGE_CACHE_MEMBERS=False):
+            report('before: personal page',
+                   measure(lambda: get(page), repeat=args.repeat))
+
+        with override_settings(PAGE_CACHE_ENABLED=True,
+                               PAGE_CACHE_MEMBERS=True):
+            cache.clear()
+            report('after: cached public page',
+                   measure(lambda: get(page), repeat=args.repeat))
+            report('after: holes endpoint',
+                   measure(lambda: get(holes), repeat=args.repeat))
+
+            def both():
+                get(page)
+                get(holes)
+
+            report('after: page + holes',
+                   measure(both, repeat=args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Like throughput on one hot post, direct vs write-behind::
+
+    python -m benchmarks.bench_likes [--threads 8] [--clicks 201]
+
+Each thread is a different user toggling their like on the same post as
+fast as it can through ``post_like``. Direct mode writes every toggle in
+its own transaction; buffered mode queues them and a flusher writes them
+in batches. The database is a temporary SQLite file so the threads
+really contend for it.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks._django import make_posts, setup, test_database
+
+
+def run(view, post, users, clicks):
+    from django.db import connection
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    start = threading.Barrier(len(users) + 1)
+
+    def click(user):
+        start.wait()
+        try:
+            for _ in range(clicks):
+                request = factory.post('/', secure=True)
+                request.user = user
+                response = view(request, slug=post.slug)
+                assert response.status_code == 200, response.status_code
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=click, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--clicks', type=int, default=201)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    from blog import like_buffer
+    from blog.models import Post
+    from blog.views import post_like
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            test_database(os.path.join(tmp, 'bench.sqlite3')):
+        make_posts(1)
+        post = Post.objects.get()
+        users = User.objects.bulk_create([
+            User(username=f'bench-fan-{i}') for i in range(args.threads)])
+        total = args.threads * args.clicks
+
+        for mode in ('direct', 'buffered'):
+            Post.likes.through.objects.all().delete()
+            Post.objects.update(like_count=0)
+            with override_settings(LIKE_WRITE_MODE=mode):
+                elapsed = run(post_like, post,
+                              users, args.clicks)
+                if mode == 'buffered':
+                    like_buffer.buffer.stop()
+            post.refresh_from_db()
+            assert post.like_count == post.likes.count(), mode
+            print(f"{mode:<10} {total} toggles by {args.threads} threads: "
+                  f"{elapsed:6.2f}s  {total / elapsed:8.0f} toggles/s  "
+                  f"final like_count={post.like_count}")
+
+
+if __name__ == '__main__':
+    main()
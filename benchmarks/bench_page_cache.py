@@ -0,0 +1,69 @@
+"""
+Anonymous page rendering with and without the page cache::
+
+    python -m benchmarks.bench_page_cache [--posts 1000]
+
+Requests the home page and a post page through the test client with the
+cache disabled, then with the locmem and file backends, and prints the
+hit ratio reported by ``blog.page_cache.stats()``.
+"""
+import argparse
+import tempfile
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import caches
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from blog import page_cache
+
+    with test_database(), tempfile.TemporaryDirectory() as cache_dir:
+        make_posts(args.posts)
+        client = Client()
+        urls = {
+            'home': reverse('home'),
+            'post': reverse('post_detail', args=['benchmark-post-0']),
+        }
+
+        def get(url):
+            response = client.get(url, secure=True)
+            assert response.status_code == 200, response.status_code
+
+        with override_settings(PAGE_CACHE_ENABLED=False):
+            for name, url in urls.items():
+                report(f'{name} uncached',
+                       measure(lambda: get(url), repeat=args.repeat))
+
+        for backend, path in BACKENDS.items():
+            location = cache_dir if backend == 'file' else backend
+            with override_settings(
+                    PAGE_CACHE_ENABLED=True,
+                    CACHES={'default': {'BACKEND': path,
+                                        'LOCATION': location}}):
+                caches['default'].clear()
+                for name, url in urls.items():
+                    report(f'{name} cached ({backend})',
+                           measure(lambda: get(url), repeat=args.repeat))
+                counts = page_cache.stats()
+                print(f"{backend}: hits={counts['hits']} "
+                      f"misses={counts['misses']} "
+                      f"hit_ratio={counts['hit_ratio']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
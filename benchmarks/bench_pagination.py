@@ -0,0 +1,61 @@
+"""
+Offset vs keyset pagination of the home feed over a synthetic archive::
+
+    python -m benchmarks.bench_pagination [--posts 100000]
+
+Times building one page of ``PostList.queryset`` (6 posts) at the start,
+middle and end of the archive. Offset mode includes the COUNT(*) that
+Django's Paginator runs on every request.
+"""
+import argparse
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.paginator import Paginator
+
+    from blog.pagination import CursorPaginator
+    from blog.views import PostList
+
+    with test_database():
+        make_posts(args.posts)
+        queryset = PostList.queryset
+        per_page = PostList.paginate_by
+        last_page = args.posts // per_page
+
+        for label, number in (('first', 1), ('middle', last_page // 2),
+                              ('last', last_page)):
+            def offset_page(number=number):
+                page = Paginator(queryset, per_page).page(number)
+                return list(page.object_list)
+
+            report(f'offset page {number} ({label})',
+                   measure(offset_page, repeat=args.repeat, warmup=2))
+
+        cursor_paginator = CursorPaginator(queryset, per_page)
+        ordered = list(queryset.order_by('-created_on', '-id')
+                       .values_list('pk', flat=True))
+        for label, index in (('first', None), ('middle', len(ordered) // 2),
+                             ('last', len(ordered) - per_page - 1)):
+            cursor = None
+            if index is not None:
+                anchor = queryset.model.objects.get(pk=ordered[index])
+                cursor = cursor_paginator.encode('n', anchor)
+
+            def cursor_page(cursor=cursor):
+                return list(cursor_paginator.page(cursor).object_list)
+
+            report(f'cursor page ({label})',
+                   measure(cursor_page, repeat=args.repeat, warmup=2))
+
+
+if __name__ == '__main__':
+    main()
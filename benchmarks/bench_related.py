@@ -0,0 +1,125 @@
+"""
+Building the "read next" index (``blog.related``)::
+
+    python -m benchmarks.bench_related [--posts 10000 100000]
+
+Posts get ~150 words of HTML: most drawn from one of a few hundred
+topics' vocabularies, the rest from a shared one, so related posts
+exist to be found. For each archive size, times the full build from
+title/content rows (tokenizing alone, then the whole ``build()``),
+reports the index size, and times one edited post's incremental update.
+Then, on a throwaway database of ``--db-posts`` posts, times
+``rebuild()`` end to end (reading posts and writing ``RelatedPost``
+rows), one ``refresh()`` and the post page's ``read_next()`` query.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+TOPICS = 300
+
+
+def vocabulary(seed=1):
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    def words(count):
+        return [''.join(rng.choice(letters) for _ in range(rng.randint(4, 9)))
+                for _ in range(count)]
+
+    return words(2000), [words(60) for _ in range(TOPICS)]
+
+
+SHARED, TOPIC_WORDS = vocabulary()
+
+
+def body(i):
+    rng = random.Random(i)
+    topic = TOPIC_WORDS[i % TOPICS]
+    words = [rng.choice(topic) if rng.random() < 0.6 else rng.choice(SHARED)
+             for _ in range(150)]
+    return f'<p>{" ".join(words[:75])}</p><p>{" ".join(words[75:])}</p>'
+
+
+def rows(count):
+    return [(i + 1, f"Benchmark post {i}", body(i)) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, nargs='+',
+                        default=[10_000, 100_000])
+    parser.add_argument('--db-posts', type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import override_settings
+
+    from blog import related
+    from blog.models import Post
+
+    for count in args.posts:
+        data = rows(count)
+        start = time.perf_counter()
+        for _, title, content in data:
+            related.terms(title, content)
+        tokenized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = related.build(data)
+        built = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'related.npz')
+            index.save(path)
+            size = os.path.getsize(path)
+        hits = sum(
+            1 for post_id, links in index.lists().items()
+            if links and (links[0][0] - 1) % TOPICS == (post_id - 1) % TOPICS)
+        print(f"{count} posts: tokenize {tokenized:.1f}s, build "
+              f"{built:.1f}s ({len(index.words)} terms); index file "
+              f"{size / 1e6:.1f} MB; first related post on the same "
+              f"topic for {hits / count:.0%}")
+
+        edits = iter(range(10**9))
+
+        def update(index=index, count=count):
+            n = next(edits)
+            post_id = n % count + 1
+            index.update([(post_id, f"Edited {n}", body(n + 7))])
+
+        report(f'{count} posts: update one post',
+               measure(update, repeat=10, warmup=1))
+        del data, index
+
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(RELATED_POSTS_INDEX=os.path.join(
+                directory, 'related.npz')), test_database():
+        make_posts(args.db_posts, body=body)
+        start = time.perf_counter()
+        written = related.rebuild()
+        print(f"rebuild() of {args.db_posts} posts wrote {written} lists "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        posts = list(Post.objects.only('pk')[:50])
+        edits = iter(range(10**9))
+
+        def refresh():
+            post = posts[next(edits) % len(posts)]
+            Post.objects.filter(pk=post.pk).update(
+                content=body(next(edits) + args.db_posts))
+            related.refresh([post.pk])
+
+        report('refresh() one edited post',
+               measure(refresh, repeat=10, warmup=1))
+
+        post = Post.objects.get(pk=posts[0].pk)
+        report('read_next()', measure(post.read_next, repeat=500))
+
+
+if __name__ == '__main__':
+    main()
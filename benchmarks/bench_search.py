@@ -0,0 +1,73 @@
+"""
+Full-text index vs ``icontains`` search over a synthetic archive::
+
+    python -m benchmarks.bench_search [--posts 100000]
+
+Posts get ~80 words of Summernote-style HTML drawn from a fixed
+vocabulary, so some words are common and some rare. Times the first
+page of results (10 posts) for a few queries, through
+``Post.objects.search`` and through the title/content ``icontains``
+filter the admin used to run.
+"""
+import argparse
+import random
+import time
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+QUERIES = {
+    'common word': 'word1',
+    'rare word': 'word4999',
+    'two words': 'word2 word3',
+    'no match': 'zebra',
+}
+
+
+def body(i):
+    rng = random.Random(i)
+    # Zipf-ish: low-numbered words are far more frequent.
+    words = [VOCABULARY[int(rng.paretovariate(1.0)) % len(VOCABULARY)]
+             for _ in range(80)]
+    return (f'<p style="margin:0">{" ".join(words[:40])}</p>'
+            f'<p><b>{" ".join(words[40:])}</b>&nbsp;</p>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.db.models import Q
+
+    from blog.models import Post
+
+    with test_database():
+        start = time.perf_counter()
+        make_posts(args.posts, body=body)
+        print(f"created and indexed {args.posts} posts on "
+              f"{connection.vendor} in {time.perf_counter() - start:.1f}s")
+
+        for label, query in QUERIES.items():
+            def indexed(query=query):
+                return Post.objects.search(query, limit=10)
+
+            def scan(query=query):
+                matches = Post.objects.filter(status=1)
+                for word in query.split():
+                    matches = matches.filter(
+                        Q(title__icontains=word) | Q(content__icontains=word))
+                return list(matches.order_by('-created_on')[:10])
+
+            report(f'{label}: full-text',
+                   measure(indexed, repeat=args.repeat, warmup=2))
+            report(f'{label}: icontains',
+                   measure(scan, repeat=args.repeat, warmup=1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Streaming sitemap sections vs building one document in memory::
+
+    python -m benchmarks.bench_sitemap [--posts 120000]
+
+Times the sitemap index and one full section (``SECTION_SIZE`` posts)
+written through the streaming response, with the peak memory allocated
+while producing it (tracemalloc), next to the same document built in
+memory from the section's Post objects.
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks._django import make_posts, setup, test_database
+
+
+def profile(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {elapsed * 1e3:.0f}ms, {size / 1e6:.1f} MB sent, "
+          f"peak {peak / 1e6:.1f} MB allocated")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=120_000)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client, RequestFactory, override_settings
+    from django.urls import reverse
+
+    from blog import sitemaps
+
+    with test_database(), override_settings(
+            PAGE_CACHE_ENABLED=False, ALLOWED_HOSTS=['*']):
+        make_posts(args.posts)
+        print(f"{args.posts} posts, {sitemaps.SECTION_SIZE} ids per section")
+        client = Client()
+
+        def get(url):
+            response = client.get(url, secure=True)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        def index():
+            return len(get('/sitemap.xml').content)
+
+        def section():
+            response = get('/sitemap-posts-1.xml')
+            return sum(len(chunk) for chunk in response.streaming_content)
+
+        def in_memory():
+            request = RequestFactory().get('/sitemap.xml', secure=True)
+            posts = list(sitemaps._section_posts(1).order_by('pk'))
+            return len(''.join(sitemaps._urlset([[
+                sitemaps._url(request.build_absolute_uri(
+                    reverse('post_detail', args=[post.slug])),
+                    post.updated_on)
+                for post in posts]])).encode())
+
+        profile('sitemap index', index)
+        profile('streamed section', section)
+        profile('same section built in memory', in_memory)
+
+
+if __name__ == '__main__':
+    main()
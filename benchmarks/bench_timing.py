@@ -0,0 +1,49 @@
+"""
+Cost of the Server-Timing middleware (``blog.timing``)::
+
+    python -m benchmarks.bench_timing [--posts 50]
+
+Times uncached home page and post page requests through the test client
+with ``SERVER_TIMING`` off (the middleware removes itself) and on, and
+prints one request's Server-Timing header.
+"""
+import argparse
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import Client, override_settings
+
+    from blog.models import Post
+
+    with test_database(), override_settings(
+            PAGE_CACHE_ENABLED=False, ALLOWED_HOSTS=['*']):
+        make_posts(args.posts)
+        post_url = f'/post/{Post.objects.values_list("slug", flat=True)[0]}/'
+        for enabled in (False, True):
+            with override_settings(SERVER_TIMING=enabled):
+                client = Client()
+
+                def get(url):
+                    response = client.get(url, secure=True)
+                    assert response.status_code == 200, response.status_code
+                    return response
+
+                state = 'on' if enabled else 'off'
+                for label, url in (('home', '/'), ('post', post_url)):
+                    report(f'{label} page, timing {state}',
+                           measure(lambda: get(url), repeat=args.repeat))
+                if enabled:
+                    print(get('/')['Server-Timing'])
+
+
+if __name__ == '__main__':
+    main()
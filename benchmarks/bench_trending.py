@@ -0,0 +1,105 @@
+"""
+Trending feed from the stored score vs ranking per request::
+
+    python -m benchmarks.bench_trending [--posts 20000] [--likes 200000]
+
+Likes and approved comments are spread over the posts with a long tail
+(a few posts get most of them). Times the first trending page read from
+``Post.trend_score`` and its partial index, the same page ranked per
+request by counting likes and last-three-days comments, a like toggle
+(which now also bumps the score), and one run of the decay job.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks._django import make_posts, measure, report, setup, \
+    test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=20_000)
+    parser.add_argument('--likes', type=int, default=200_000)
+    parser.add_argument('--comments', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+
+    from blog import trending
+    from blog.models import Comment, Post, _count_for_post
+
+    with test_database():
+        author = make_posts(args.posts)
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        users = User.objects.bulk_create(
+            User(username=f"reader{i}") for i in range(2000))
+        rng = random.Random(1)
+
+        def skewed():
+            return post_ids[int(len(post_ids) * rng.random() ** 3)]
+
+        Like = Post.likes.through
+        likes = {(skewed(), rng.choice(users).pk)
+                 for _ in range(args.likes)}
+        Like.objects.bulk_create(
+            [Like(post_id=p, user_id=u) for p, u in likes], batch_size=5000)
+        Post.objects.recount_likes()
+        now = timezone.now()
+        field = Comment._meta.get_field('created_on')
+        field.auto_now_add = False
+        try:
+            Comment.objects.bulk_create([
+                Comment(post_id=skewed(), author=author, body="Hi",
+                        approved=True,
+                        created_on=now - timedelta(
+                            minutes=rng.randint(0, 60 * 24 * 14)))
+                for _ in range(args.comments)
+            ], batch_size=5000)
+        finally:
+            field.auto_now_add = True
+        # Scores as the signals would have left them.
+        for post_id in {p for p, _ in likes}:
+            Post.objects.filter(pk=post_id).update(
+                trend_score=rng.random() * 100)
+        print(f"{args.posts} posts, {len(likes)} likes, "
+              f"{args.comments} comments")
+
+        def stored():
+            return list(Post.objects.trending()
+                        .select_related('author').defer('content')[:7])
+
+        since = now - timedelta(days=3)
+
+        def per_request():
+            return list(
+                Post.objects.filter(status=1)
+                .select_related('author').defer('content')
+                .annotate(heat=_count_for_post(Like.objects) + 3 * (
+                    _count_for_post(Comment.objects.filter(
+                        approved=True, created_on__gte=since))))
+                .order_by('-heat', '-id')[:7])
+
+        report('stored trend_score, first page',
+               measure(stored, repeat=args.repeat))
+        report('ranked per request, first page',
+               measure(per_request, repeat=3, warmup=1))
+
+        post = Post.objects.get(pk=post_ids[0])
+        reader = users[0]
+        report('toggle_like with score bump',
+               measure(lambda: post.toggle_like(reader), repeat=200))
+
+        scored = Post.objects.filter(trend_score__gt=0).count()
+        start = time.perf_counter()
+        trending.decay(now=time.time() + 3600)
+        print(f"decay job over {scored} scored posts: "
+              f"{(time.perf_counter() - start) * 1e3:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Per-render cost of the ``world_time`` context processor.
+
+Compares the default tz-database source with the worldtimeapi.org source.
+The remote source is pointed at a local stub server so the numbers show
+the floor of an HTTP round trip, not internet latency::
+
+    python -m benchmarks.bench_world_time [--delay-ms 50]
+"""
+import argparse
+import json
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks._django import measure, report, setup
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_GET(self):
+        if self.delay:
+            threading.Event().wait(self.delay)
+        body = json.dumps(
+            {'datetime': datetime.now(timezone.utc).isoformat()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--delay-ms', type=float, default=0,
+                        help='artificial latency added by the stub server')
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from django.test import RequestFactory, override_settings
+    from blog.context_processors import world_time
+
+    StubHandler.delay = args.delay_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub_url = f'http://127.0.0.1:{server.server_port}/api/timezone/'
+
+    factory = RequestFactory()
+
+    def render_clock():
+        # Fresh request each time so the per-request memo does not help.
+        context = world_time(factory.get('/'))
+        return [str(value) for value in context.values()]
+
+    def render_without_clock():
+        return world_time(factory.get('/'))
+
+    with override_settings(
+            WORLD_TIME_SOURCE='blog.time_sources.ZoneInfoTimeSource'):
+        report('world_time (zoneinfo)',
+               measure(render_clock, repeat=args.repeat * 10))
+        report('world_time (clock never read)',
+               measure(render_without_clock, repeat=args.repeat * 10))
+
+    with override_settings(
+            WORLD_TIME_SOURCE='blog.time_sources.WorldTimeAPISource',
+            WORLD_TIME_API_URL=stub_url):
+        report('world_time (worldtimeapi, uncached)',
+               measure(lambda: (cache.clear(), render_clock()),
+                       repeat=args.repeat))
+        report('world_time (worldtimeapi, cached)',
+               measure(render_clock, repeat=args.repeat * 10))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
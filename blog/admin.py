@@ -1,16 +1,32 @@
+from collections import Counter, defaultdict
+
 from django.contrib import admin
+from django.db import transaction
 from django_summernote.admin import SummernoteModelAdmin
+from . import search, trending
 from .models import Post, Comment
+from .signals import purge_post_pages
 
 
 @admin.register(Post)
 class PostAdmin(SummernoteModelAdmin):
-    list_display = ('title', 'author', 'status', 'created_on')
+    list_display = ('title', 'author', 'status', 'created_on',
+                    'like_count', 'comment_count')
     search_fields = ['title', 'content']
     list_filter = ('status', 'created_on')
     prepopulated_fields = {'slug': ('title',)}
     summernote_fields = ('content',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index rather than icontains scans of the
+        # HTML bodies where the database has one.
+        if search_term.strip() and search.backend() is not None:
+            matches = search.matching(search_term)
+            if matches is None:
+                return queryset.none(), False
+            return queryset.filter(pk__in=matches), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -20,4 +36,18 @@ class CommentAdmin(admin.ModelAdmin):
     actions = ['approve_comments']
 
     def approve_comments(self, request, queryset):
-        queryset.update(approved=True)
+        # queryset.update() skips post_save, so recount the affected posts.
+        with transaction.atomic():
+            approved = Counter(queryset.filter(approved=False)
+                               .values_list('post_id', flat=True))
+            queryset.update(approved=True)
+            # One recount per distinct number of newly approved comments,
+            # which also go into the trending score.
+            by_count = defaultdict(list)
+            for post_id, count in approved.items():
+                by_count[count].append(post_id)
+            for count, post_ids in by_count.items():
+                Post.objects.filter(pk__in=post_ids).recount_comments(
+                    trend_score=trending.bump(comments=count))
+            posts = Post.objects.filter(pk__in=approved)
+            purge_post_pages(*posts.values_list('slug', flat=True))
@@ -0,0 +1,139 @@
+"""
+Published-post counts per month and per author, for the archive and
+author listings and their sidebar links.
+
+The counts live in ``MonthlyPostCount`` and ``AuthorPostCount`` and are
+adjusted by ``blog.signals`` as posts are published, unpublished, moved
+to another author or deleted, so a sidebar reads a few small rows
+instead of grouping every post per request. Months are calendar months
+in the site's time zone. Changes made with ``QuerySet.update()`` skip
+the signals; ``manage.py recount_archive`` rebuilds both tables from the
+posts.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F
+from django.db.models.functions import Now, TruncMonth
+from django.utils import timezone
+
+LISTING_FIELDS = {'status', 'author_id', 'created_on'}
+
+
+def month_of(when):
+    """First day of the month ``when`` falls in, in the site's time zone"""
+    return timezone.localtime(when).date().replace(day=1)
+
+
+def month_range(year, month):
+    """
+    ``[start, end)`` datetimes of a calendar month, for a range scan of
+    ``created_on``. Raises ValueError for a month that does not exist.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def listing(post):
+    """
+    ``(month, author_id)`` that ``post`` is counted under, or None if it
+    is not published.
+    """
+    return _listing(post.status, post.author_id, post.created_on)
+
+
+def _listing(status, author_id, created_on):
+    if status != 1 or created_on is None:
+        return None
+    return month_of(created_on), author_id
+
+
+def stored_listing(post_id):
+    """
+    ``listing()`` of post ``post_id`` as it is in the database, read by
+    primary key; None if there is no such post.
+    """
+    from .models import Post
+
+    row = (
+        Post.objects.filter(pk=post_id)
+        .values_list('status', 'author_id', 'created_on')
+        .first()
+    )
+    return None if row is None else _listing(*row)
+
+
+def _add(model, delta, **key):
+    counts = model.objects.filter(**key)
+    changes = {'count': F('count') + delta}
+    if hasattr(model, 'updated_on'):
+        changes['updated_on'] = Now()
+    if counts.update(**changes) or delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **key)
+    except IntegrityError:
+        # Created by a concurrent save in the meantime.
+        counts.update(**changes)
+
+
+def record(changes):
+    """
+    Apply ``{(month, author_id): delta}`` to the counts, one UPDATE per
+    month and author that changed.
+    """
+    from .models import AuthorPostCount, MonthlyPostCount
+
+    months, authors = Counter(), Counter()
+    for (month, author_id), delta in changes.items():
+        months[month] += delta
+        authors[author_id] += delta
+    for month, delta in sorted(months.items()):
+        if delta:
+            _add(MonthlyPostCount, delta, month=month)
+    for author_id, delta in sorted(authors.items()):
+        if delta:
+            _add(AuthorPostCount, delta, author_id=author_id)
+
+
+def moved(old, new):
+    """Count a post under listing ``new`` instead of ``old`` (either None)"""
+    if old == new:
+        return
+    changes = Counter()
+    if old is not None:
+        changes[old] -= 1
+    if new is not None:
+        changes[new] += 1
+    record(changes)
+
+
+def added(posts):
+    """Count newly created ``posts`` (e.g. from ``bulk_create()``)"""
+    record(Counter(
+        key for key in map(listing, posts) if key is not None))
+
+
+def recount():
+    """
+    Rebuild both tables from the published posts, in one transaction.
+    Returns the number of months and authors with posts.
+    """
+    from .models import AuthorPostCount, MonthlyPostCount, Post
+
+    published = Post.objects.filter(status=1).order_by()
+    with transaction.atomic():
+        MonthlyPostCount.objects.all().delete()
+        AuthorPostCount.objects.all().delete()
+        months = MonthlyPostCount.objects.bulk_create(
+            MonthlyPostCount(month=row['month'], count=row['total'])
+            for row in published
+            .annotate(month=TruncMonth('created_on', output_field=DateField()))
+            .values('month').annotate(total=Count('pk')))
+        authors = AuthorPostCount.objects.bulk_create(
+            AuthorPostCount(author_id=row['author'], count=row['total'])
+            for row in published.values('author').annotate(total=Count('pk')))
+    return len(months), len(authors)
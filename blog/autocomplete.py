@@ -0,0 +1,279 @@
+"""
+In-process word-prefix index of published post titles, for search as
+you type (``/search/titles/?q=``) without a database query per key.
+
+All normalized titles live in one string, each ended by ``'\\0'``.
+``_starts`` holds the offset of every word start in that string, sorted
+by the text that follows it (a suffix array of word starts), so the
+words beginning with a prefix are one contiguous run found with two
+bisects. ``_title_starts`` maps an offset back to its title. Titles and
+slugs for display are kept in one more string, so the whole index is a
+few strings and integer arrays rather than Python objects per title.
+
+The index is loaded from the database on first use and updated from
+``Post`` saves and deletes in this process once they commit
+(``blog.signals``). Removed titles are only marked dead until the next
+full load. Other processes' changes are picked up by reloading in the
+background every ``AUTOCOMPLETE_REFRESH`` seconds.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Characters of each suffix used for ordering; longer prefixes are
+# checked against the text after the bisect.
+KEY_LENGTH = 64
+MAX_SUGGESTIONS = 20
+
+_NON_WORD = re.compile(r'\W+')
+
+
+def normalize(title):
+    """
+    Case- and accent-insensitive form of ``title``, words separated by
+    single spaces.
+    """
+    title = title or ''
+    if not title.isascii():
+        decomposed = unicodedata.normalize('NFKD', title)
+        title = ''.join(
+            ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', title.casefold()).strip()
+
+
+class TitleIndex:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded_at = None
+        self._loading = False
+        # Changes made while a load is reading the database, replayed
+        # onto the new contents; None when no load is running.
+        self._journal = None
+
+    def _reset(self):
+        self._text = ''
+        self._starts = array('I')
+        # One entry per title added: where its normalized form starts in
+        # _text, where "title\0slug\0" starts in _labels, and the post
+        # id (0 once removed or replaced).
+        self._title_starts = array('I')
+        self._labels = ''
+        self._label_starts = array('I')
+        self._ids = array('q')
+
+    def _key(self, offset):
+        return self._text[offset:offset + KEY_LENGTH]
+
+    def _entry(self, position):
+        start = self._label_starts[position]
+        title_end = self._labels.index('\0', start)
+        slug_end = self._labels.index('\0', title_end + 1)
+        return (self._ids[position], self._labels[start:title_end],
+                self._labels[title_end + 1:slug_end])
+
+    def _position(self, post_id):
+        """
+        The live entry for ``post_id``, or None.
+        """
+        needle = array('q', [post_id]).tobytes()
+        haystack = self._ids.tobytes()
+        found = haystack.find(needle)
+        while found != -1 and found % len(needle):
+            found = haystack.find(needle, found + 1)
+        return None if found == -1 else found // len(needle)
+
+    @staticmethod
+    def _label(title, slug):
+        return f"{title.replace(chr(0), '')}\0{slug.replace(chr(0), '')}\0"
+
+    def build(self, rows):
+        """
+        Replace the contents with ``rows`` of ``(post_id, title, slug)``.
+        """
+        parts, labels, starts = [], [], []
+        title_starts, label_starts, ids = array('I'), array('I'), array('q')
+        offset = label_offset = 0
+        for post_id, title, slug in rows:
+            norm = normalize(title)
+            label = self._label(title, slug)
+            title_starts.append(offset)
+            label_starts.append(label_offset)
+            ids.append(post_id)
+            starts.extend(offset + m.start()
+                          for m in re.finditer(r'\S+', norm))
+            parts.append(norm)
+            labels.append(label)
+            offset += len(norm) + 1
+            label_offset += len(label)
+        text = '\0'.join(parts) + ('\0' if parts else '')
+        starts.sort(key=lambda start: text[start:start + KEY_LENGTH])
+
+        with self._lock:
+            self._text = text
+            self._starts = array('I', starts)
+            self._title_starts = title_starts
+            self._labels = ''.join(labels)
+            self._label_starts = label_starts
+            self._ids = ids
+            self.loaded_at = time.monotonic()
+            journal, self._journal = self._journal, None
+            for change, args in journal or ():
+                change(*args)
+
+    def load(self):
+        """
+        Build the index from the published posts in the database.
+        """
+        from .models import Post
+
+        started = time.monotonic()
+        with self._lock:
+            self._journal = []
+        try:
+            self.build(
+                Post.objects.filter(status=1).order_by()
+                .values_list('pk', 'title', 'slug')
+                .iterator(chunk_size=5000))
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        logger.debug("Loaded %d titles in %.3fs",
+                     len(self), time.monotonic() - started)
+
+    def add(self, post_id, title, slug):
+        """
+        Add a post, or replace the title and slug stored for it.
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.add, (post_id, title, slug)))
+            elif not self.loaded:
+                return
+            position = self._position(post_id)
+            norm = normalize(title)
+            if position is not None:
+                start = self._title_starts[position]
+                if self._text[start:start + len(norm) + 1] == norm + '\0':
+                    # Same words: only the stored title and slug change.
+                    self._label_starts[position] = len(self._labels)
+                    self._labels += self._label(title, slug)
+                    return
+                self._ids[position] = 0
+
+            offset = len(self._text)
+            self._text += norm + '\0'
+            self._title_starts.append(offset)
+            self._label_starts.append(len(self._labels))
+            self._labels += self._label(title, slug)
+            self._ids.append(post_id)
+            for match in re.finditer(r'\S+', norm):
+                insort(self._starts, offset + match.start(), key=self._key)
+
+    def remove(self, post_id):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self.remove, (post_id,)))
+            elif not self.loaded:
+                return
+            position = self._position(post_id)
+            if position is not None:
+                self._ids[position] = 0
+
+    def search(self, prefix, limit=10):
+        """
+        Up to ``limit`` ``(post_id, title, slug)`` whose title has a word
+        starting with ``prefix`` (several words match in sequence), in
+        alphabetical order of the matching text.
+        """
+        query = normalize(prefix)
+        if not query or limit <= 0:
+            return []
+        head = query[:KEY_LENGTH]
+        size = len(head)
+
+        def key(start):
+            return self._text[start:start + size]
+
+        results, seen = [], set()
+        with self._lock:
+            lo = bisect_left(self._starts, head, key=key)
+            hi = bisect_right(self._starts, head, lo=lo, key=key)
+            for i in range(lo, hi):
+                start = self._starts[i]
+                if (len(query) > size
+                        and self._text[start:start + len(query)] != query):
+                    continue
+                position = bisect_right(self._title_starts, start) - 1
+                post_id = self._ids[position]
+                if not post_id or post_id in seen:
+                    continue
+                seen.add(post_id)
+                results.append(self._entry(position))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def suggest(self, prefix, limit=10):
+        """
+        ``search()``, loading the index first if needed and refreshing it
+        in the background once it is older than ``AUTOCOMPLETE_REFRESH``.
+        """
+        if self.loaded_at is None:
+            with self._lock:
+                if self.loaded_at is None:
+                    self.load()
+        else:
+            self._refresh_if_stale()
+        return self.search(prefix, limit)
+
+    def _refresh_if_stale(self):
+        max_age = getattr(settings, 'AUTOCOMPLETE_REFRESH', 600)
+        if not max_age or time.monotonic() - self.loaded_at < max_age:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(
+            target=self._reload, name='autocomplete-reload', daemon=True,
+        ).start()
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception:
+            logger.exception("Reloading title suggestions failed")
+        finally:
+            self._loading = False
+            connection.close()
+
+    def clear(self):
+        """
+        Drop everything; the next ``suggest()`` loads from the database.
+        """
+        with self._lock:
+            self._reset()
+            self.loaded_at = None
+            self._journal = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def __len__(self):
+        return len(self._ids) - self._ids.count(0)
+
+
+titles = TitleIndex()
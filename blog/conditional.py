@@ -0,0 +1,81 @@
+"""
+Conditional GET for the public pages.
+
+Each page gets a weak ETag and a Last-Modified date from one small
+indexed query, so a revisit with ``If-None-Match`` / ``If-Modified-Since``
+is answered with 304 Not Modified before the page is looked up in the
+page cache or rendered. ``Post.updated_on`` moves whenever the post, its
+likes or its comments change (see ``blog.signals``).
+"""
+import hashlib
+
+from django.db.models import Subquery
+from django.views.decorators.http import condition
+
+from .models import MonthlyPostCount, Post
+from .page_cache import has_pending_messages
+
+
+def page_etag(request, *parts):
+    """
+    Weak ETag for ``parts`` as seen by the requesting user: the page
+    differs per user (navbar, liked state, own pending comments).
+    """
+    user_id = getattr(getattr(request, 'user', None), 'pk', None) or 0
+    raw = ':'.join(str(part) for part in (user_id, *parts))
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conditional_page(validators):
+    """
+    Like ``django.views.decorators.http.condition`` but with a single
+    function returning ``(etag, last_modified)``, called once per request.
+    Pages showing a flash message are always sent in full.
+    """
+    def get(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            request._page_validators = (
+                (None, None) if has_pending_messages(request)
+                else validators(request, *args, **kwargs) or (None, None))
+        return request._page_validators
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs:
+            get(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs:
+            get(request, *args, **kwargs)[1],
+    )
+
+
+def post_list_validators(request, *args, **kwargs):
+    """
+    Newest change to any post, or to the published-post counts
+    (``blog.archive``), which also move when a published post is
+    deleted. One query: the newest ``updated_on`` is read from the end
+    of its index and the counts table is a row per month.
+    """
+    counted = (
+        MonthlyPostCount.objects.order_by('-updated_on')
+        .values('updated_on')[:1]
+    )
+    state = (
+        Post.objects.order_by('-updated_on')
+        .annotate(counted=Subquery(counted))
+        .values_list('updated_on', 'counted')
+        .first()
+    )
+    if state is None:
+        return None
+    last = max(when for when in state if when is not None)
+    return page_etag(request, 'list', last.isoformat()), last
+
+
+def post_detail_validators(request, slug):
+    updated_on = (
+        Post.objects.filter(slug=slug, status=1)
+        .values_list('updated_on', flat=True)[:1]
+    )
+    for last in updated_on:
+        return page_etag(request, 'post', slug, last.isoformat()), last
+    return None
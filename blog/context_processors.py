@@ -1,90 +1,82 @@
 # blog/context_processors.py
-import requests
-from datetime import datetime, timezone, timedelta
 import logging
+from functools import partial
+
+from django.utils.functional import SimpleLazyObject
+
+from . import timing
+from .time_sources import TimeSourceUnavailable, get_time_source, local_now
 
 logger = logging.getLogger(__name__)
 
+# (context key prefix, IANA zone, label for log messages)
+WORLD_ZONES = (
+    ('ireland', 'Europe/Dublin', 'Ireland'),
+    ('ethiopia', 'Africa/Addis_Ababa', 'Ethiopia'),
+)
+
+WORLD_TIME_KEYS = tuple(
+    f'{prefix}_{field}'
+    for prefix, _, _ in WORLD_ZONES
+    for field in ('time', 'date', 'timezone')
+) + ('time_error', 'time_difference')
+
 
 def world_time(request):
-    """Add world times to template context"""
-    context = {
-        'ireland_time': None,
-        'ethiopia_time': None,
-        'time_error': False,
+    """
+    Add world times to template context.
+
+    Values are lazy: nothing is looked up until a template reads one of
+    them, and the lookup runs at most once per request.
+    """
+    return {
+        key: SimpleLazyObject(partial(_world_time_value, request, key))
+        for key in WORLD_TIME_KEYS
     }
 
-    # Increase timeout to 10 seconds
-    timeout = 10
-
-    try:
-        # Get Ireland time
-        ireland_response = requests.get(
-            "https://worldtimeapi.org/api/timezone/Europe/Dublin",
-            timeout=timeout
-        )
-        ireland_response.raise_for_status()
-        ireland_data = ireland_response.json()
-
-        ireland_dt_str = ireland_data['datetime']
-        if 'Z' in ireland_dt_str:
-            ireland_dt = datetime.fromisoformat(
-                ireland_dt_str.replace('Z', '+00:00'))
-        else:
-            ireland_dt = datetime.fromisoformat(ireland_dt_str)
-
-        context['ireland_time'] = ireland_dt.strftime('%I:%M %p')
-        context['ireland_date'] = ireland_dt.strftime('%b %d, %Y')
-        context['ireland_timezone'] = 'Europe/Dublin'
-
-    except Exception as e:
-        logger.error(f"Ireland time error: {e}")
-        context['time_error'] = True
-        # Fallback
-        now_utc = datetime.now(timezone.utc)
-        context['ireland_time'] = now_utc.strftime('%I:%M %p')
-        context['ireland_date'] = now_utc.strftime('%b %d, %Y')
-        context['ireland_timezone'] = 'Europe/Dublin (est.)'
-
-    try:
-        # Get Ethiopia time
-        ethiopia_response = requests.get(
-            "https://worldtimeapi.org/api/timezone/Africa/Addis_Ababa",
-            timeout=timeout
-        )
-        ethiopia_response.raise_for_status()
-        ethiopia_data = ethiopia_response.json()
-
-        ethiopia_dt_str = ethiopia_data['datetime']
-        if 'Z' in ethiopia_dt_str:
-            ethiopia_dt = datetime.fromisoformat(
-                ethiopia_dt_str.replace('Z', '+00:00'))
-        else:
-            ethiopia_dt = datetime.fromisoformat(ethiopia_dt_str)
-
-        context['ethiopia_time'] = ethiopia_dt.strftime('%I:%M %p')
-        context['ethiopia_date'] = ethiopia_dt.strftime('%b %d, %Y')
-        context['ethiopia_timezone'] = 'Africa/Addis_Ababa'
-
-    except Exception as e:
-        logger.error(f"Ethiopia time error: {e}")
-        context['time_error'] = True
-        # Fallback (Ethiopia is UTC+3)
-        now_utc = datetime.now(timezone.utc)
-        ethiopia_dt = now_utc + timedelta(hours=3)
-        context['ethiopia_time'] = ethiopia_dt.strftime('%I:%M %p')
-        context['ethiopia_date'] = ethiopia_dt.strftime('%b %d, %Y')
-        context['ethiopia_timezone'] = 'Africa/Addis_Ababa (est.)'
+
+def _world_time_value(request, key):
+    values = getattr(request, '_world_time', None)
+    if values is None:
+        # Read lazily from inside a template; time it as a context
+        # processor all the same (blog.timing).
+        with timing.span('cp'):
+            values = request._world_time = _compute_world_time()
+    return values[key]
+
+
+def _compute_world_time():
+    source = get_time_source()
+    context = {}
+    estimated = []
+    times = {}
+
+    for prefix, tz_name, label in WORLD_ZONES:
+        try:
+            dt = source.now(tz_name)
+            context[f'{prefix}_timezone'] = tz_name
+        except Exception as e:
+            if isinstance(e, TimeSourceUnavailable):
+                logger.debug(f"{label} time skipped: {e}")
+            else:
+                logger.error(f"{label} time error: {e}")
+            # Fallback to the local tz database
+            dt = local_now(tz_name)
+            context[f'{prefix}_timezone'] = f'{tz_name} (est.)'
+            estimated.append(prefix)
+
+        times[prefix] = dt
+        context[f'{prefix}_time'] = dt.strftime('%I:%M %p')
+        context[f'{prefix}_date'] = dt.strftime('%b %d, %Y')
 
     # Only show "estimated" message if BOTH failed
-    if context['ireland_timezone'].endswith(
-            '(est.)') and context['ethiopia_timezone'].endswith('(est.)'):
-        context['time_error'] = True
-    else:
-        context['time_error'] = False
+    context['time_error'] = len(estimated) == len(WORLD_ZONES)
 
     # Calculate difference
-    if 'time_difference' not in context:
-        context['time_difference'] = "Ethiopia is 3 hours ahead"
+    hours = round((times['ethiopia'].utcoffset()
+                   - times['ireland'].utcoffset()).total_seconds() / 3600)
+    context['time_difference'] = (
+        f"Ethiopia is {hours} hour{'s' if hours != 1 else ''} ahead"
+    )
 
     return context
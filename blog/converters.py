@@ -0,0 +1,19 @@
+"""
+Path converters for zero-padded date parts, e.g. ``/archive/2026/03/``.
+"""
+
+
+class YearConverter:
+    regex = '[0-9]{4}'
+    width = 4
+
+    def to_python(self, value):
+        return int(value)
+
+    def to_url(self, value):
+        return f'{int(value):0{self.width}d}'
+
+
+class MonthConverter(YearConverter):
+    regex = '[0-9]{2}'
+    width = 2
@@ -0,0 +1,62 @@
+"""
+RSS and Atom feeds of the newest published posts.
+
+Items carry the stored excerpt, so post bodies are never loaded. Both
+feeds are served from the page cache, purged with the post list
+whenever a post changes, and answer revisits with 304 Not Modified
+(``blog.conditional``).
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+
+from .conditional import conditional_page, post_list_validators
+from .models import Post
+from .page_cache import cache_anonymous_page
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    title = "AddisTalk"
+    link = reverse_lazy('home')
+    description = (
+        "New posts on AddisTalk: Ethiopian perspectives and meaningful "
+        "discussions on culture, identity and current events.")
+
+    def items(self):
+        return (
+            Post.objects.filter(status=1)
+            .select_related('author')
+            .defer('content')
+            .order_by('-created_on', '-id')[:FEED_ITEMS]
+        )
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.excerpt
+
+    def item_link(self, post):
+        return reverse('post_detail', args=[post.slug])
+
+    def item_author_name(self, post):
+        return post.author.username
+
+    def item_pubdate(self, post):
+        return post.created_on
+
+
+class AtomPostsFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+def _serve(feed):
+    return conditional_page(post_list_validators)(
+        cache_anonymous_page('post-list')(feed))
+
+
+rss = _serve(LatestPostsFeed())
+atom = _serve(AtomPostsFeed())
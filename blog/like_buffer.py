@@ -0,0 +1,212 @@
+"""
+Write-behind buffer for likes (``LIKE_WRITE_MODE = 'buffered'``).
+
+A viral post turns every like into an UPDATE of the same row, so
+requests queue up behind each other. In buffered mode ``post_like``
+records the user's new state in this process's buffer and returns
+straight away; a background thread applies the buffered likes to the
+through table and recounts ``Post.like_count`` in batches every
+``LIKE_FLUSH_INTERVAL`` seconds.
+
+Repeated toggles by one user collapse into their final state before
+anything is written. The count returned to the acting user is the stored
+count adjusted by this process's pending changes, so it is immediately
+right for them; other visitors see it once the batch is flushed. The
+buffer is per process: with several workers, a user whose clicks land on
+different workers may briefly see their own earlier state.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from . import trending
+from .models import Post
+from .signals import purge_post_pages
+
+logger = logging.getLogger(__name__)
+
+
+class LikeBuffer:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (post_id, user_id) -> [liked in the database, liked now]
+        self._pending = {}
+        # The batch being written by flush(), until it commits: what
+        # the database will hold for those likes.
+        self._in_flight = {}
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    def toggle(self, post, user):
+        """
+        Flip ``user``'s like on ``post`` in the buffer and return
+        ``(liked, like_count)`` as that user should see them.
+        """
+        key = (post.pk, user.pk)
+        with self._lock:
+            state = self._pending.get(key)
+            if state is None and key in self._in_flight:
+                stored = self._in_flight[key][1]
+                state = [stored, stored]
+        if state is None:
+            stored = post.likes.filter(pk=user.pk).exists()
+            state = [stored, stored]
+        with self._lock:
+            state = self._pending.setdefault(key, state)
+            state[1] = not state[1]
+            if state[0] == state[1]:
+                del self._pending[key]
+            liked = state[1]
+            delta = self._delta(post.pk)
+        self._ensure_flusher()
+        return liked, post.like_count + delta
+
+    def pending_state(self, post_id, user_id):
+        """
+        ``user_id``'s buffered like state on ``post_id``, or None.
+        """
+        key = (post_id, user_id)
+        with self._lock:
+            state = self._pending.get(key) or self._in_flight.get(key)
+        return None if state is None else state[1]
+
+    def pending_for_user(self, user_id):
+        """
+        ``{post_id: liked}`` for ``user_id``'s buffered likes.
+        """
+        with self._lock:
+            return {
+                post_id: now
+                for states in (self._in_flight, self._pending)
+                for (post_id, uid), (_, now) in states.items()
+                if uid == user_id
+            }
+
+    def pending_delta(self, post_id):
+        with self._lock:
+            return self._delta(post_id)
+
+    def _delta(self, post_id):
+        # A pending entry for an in-flight like starts from the state
+        # being written, so the two changes add up.
+        return sum(
+            now - stored
+            for states in (self._in_flight, self._pending)
+            for (pid, _), (stored, now) in states.items()
+            if pid == post_id
+        )
+
+    def flush(self):
+        """
+        Write every buffered like to the database in one transaction and
+        recount the affected posts. Returns the number of changes written.
+
+        Until the transaction commits, the batch stays visible to
+        ``toggle()`` as in flight, so a click meanwhile starts from the
+        state being written rather than the one still in the database.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._in_flight = pending
+            try:
+                return self._write(pending)
+            finally:
+                with self._lock:
+                    self._in_flight = {}
+
+    def _write(self, pending):
+        if not pending:
+            return 0
+
+        Like = Post.likes.through
+        post_ids = {post_id for post_id, _ in pending}
+        removed = [key for key, (_, now) in pending.items() if not now]
+        try:
+            with transaction.atomic():
+                # Skip likes on posts or by users deleted since the click.
+                posts = Post.objects.filter(pk__in=post_ids)
+                post_ids = set(posts.values_list('pk', flat=True))
+                user_ids = set(User.objects.filter(
+                    pk__in={user_id for _, user_id in pending},
+                ).values_list('pk', flat=True))
+                added = [
+                    (p, u) for (p, u), (_, now) in pending.items()
+                    if now and p in post_ids and u in user_ids
+                ]
+                Like.objects.bulk_create(
+                    [Like(post_id=p, user_id=u) for p, u in added],
+                    ignore_conflicts=True)
+                for post_id in {p for p, _ in removed}:
+                    Like.objects.filter(
+                        post_id=post_id,
+                        user_id__in=[u for p, u in removed if p == post_id],
+                    ).delete()
+                # Posts grouped by their net change in likes, for the
+                # trending score: one recount per distinct change.
+                net = defaultdict(int)
+                for (post_id, _), (stored, now) in pending.items():
+                    net[post_id] += now - stored
+                by_delta = defaultdict(set)
+                for post_id in post_ids:
+                    by_delta[net[post_id]].add(post_id)
+                for delta, group in by_delta.items():
+                    posts.filter(pk__in=group).recount_likes(
+                        trend_score=trending.bump(likes=delta))
+                purge_post_pages(*posts.values_list('slug', flat=True))
+        except Exception:
+            # Put the changes back. A user who toggled again meanwhile
+            # started from the unwritten state; restore what is stored.
+            with self._lock:
+                for key, (stored, now) in pending.items():
+                    state = self._pending.setdefault(key, [stored, now])
+                    state[0] = stored
+                    if state[0] == state[1]:
+                        del self._pending[key]
+                self._in_flight = {}
+            raise
+        return len(pending)
+
+    def _ensure_flusher(self):
+        interval = getattr(settings, 'LIKE_FLUSH_INTERVAL', 1.0)
+        if not interval or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(
+                    target=self._run, args=(interval,),
+                    name='like-buffer-flusher', daemon=True)
+                self._flusher.start()
+
+    def stop(self):
+        """
+        Stop the flusher thread after a final flush.
+        """
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._stopped.clear()
+
+    def _run(self, interval):
+        while True:
+            stopping = self._stopped.wait(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing buffered likes failed")
+            finally:
+                connection.close()
+            if stopping:
+                return
+
+
+buffer = LikeBuffer()
+atexit.register(buffer.flush)
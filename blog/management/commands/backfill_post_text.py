@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill Post.excerpt and Post.word_count from the post content. "
+        "By default only posts without an excerpt are processed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recompute every post, not just missing ones.")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Posts written per bulk update (default: 500).")
+
+    def handle(self, *args, all=False, batch_size=500, **options):
+        posts = Post.objects.only('pk', 'content').order_by('pk')
+        if not all:
+            posts = posts.filter(excerpt='')
+
+        batch, total = [], 0
+        for post in posts.iterator(chunk_size=batch_size):
+            post.update_text_fields()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                total += Post.objects.bulk_update(
+                    batch, ['excerpt', 'word_count'])
+                batch = []
+        total += Post.objects.bulk_update(batch, ['excerpt', 'word_count'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated text fields for {total} post(s)."))
@@ -0,0 +1,34 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the \"read next\" index (blog.related) from every published "
+        "post and store each post's related posts. With --incremental, "
+        "only update it for posts changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Update the saved index instead of rebuilding it.")
+
+    def handle(self, *args, incremental=False, **options):
+        path = related.index_path()
+        if not path:
+            raise CommandError("RELATED_POSTS_INDEX is not set.")
+        if incremental and not os.path.exists(path):
+            raise CommandError(
+                f"No related-posts index at {path}; run the command "
+                "without --incremental first.")
+
+        started = time.monotonic()
+        written = related.refresh() if incremental else related.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated related posts of {written} post(s) in "
+            f"{time.monotonic() - started:.1f}s."))
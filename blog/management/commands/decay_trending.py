@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog import trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-decay the trending scores (blog.trending): move the epoch to "
+        "now, scale every Post.trend_score to match and drop posts whose "
+        "score has faded. Run it periodically, e.g. hourly."
+    )
+
+    def handle(self, *args, **options):
+        dropped = trending.decay()
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-decayed trending scores; {dropped} post(s) dropped out."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog import page_cache
+
+
+class Command(BaseCommand):
+    help = "Report hits, misses and the hit ratio of the anonymous page cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Zero the counters after reporting them.")
+
+    def handle(self, *args, reset=False, **options):
+        counts = page_cache.stats()
+        self.stdout.write(
+            f"hits={counts['hits']} misses={counts['misses']} "
+            f"hit_ratio={counts['hit_ratio']:.1%}")
+        if reset:
+            page_cache.reset_stats()
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search index (blog.search) from every "
+        "post's title and content."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Posts indexed per batch (default: 1000).")
+
+    def handle(self, *args, batch_size=1000, **options):
+        engine = search.backend()
+        if engine is None:
+            raise CommandError(
+                f"No full-text search index for {connection.vendor}; "
+                "searches use icontains instead.")
+
+        posts = Post.objects.only('pk', 'title', 'content').order_by('pk')
+        total = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            engine.install(cursor)
+            engine.clear(cursor)
+            batch = []
+            for post in posts.iterator(chunk_size=batch_size):
+                batch.append((post.pk, *search.document(
+                    post.title, post.content)))
+                if len(batch) >= batch_size:
+                    engine.index(cursor, batch)
+                    total += len(batch)
+                    batch = []
+            engine.index(cursor, batch)
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} post(s)."))
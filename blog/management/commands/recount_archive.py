@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the published-post counts per month and per author "
+        "(blog.archive) from the posts, e.g. after changing post status "
+        "with QuerySet.update()."
+    )
+
+    def handle(self, *args, **options):
+        months, authors = archive.recount()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recounted posts for {months} month(s) and {authors} "
+            f"author(s)."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.like_count and Post.comment_count from the likes "
+        "and approved comments, fixing any drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report posts whose counters are wrong.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Posts repaired per UPDATE (default: 1000).")
+
+    def handle(self, *args, dry_run=False, batch_size=1000, **options):
+        drifted = list(
+            Post.objects.with_counter_drift()
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        for start in range(0, len(drifted), batch_size):
+            batch = drifted[start:start + batch_size]
+            if dry_run:
+                continue
+            with transaction.atomic():
+                posts = Post.objects.filter(pk__in=batch)
+                posts.recount_likes()
+                posts.recount_comments()
+
+        verb = "need repair" if dry_run else "repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(drifted)} post(s) {verb}."))
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.4 on 2026-10-17 22:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_featured_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_on', '-id'], name='blog_post_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.4 on 2026-10-17 22:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+
+    def count_for_post(queryset):
+        return Coalesce(Subquery(
+            queryset.filter(post=OuterRef('pk')).order_by().values('post')
+            .annotate(total=Count('*')).values('total')
+        ), 0)
+
+    Post.objects.update(
+        like_count=count_for_post(Post.likes.through.objects),
+        comment_count=count_for_post(Comment.objects.filter(approved=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
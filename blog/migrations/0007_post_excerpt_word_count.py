@@ -0,0 +1,40 @@
+# Generated by Django 6.0.4 on 2026-10-17 22:32
+
+from django.db import migrations, models
+
+from blog import text
+
+
+def backfill_text_fields(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        plain = text.plain_text(post.content)
+        post.excerpt = text.excerpt(plain)
+        post.word_count = len(plain.split())
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['excerpt', 'word_count'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt', 'word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_like_count_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_text_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.4 on 2026-10-17 23:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_on(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated_on=models.F('created_on'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_excerpt_word_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_on',
+            field=models.DateTimeField(
+                auto_now=True, db_index=True,
+                default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_on, migrations.RunPython.noop),
+    ]
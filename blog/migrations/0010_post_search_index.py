@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from blog import search
+
+
+def create_search_index(apps, schema_editor):
+    engine = search.backend(schema_editor.connection)
+    if engine is None:
+        return
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.using(schema_editor.connection.alias).order_by('pk')
+    with schema_editor.connection.cursor() as cursor:
+        engine.install(cursor)
+        engine.index(cursor, (
+            (pk, *search.document(title, content))
+            for pk, title, content in posts.values_list(
+                'pk', 'title', 'content').iterator(chunk_size=2000)
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    engine = search.backend(schema_editor.connection)
+    if engine is not None:
+        with schema_editor.connection.cursor() as cursor:
+            engine.uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.4 on 2026-10-17 23:53
+
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+from blog import trending
+
+
+def start_trending(apps, schema_editor):
+    """
+    Create the epoch and score posts by their recent approved comments;
+    likes have no timestamps to go on.
+    """
+    TrendingEpoch = apps.get_model('blog', 'TrendingEpoch')
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    db = schema_editor.connection.alias
+    now = time.time()
+    TrendingEpoch.objects.using(db).create(epoch=now)
+
+    half_life = trending.half_life()
+    scores = Counter()
+    recent = Comment.objects.using(db).filter(approved=True).values_list(
+        'post_id', 'created_on')
+    for post_id, created_on in recent.iterator(chunk_size=2000):
+        age = now - created_on.timestamp()
+        scores[post_id] += trending.COMMENT_WEIGHT * 2 ** (-age / half_life)
+    for post_id, score in scores.items():
+        if score >= trending.FADED:
+            Post.objects.using(db).filter(pk=post_id).update(
+                trend_score=score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_related_post'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trend_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 1), ('trend_score__gt', 0)), fields=['-trend_score', '-id'], name='blog_post_trending_idx'),
+        ),
+        migrations.RunPython(start_trending, migrations.RunPython.noop),
+    ]
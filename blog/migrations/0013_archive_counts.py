@@ -0,0 +1,62 @@
+# Generated by Django 6.0.4 on 2026-10-18 00:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncMonth
+
+
+def count_posts(apps, schema_editor):
+    """Fill both tables from the published posts (blog.archive)."""
+    Post = apps.get_model('blog', 'Post')
+    MonthlyPostCount = apps.get_model('blog', 'MonthlyPostCount')
+    AuthorPostCount = apps.get_model('blog', 'AuthorPostCount')
+    db = schema_editor.connection.alias
+    published = Post.objects.using(db).filter(status=1).order_by()
+    MonthlyPostCount.objects.using(db).bulk_create(
+        MonthlyPostCount(month=row['month'], count=row['total'])
+        for row in published
+        .annotate(month=TruncMonth('created_on', output_field=DateField()))
+        .values('month').annotate(total=Count('pk')))
+    AuthorPostCount.objects.using(db).bulk_create(
+        AuthorPostCount(author_id=row['author'], count=row['total'])
+        for row in published.values('author').annotate(total=Count('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0012_post_trend_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorPostCount',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-count', 'author'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['author', '-created_on', '-id'], name='blog_post_author_idx'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
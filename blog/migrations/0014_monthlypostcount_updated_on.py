@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_archive_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlypostcount',
+            name='updated_on',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
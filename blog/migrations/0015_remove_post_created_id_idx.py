@@ -0,0 +1,17 @@
+# Generated by Django 6.0.4 on 2026-10-18 00:51
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_monthlypostcount_updated_on'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_post_created_id_idx',
+        ),
+    ]
@@ -1,10 +1,125 @@
-from django.db import models
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest, Now
 from django.contrib.auth.models import User
 from cloudinary.models import CloudinaryField
 
+from . import archive, search, text, trending
+
 STATUS = ((0, "Draft"), (1, "Published"))
 
 
+def _count_for_post(queryset):
+    """
+    Correlated COUNT of ``queryset`` rows belonging to the outer post.
+    """
+    counts = (
+        queryset.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class PostQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips save(); fill the derived text fields here so
+        # bulk imports get them too.
+        objs = list(objs)
+        for obj in objs:
+            obj.update_text_fields()
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            archive.added(created)
+        search.index_posts(created, using=connections[self.db])
+        return created
+
+    def search(self, query, limit=None, offset=0):
+        """
+        Published posts among these matching ``query``, best match first,
+        as a list. Uses the full-text index (``blog.search``) where the
+        database has one, else ``icontains`` on title and body, newest
+        first.
+        """
+        ids = search.post_ids(
+            query, limit=limit, offset=offset, using=connections[self.db])
+        if ids is None:
+            words = search.terms(query)
+            if not words:
+                return []
+            matches = self.filter(status=1).order_by('-created_on', '-id')
+            for word in words:
+                matches = matches.filter(
+                    Q(title__icontains=word) | Q(content__icontains=word))
+            end = None if limit is None else offset + limit
+            return list(matches[offset:end])
+        posts = self.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+    def touch(self, **changes):
+        """
+        Apply ``changes`` and bump ``updated_on`` in one UPDATE, so the
+        posts' HTTP validators change.
+        """
+        return self.update(updated_on=Now(), **changes)
+
+    def recount_likes(self, **changes):
+        """
+        Recompute ``like_count`` for these posts in one UPDATE, along
+        with any other ``changes``.
+        """
+        return self.touch(
+            like_count=_count_for_post(Post.likes.through.objects),
+            **changes)
+
+    def recount_comments(self, **changes):
+        """
+        Recompute ``comment_count`` (approved comments) in one UPDATE,
+        along with any other ``changes``.
+        """
+        return self.touch(
+            comment_count=_count_for_post(
+                Comment.objects.filter(approved=True)),
+            **changes)
+
+    def trending(self):
+        """
+        Published posts with recent likes or comments, hottest first
+        (``blog.trending``), read in order from a partial index.
+        """
+        return self.filter(status=1, trend_score__gt=0).order_by(
+            '-trend_score', '-id')
+
+    def liked_ids(self, user):
+        """
+        Primary keys of these posts that ``user`` has liked, read from
+        the likes table in one query.
+        """
+        if not user.is_authenticated:
+            return set()
+        return set(
+            Post.likes.through.objects
+            .filter(user_id=user.pk, post_id__in=self.values('pk'))
+            .values_list('post_id', flat=True)
+        )
+
+    def with_counter_drift(self):
+        """
+        Posts whose stored counters disagree with the related rows.
+        """
+        return self.alias(
+            actual_likes=_count_for_post(Post.likes.through.objects),
+            actual_comments=_count_for_post(
+                Comment.objects.filter(approved=True)),
+        ).exclude(
+            like_count=models.F('actual_likes'),
+            comment_count=models.F('actual_comments'),
+        )
+
+
 class Post(models.Model):
     """
     Model representing a blog post.
@@ -16,19 +131,134 @@ class Post(models.Model):
     )
     content = models.TextField()
     created_on = models.DateTimeField(auto_now_add=True)
+    # Last change to anything shown on the post page, including likes
+    # and comments; the source of the ETag / Last-Modified validators.
+    updated_on = models.DateTimeField(auto_now=True, db_index=True)
     status = models.IntegerField(choices=STATUS, default=0)
     likes = models.ManyToManyField(
         User, related_name='post_likes', blank=True)
     featured_image = CloudinaryField('image', default='placeholder')
+    # Denormalized counters, kept in step by blog.signals.
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Derived from content on save so list pages never load the body.
+    excerpt = models.TextField(blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    # Recent likes and comments with exponential decay, in the units of
+    # the current TrendingEpoch (blog.trending).
+    trend_score = models.FloatField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_on"]
+        indexes = [
+            # The public feed: published posts, newest first, by page or
+            # by (created_on, id) cursor. Partial, so drafts cost nothing
+            # and the index stays small.
+            models.Index(
+                fields=['-created_on', '-id'],
+                condition=models.Q(status=1),
+                name='blog_post_published_idx'),
+            # The trending feed. Only posts with a score are in it; the
+            # decay job zeroes scores that have faded.
+            models.Index(
+                fields=['-trend_score', '-id'],
+                condition=models.Q(status=1, trend_score__gt=0),
+                name='blog_post_trending_idx'),
+            # An author's published posts, newest first (author pages).
+            models.Index(
+                fields=['author', '-created_on', '-id'],
+                condition=models.Q(status=1),
+                name='blog_post_author_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored slug so a rename can purge the old URL.
+        instance._loaded_slug = instance.__dict__.get('slug')
+        # And where it was counted, so post_save can move it
+        # (blog.archive).
+        if archive.LISTING_FIELDS <= instance.__dict__.keys():
+            instance._loaded_listing = archive.listing(instance)
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.update_text_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'excerpt', 'word_count'}
+        # The post_save handlers update the archive counts; keep both
+        # writes in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def update_text_fields(self):
+        """
+        Recompute ``excerpt`` and ``word_count`` from ``content``.
+        """
+        plain = text.plain_text(self.content)
+        self.excerpt = text.excerpt(plain)
+        self.word_count = len(plain.split())
+
+    @property
+    def reading_time(self):
+        return text.reading_time(self.word_count)
+
+    def read_next(self):
+        """
+        The precomputed related posts (``blog.related``) that are still
+        published, most similar first, with their authors, in one query.
+        """
+        links = (
+            self.related_links.filter(related__status=1)
+            .select_related('related__author')
+            .defer('related__content')
+        )
+        return [link.related for link in links]
+
     def number_of_likes(self):
-        return self.likes.count()
+        return self.like_count
+
+    def toggle_like(self, user):
+        """
+        Like the post for ``user``, or unlike it if they already do, and
+        return ``(liked, like_count)``.
+
+        The through-table change and the counter update share one
+        transaction, and the delete runs first so concurrent toggles by
+        the same user serialize instead of both seeing "not liked". Rows
+        are written directly, so m2m_changed does not fire; callers purge
+        cached pages themselves.
+        """
+        Like = Post.likes.through
+        likes = Like.objects.filter(post_id=self.pk, user_id=user.pk)
+        with transaction.atomic():
+            liked = not likes.delete()[0]
+            if liked:
+                try:
+                    with transaction.atomic():
+                        Like.objects.create(post_id=self.pk, user_id=user.pk)
+                except IntegrityError:
+                    # A concurrent toggle liked it first; undo theirs.
+                    likes.delete()
+                    liked = False
+            posts = Post.objects.filter(pk=self.pk)
+            # Never below zero, should the counter have drifted (likes
+            # deleted in cascade skip m2m_changed).
+            posts.touch(
+                like_count=Greatest(
+                    models.F('like_count') + (1 if liked else -1), 0),
+                trend_score=trending.bump(likes=1 if liked else -1))
+            self.like_count = posts.values_list(
+                'like_count', flat=True).get()
+        return liked, self.like_count
 
 
 class Comment(models.Model):
@@ -47,6 +277,107 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["created_on"]
+        indexes = [
+            # A post's approved comments in thread order, and the
+            # approved-comment recount. Boolean filters compile to bare
+            # "approved" / NOT "approved" terms, which only a partial
+            # index with the same condition can serve.
+            models.Index(
+                fields=['post', 'created_on', 'id'],
+                condition=models.Q(approved=True),
+                name='blog_comment_thread_idx'),
+            # A reader's own pending comments on a post, in thread order
+            # to be merged into a page of the approved ones.
+            models.Index(
+                fields=['post', 'author', 'created_on', 'id'],
+                condition=models.Q(approved=False),
+                name='blog_comment_pending_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored approval so post_save knows if it changed.
+        instance._loaded_approved = instance.__dict__.get('approved')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The post_save handler updates Post.comment_count; keep both
+        # writes in one transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class RelatedPost(models.Model):
+    """
+    One entry of a post's precomputed "read next" list, written by
+    ``blog.related``: ``related`` is the ``rank``-th most similar post.
+    """
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="related_links"
+    )
+    related = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="+"
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["rank"]
+        constraints = [
+            # Also the index behind reading a post's list in rank order.
+            models.UniqueConstraint(
+                fields=['post', 'rank'], name='blog_related_post_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class MonthlyPostCount(models.Model):
+    """
+    Published posts created in ``month`` (its first day), kept up to
+    date by ``blog.archive``.
+    """
+    month = models.DateField(unique=True)
+    count = models.IntegerField(default=0)
+    # Last change to the count; the post list validators read it so
+    # that deleting a published post moves them (blog.conditional).
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return f"{self.month:%B %Y} ({self.count})"
+
+
+class AuthorPostCount(models.Model):
+    """
+    Published posts by ``author``, kept up to date by ``blog.archive``.
+    """
+    author = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="+"
+    )
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-count", "author"]
+
+    def __str__(self):
+        return f"{self.author} ({self.count})"
+
+
+class TrendingEpoch(models.Model):
+    """
+    The moment ``Post.trend_score`` values are expressed relative to
+    (``blog.trending``); a single row, moved forward by the decay job.
+    """
+    # Seconds since the Unix epoch.
+    epoch = models.FloatField()
+
+    def __str__(self):
+        return f"Trending epoch {self.epoch:.0f}"
@@ -0,0 +1,201 @@
+# blog/page_cache.py
+"""
+Full-page cache for logged-out visitors.
+
+Views opt in with ``@cache_anonymous_page('group', ...)``. Each group has
+a generation number in the cache and the page key includes the current
+generation of every group the page belongs to, so ``purge('group')``
+invalidates exactly those pages without having to know their URLs.
+Group names may use the view's URL kwargs, e.g. ``'post:{slug}'``.
+
+Pages that declare ``holes`` are also cached for logged-in readers as
+the public page: per-user parts (navbar, like button, comment form, the
+reader's own comments) are fetched from a small endpoint after load.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import transaction
+from django.urls import reverse
+
+HITS_KEY = 'page:stats:hits'
+MISSES_KEY = 'page:stats:misses'
+
+
+def _cache():
+    return caches[getattr(settings, 'PAGE_CACHE', 'default')]
+
+
+def has_pending_messages(request):
+    """
+    True if the messages framework has something to show on this request.
+    Such pages are personal and must not be cached or revalidated.
+    """
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def _variant(request, holes):
+    """
+    Which cached copy ``request`` may be served: 'anon', 'member' (the
+    public page with holes for a logged-in reader) or None (no cache).
+    """
+    if not (getattr(settings, 'PAGE_CACHE_ENABLED', True)
+            and request.method in ('GET', 'HEAD')
+            and not has_pending_messages(request)):
+        return None
+    user = getattr(request, 'user', None)
+    if user is None:
+        return None
+    if not user.is_authenticated:
+        return 'anon'
+    if holes and getattr(settings, 'PAGE_CACHE_MEMBERS', True):
+        return 'member'
+    return None
+
+
+def _is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Set-Cookie')
+    )
+
+
+def _generation_key(group):
+    return f'page:gen:{group}'
+
+
+def _page_key(request, groups, variant):
+    cache = _cache()
+    gen_keys = [_generation_key(group) for group in groups]
+    generations = cache.get_many(gen_keys)
+    path = hashlib.md5(
+        request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+    versions = '.'.join(str(generations.get(key, 0)) for key in gen_keys)
+    return f'page:{variant}:{request.method}:{path}:{versions}'
+
+
+def _record(key):
+    cache = _cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def _render_public(view_func, request, holes, args, kwargs):
+    """
+    Render the view as an anonymous visitor would see it, marked with
+    the URL the reader's own parts are fetched from.
+    """
+    user = request.user
+    request.user = AnonymousUser()
+    request.page_holes_url = reverse(holes, kwargs=kwargs)
+    try:
+        response = view_func(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+    finally:
+        request.user = user
+    return response
+
+
+def cache_anonymous_page(*groups, holes=None):
+    """
+    Cache the decorated view's response for anonymous visitors until one
+    of ``groups`` is purged (or ``PAGE_CACHE_TIMEOUT`` passes).
+
+    With ``holes``, the name of a URL taking the same kwargs, logged-in
+    readers get the public page too (cached once for all of them) and
+    ``holes.js`` fills in their own parts from that endpoint.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            variant = _variant(request, holes)
+            if variant is None:
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(
+                request, [group.format(**kwargs) for group in groups],
+                variant)
+            cache = _cache()
+            response = cache.get(key)
+            if response is not None:
+                _record(HITS_KEY)
+                # Validators are per request (blog.conditional); never
+                # replay the ones stored with the page.
+                for header in ('ETag', 'Last-Modified'):
+                    if response.has_header(header):
+                        del response[header]
+                response['X-Page-Cache'] = 'HIT'
+                return response
+
+            _record(MISSES_KEY)
+            if variant == 'member':
+                response = _render_public(
+                    view_func, request, holes, args, kwargs)
+            else:
+                response = view_func(request, *args, **kwargs)
+            timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+            def store(response):
+                if _is_cacheable_response(response):
+                    cache.set(key, response, timeout)
+
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def purge(*groups):
+    """
+    Invalidate every cached page that belongs to any of ``groups``.
+    """
+    cache = _cache()
+    for group in groups:
+        key = _generation_key(group)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, None)
+
+
+def purge_on_commit(*groups):
+    """
+    Purge ``groups`` now and again once the current transaction commits,
+    so a request that rendered the old rows in between is not kept.
+    """
+    purge(*groups)
+    transaction.on_commit(lambda: purge(*groups))
+
+
+def stats():
+    """
+    Hit/miss counters and hit ratio since the cache was last cleared.
+    """
+    counts = _cache().get_many([HITS_KEY, MISSES_KEY])
+    hits = counts.get(HITS_KEY, 0)
+    misses = counts.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    _cache().delete_many([HITS_KEY, MISSES_KEY])
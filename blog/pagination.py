@@ -0,0 +1,178 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of ``OFFSET n`` each page continues from the sort key of the last
+row seen, so a deep page costs the same index range scan as the first one
+and no ``COUNT(*)`` is needed. Cursors are opaque URL-safe tokens.
+"""
+import base64
+import heapq
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """The cursor token could not be decoded."""
+
+
+class CursorPage:
+    """
+    A page of results plus the tokens needed to move either way.
+    Mirrors the parts of ``django.core.paginator.Page`` templates use.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by the unique key ``ordering`` (default newest
+    first on ``(created_on, id)``). All fields must sort the same way.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_on', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+
+    def page(self, cursor=None):
+        """
+        Return the first page, or the page ``cursor`` points to.
+        """
+        if not cursor:
+            rows = self._rows(None, False)
+            return self._build(rows, has_more=len(rows) > self.per_page,
+                               backwards=False, from_cursor=False)
+
+        direction, key = self.decode(cursor)
+        backwards = direction == 'p'
+        rows = self._rows(key, backwards)
+        return self._build(rows, has_more=len(rows) > self.per_page,
+                           backwards=backwards, from_cursor=True)
+
+    def encode(self, direction, obj):
+        values = [
+            self._field(name).value_to_string(obj) for name in self.fields
+        ]
+        raw = json.dumps([direction] + values, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, *values = json.loads(
+                base64.urlsafe_b64decode(padded.encode()))
+            if direction not in ('n', 'p') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            key = [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+            # The key fields are never null, and None cannot be compared.
+            if None in key:
+                raise ValueError(cursor)
+        except (ValueError, TypeError, UnicodeDecodeError,
+                ValidationError) as e:
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+        return direction, key
+
+    def _rows(self, key, backwards):
+        # Up to ``per_page + 1`` rows after ``key`` (None: from the start).
+        return list(self._slice(self.queryset, key, backwards))
+
+    def _slice(self, queryset, key, backwards):
+        queryset = self._ordered(backwards, queryset)
+        if key is not None:
+            queryset = queryset.filter(self._after(key, backwards))
+        return queryset[:self.per_page + 1]
+
+    def _ordered(self, backwards, queryset=None):
+        if queryset is None:
+            queryset = self.queryset
+        if not backwards:
+            return queryset.order_by(*self.ordering)
+        return queryset.order_by(*(
+            name[1:] if name.startswith('-') else '-' + name
+            for name in self.ordering
+        ))
+
+    def _after(self, key, backwards):
+        # Rows strictly after ``key`` in the direction we are reading:
+        # (a < x) OR (a = x AND b < y) ... for descending order.
+        # The redundant bound on the leading field lets the database seek
+        # into the index instead of scanning it from the start.
+        lookup = 'lt' if self.descending != backwards else 'gt'
+        condition = Q()
+        for i, name in enumerate(self.fields):
+            term = Q(**{f'{name}__{lookup}': key[i]})
+            for prev_name, prev_value in zip(self.fields[:i], key[:i]):
+                term &= Q(**{prev_name: prev_value})
+            condition |= term
+        return Q(**{f'{self.fields[0]}__{lookup}e': key[0]}) & condition
+
+    def _build(self, rows, has_more, backwards, from_cursor):
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, from_cursor
+        page = CursorPage(rows, self)
+        if rows and has_next:
+            page.next_cursor = self.encode('n', rows[-1])
+        if rows and has_previous:
+            page.previous_cursor = self.encode('p', rows[0])
+        return page
+
+    def _field(self, name):
+        return self.queryset.model._meta.get_field(name)
+
+
+class MergedCursorPaginator(CursorPaginator):
+    """
+    ``CursorPaginator`` over several querysets of one model that share no
+    rows, for a union the database could only read by sorting it: each
+    page reads ``per_page + 1`` rows from every queryset, in index order,
+    and keeps the first of them.
+    """
+
+    def __init__(self, querysets, per_page, ordering=('-created_on', '-id')):
+        querysets = list(querysets)
+        super().__init__(querysets[0], per_page, ordering)
+        self.querysets = querysets
+        self.attnames = [self._field(name).attname for name in self.fields]
+
+    def _rows(self, key, backwards):
+        merged = heapq.merge(
+            *(self._slice(queryset, key, backwards)
+              for queryset in self.querysets),
+            key=self._key, reverse=self.descending != backwards)
+        return list(islice(merged, self.per_page + 1))
+
+    def _key(self, obj):
+        return tuple(getattr(obj, attname) for attname in self.attnames)
@@ -0,0 +1,485 @@
+"""
+"Read next" recommendations: for every published post, the ``TOP_K``
+most similar other posts by their words, precomputed in a batch job and
+stored as ``RelatedPost`` rows so the post page reads them in one query.
+
+Similarity is the cosine of TF-IDF vectors (sublinear term frequency)
+over the plain text of the title, counted ``TITLE_WEIGHT`` times, and
+the body. Words found in a single post cannot make two posts similar and
+are left out; the vocabulary keeps the ``MAX_TERMS`` most widespread.
+Each sparse vector is multiplied by a fixed Gaussian matrix down to
+``DIMENSIONS`` dense values (a random projection, which keeps cosines to
+within a few hundredths), so NumPy scores every pair of posts with a
+few large matrix products instead of per-post Python loops.
+
+The vocabulary, IDF weights, vectors and lists are saved to
+``RELATED_POSTS_INDEX``. ``manage.py build_related_posts`` builds them
+from scratch. When a post is published, edited, unpublished or deleted,
+``blog.signals`` schedules ``refresh()`` for it in the background: the
+post is vectorized against the saved vocabulary and only the lists it
+can have changed are recomputed (its own, those it was in, and those it
+now beats the last entry of). New words count from the next full build.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import page_cache, text
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 4
+DIMENSIONS = 256
+MAX_TERMS = 30_000
+TITLE_WEIGHT = 3
+# Lower cosines are projection noise rather than a shared subject.
+MIN_SCORE = 0.1
+# Seed of the projection matrix; changing it needs a full build.
+SEED = 2026
+# Posts scored against all others at once: a BLOCK x posts matrix.
+BLOCK = 256
+# Posts whose RelatedPost rows are rewritten per transaction.
+WRITE_BATCH = 500
+
+_WORD = re.compile(r'[^\W\d_]{2,}')
+
+STOP_WORDS = frozenset("""
+    about above after again against all also am an and any are as at be
+    because been before being below between both but by can could did do
+    does doing down during each few for from further had has have having
+    he her here hers herself him himself his how if in into is it its
+    itself just me more most my myself no nor not now of off on once only
+    or other our ours ourselves out over own same she should so some such
+    than that the their theirs them themselves then there these they this
+    those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours yourself
+    yourselves
+""".split())
+
+
+def terms(title, content):
+    """
+    Word counts of a post, title words counted ``TITLE_WEIGHT`` times.
+    """
+    counts = Counter(
+        word for word in _WORD.findall(text.plain_text(content).casefold())
+        if word not in STOP_WORDS)
+    for word in _WORD.findall((title or '').casefold()):
+        if word not in STOP_WORDS:
+            counts[word] += TITLE_WEIGHT
+    return counts
+
+
+def checksum(title, content):
+    return zlib.crc32(f"{title}\0{content}".encode())
+
+
+class Index:
+    """
+    Vectors and related-post lists for a set of posts, ordered by id.
+    ``related`` holds post ids (0 pads short lists) and ``scores`` their
+    cosines.
+    """
+
+    def __init__(self, words, idf, ids, vectors, checksums, related,
+                 scores, synced_at=0.0):
+        self.words = words
+        self.idf = idf
+        self.ids = ids
+        self.vectors = vectors
+        self.checksums = checksums
+        self.related = related
+        self.scores = scores
+        # When the database was last scanned for changed posts.
+        self.synced_at = synced_at
+        self._projection = None
+        self._columns = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def projection(self):
+        if self._projection is None:
+            rng = np.random.default_rng(SEED)
+            self._projection = rng.standard_normal(
+                (len(self.words), DIMENSIONS), dtype=np.float32)
+        return self._projection
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = {
+                word: column
+                for column, word in enumerate(self.words.tolist())}
+        return self._columns
+
+    def _project(self, rows, columns, counts, size):
+        """
+        Unit vectors of ``size`` posts from their nonzero terms, given as
+        ``(row, column, count)`` arrays sorted by row.
+        """
+        vectors = np.zeros((size, DIMENSIONS), np.float32)
+        weights = (1 + np.log(counts.astype(np.float32)))
+        weights *= self.idf[columns]
+        starts = np.arange(0, size + BLOCK, BLOCK)
+        bounds = np.searchsorted(rows, starts)
+        for first, lo, hi in zip(starts, bounds[:-1], bounds[1:]):
+            if lo == hi:
+                continue
+            # This block's TF-IDF matrix, restricted to the terms it uses.
+            used, block_columns = np.unique(
+                columns[lo:hi], return_inverse=True)
+            tfidf = np.zeros((BLOCK, len(used)), np.float32)
+            tfidf[rows[lo:hi] - first, block_columns] = weights[lo:hi]
+            block = vectors[first:first + BLOCK]
+            block[:] = (tfidf @ self.projection[used])[:len(block)]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _vectorize(self, counters):
+        rows, columns, counts = [], [], []
+        for row, counter in enumerate(counters):
+            for word, count in counter.items():
+                column = self.columns.get(word)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+                    counts.append(count)
+        return self._project(
+            np.array(rows, np.intp), np.array(columns, np.intp),
+            np.array(counts, np.float32), len(counters))
+
+    def _top(self, positions):
+        """
+        ``(related, scores)`` for the posts at ``positions``.
+        """
+        related = np.zeros((len(positions), TOP_K), np.int64)
+        scores = np.zeros((len(positions), TOP_K), np.float32)
+        for start in range(0, len(positions), BLOCK):
+            block = positions[start:start + BLOCK]
+            rows = np.arange(len(block))
+            similarity = self.vectors[block] @ self.vectors.T
+            similarity[rows, block] = -np.inf
+            # TOP_K passes of argmax beat one argpartition of every row.
+            for rank in range(TOP_K):
+                best = similarity.argmax(axis=1)
+                score = similarity[rows, best]
+                keep = score >= MIN_SCORE
+                related[start + rows, rank] = np.where(
+                    keep, self.ids[best], 0)
+                scores[start + rows, rank] = np.where(keep, score, 0)
+                similarity[rows, best] = -np.inf
+        return related, scores
+
+    def lists(self, post_ids=None):
+        """
+        ``{post_id: [(related_id, score), ...]}`` for ``post_ids`` in the
+        index, or for every post.
+        """
+        if post_ids is None:
+            positions = range(len(self.ids))
+        else:
+            positions = np.flatnonzero(np.isin(self.ids, list(post_ids)))
+        return {
+            int(self.ids[position]): [
+                (int(related_id), float(score))
+                for related_id, score in zip(
+                    self.related[position], self.scores[position])
+                if related_id
+            ]
+            for position in positions
+        }
+
+    def update(self, rows, removed=()):
+        """
+        Re-vectorize the posts in ``rows`` of ``(post_id, title,
+        content)`` whose text changed, drop the ``removed`` post ids, and
+        recompute the lists that can have changed as a result. Returns
+        the ids of the posts whose lists were recomputed.
+        """
+        changed = []
+        for post_id, title, content in rows:
+            position = np.searchsorted(self.ids, post_id)
+            if (position < len(self.ids) and self.ids[position] == post_id
+                    and self.checksums[position] == checksum(title, content)):
+                continue
+            changed.append((post_id, title, content))
+        removed = np.intersect1d(self.ids, list(removed))
+        if not changed and not len(removed):
+            return set()
+
+        changed_ids = np.array([row[0] for row in changed], np.int64)
+        mentioned = np.isin(self.related, np.concatenate(
+            [changed_ids, removed])).any(axis=1)
+        recompute = set(self.ids[mentioned].tolist())
+
+        keep = ~np.isin(self.ids, removed)
+        new = ~np.isin(changed_ids, self.ids)
+        ids = np.concatenate([self.ids[keep], changed_ids[new]])
+        order = np.argsort(ids, kind='stable')
+        blank = np.zeros((new.sum(), TOP_K))
+
+        def merge(array, filler):
+            return np.concatenate(
+                [array[keep], filler.astype(array.dtype)])[order]
+
+        self.ids = ids[order]
+        self.vectors = merge(
+            self.vectors, np.zeros((new.sum(), DIMENSIONS)))
+        self.checksums = merge(self.checksums, np.zeros(new.sum()))
+        self.related = merge(self.related, blank)
+        self.scores = merge(self.scores, blank)
+
+        positions = np.searchsorted(self.ids, changed_ids)
+        self.vectors[positions] = self._vectorize(
+            [terms(title, content) for _, title, content in changed])
+        self.checksums[positions] = [
+            checksum(title, content) for _, title, content in changed]
+
+        # Lists whose last entry a changed post now beats.
+        similarity = self.vectors @ self.vectors[positions].T
+        similarity[positions, np.arange(len(positions))] = -np.inf
+        last = np.where(
+            self.related[:, -1] > 0, self.scores[:, -1], MIN_SCORE)
+        climbs = (similarity >= last[:, None]).any(axis=1)
+        recompute.update(self.ids[climbs].tolist())
+        recompute.update(changed_ids.tolist())
+
+        positions = np.flatnonzero(np.isin(self.ids, list(recompute)))
+        self.related[positions], self.scores[positions] = self._top(
+            positions)
+        return set(self.ids[positions].tolist())
+
+    def save(self, path):
+        """
+        Write the index to ``path`` (``.npz``), replacing it atomically.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, 'wb') as file:
+            np.savez(
+                file, words=self.words, idf=self.idf, ids=self.ids,
+                vectors=self.vectors, checksums=self.checksums,
+                related=self.related, scores=self.scores,
+                synced_at=np.float64(self.synced_at))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data['words'], data['idf'], data['ids'], data['vectors'],
+                data['checksums'], data['related'], data['scores'],
+                float(data['synced_at']))
+
+
+def build(rows):
+    """
+    Index of ``rows`` of ``(post_id, title, content)``, with every
+    post's related list computed.
+    """
+    ids, checksums = [], []
+    provisional = {}
+    columns, counts, ends = array('q'), array('q'), array('q')
+    for post_id, title, content in rows:
+        counter = terms(title, content)
+        ids.append(post_id)
+        checksums.append(checksum(title, content))
+        columns.extend(
+            provisional.setdefault(word, len(provisional))
+            for word in counter)
+        counts.extend(counter.values())
+        ends.append(len(columns))
+
+    columns = np.frombuffer(columns, np.int64)
+    counts = np.frombuffer(counts, np.int64)
+    lengths = np.diff(np.frombuffer(ends, np.int64), prepend=0)
+    rows = np.repeat(np.arange(len(ids)), lengths)
+
+    frequency = np.bincount(columns, minlength=len(provisional))
+    kept = np.flatnonzero(frequency >= 2)
+    if len(kept) > MAX_TERMS:
+        kept = np.sort(
+            kept[np.argsort(-frequency[kept], kind='stable')[:MAX_TERMS]])
+    remap = np.full(len(provisional), -1, np.int64)
+    remap[kept] = np.arange(len(kept))
+    words = np.array(list(provisional), dtype=str)[kept]
+    idf = (np.log((1 + len(ids)) / (1 + frequency[kept])) + 1).astype(
+        np.float32)
+
+    order = np.argsort(np.array(ids, np.int64), kind='stable')
+    index = Index(
+        words, idf, np.array(ids, np.int64)[order], None,
+        np.array(checksums, np.uint32)[order], None, None)
+    columns = remap[columns]
+    present = columns >= 0
+    # Rows are numbered in input order; renumber them in id order.
+    position = np.empty(len(ids), np.int64)
+    position[order] = np.arange(len(ids))
+    rows = position[rows[present]]
+    sort = np.argsort(rows, kind='stable')
+    index.vectors = index._project(
+        rows[sort], columns[present][sort], counts[present][sort], len(ids))
+    index.related, index.scores = index._top(np.arange(len(ids)))
+    return index
+
+
+def index_path():
+    return getattr(settings, 'RELATED_POSTS_INDEX', None)
+
+
+def _published_rows(queryset):
+    return (queryset.filter(status=1).order_by()
+            .values_list('pk', 'title', 'content')
+            .iterator(chunk_size=2000))
+
+
+def store(index, post_ids=None):
+    """
+    Make the ``RelatedPost`` rows of ``post_ids`` (default: every post)
+    match ``index``. Posts missing from the index lose their rows. Only
+    posts whose list changed are written; they are touched and their
+    cached pages purged. Returns how many posts were written.
+    """
+    from .models import Post, RelatedPost
+
+    wanted = index.lists(post_ids)
+    stored = defaultdict(list)
+    links = RelatedPost.objects.order_by('post_id', 'rank')
+    if post_ids is not None:
+        links = links.filter(post_id__in=list(post_ids))
+    for post_id, related_id in links.values_list('post_id', 'related_id'):
+        stored[post_id].append(related_id)
+    changed = sorted(
+        post_id for post_id in wanted.keys() | stored.keys()
+        if [related_id for related_id, _ in wanted.get(post_id, ())]
+        != stored.get(post_id, []))
+
+    for start in range(0, len(changed), WRITE_BATCH):
+        batch = changed[start:start + WRITE_BATCH]
+        with transaction.atomic():
+            # The index can be behind: skip posts deleted or unpublished.
+            published = set(Post.objects.filter(status=1, pk__in={
+                related_id for post_id in batch
+                for related_id, _ in wanted.get(post_id, ())
+            }).values_list('pk', flat=True))
+            RelatedPost.objects.filter(post_id__in=batch).delete()
+            RelatedPost.objects.bulk_create(
+                RelatedPost(post_id=post_id, related_id=related_id,
+                            rank=rank, score=score)
+                for post_id in batch
+                for rank, (related_id, score) in enumerate(
+                    link for link in wanted.get(post_id, ())
+                    if link[0] in published)
+            )
+            posts = Post.objects.filter(pk__in=batch)
+            slugs = list(posts.values_list('slug', flat=True))
+            posts.touch()
+            page_cache.purge_on_commit(*(f'post:{slug}' for slug in slugs))
+    return len(changed)
+
+
+_lock = threading.Lock()
+
+
+def rebuild():
+    """
+    Build the index from every published post, save it and store the
+    lists. Returns how many posts' lists were written.
+    """
+    from .models import Post
+
+    path = index_path()
+    started = timezone.now()
+    index = build(_published_rows(Post.objects.all()))
+    index.synced_at = started.timestamp()
+    with _lock:
+        index.save(path)
+    logger.info("Built related posts for %d posts", len(index))
+    return store(index)
+
+
+def refresh(post_ids=None):
+    """
+    Update the saved index for ``post_ids``, or for every post changed
+    since the last scan, and store the lists that changed. Does nothing
+    until a full build has saved an index. Returns how many posts' lists
+    were written.
+    """
+    from .models import Post
+
+    path = index_path()
+    if not path or not os.path.exists(path):
+        return 0
+    with _lock:
+        index = Index.load(path)
+        posts = Post.objects.all()
+        if post_ids is None:
+            started = timezone.now()
+            published = set(posts.filter(status=1).values_list(
+                'pk', flat=True))
+            removed = set(index.ids.tolist()) - published
+            posts = posts.filter(updated_on__gte=datetime.fromtimestamp(
+                index.synced_at, dt_timezone.utc))
+            index.synced_at = started.timestamp()
+        else:
+            post_ids = set(post_ids)
+            posts = posts.filter(pk__in=post_ids)
+        rows = list(_published_rows(posts))
+        if post_ids is not None:
+            removed = post_ids - {row[0] for row in rows}
+        recomputed = index.update(rows, removed)
+        if recomputed or post_ids is None:
+            index.save(path)
+    return store(index, recomputed | set(removed))
+
+
+_pending = set()
+_timer = None
+_pending_lock = threading.Lock()
+
+
+def schedule(post_id):
+    """
+    Refresh ``post_id`` in the background after ``RELATED_POSTS_DELAY``
+    seconds, together with any other post changed meanwhile.
+    """
+    global _timer
+
+    delay = getattr(settings, 'RELATED_POSTS_DELAY', None)
+    path = index_path()
+    if delay is None or not path or not os.path.exists(path):
+        return
+    with _pending_lock:
+        _pending.add(post_id)
+        if _timer is None:
+            _timer = threading.Timer(delay, _refresh_pending)
+            _timer.daemon = True
+            _timer.start()
+
+
+def _refresh_pending():
+    global _timer
+
+    with _pending_lock:
+        post_ids = set(_pending)
+        _pending.clear()
+        _timer = None
+    try:
+        refresh(post_ids)
+    except Exception:
+        logger.exception("Refreshing related posts failed")
+    finally:
+        connection.close()
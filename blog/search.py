@@ -0,0 +1,209 @@
+"""
+Full-text search over posts.
+
+The index lives in a side table next to ``blog_post`` and holds each
+post's title and its body as plain text (``blog.text.plain_text``), so
+Summernote markup never matches:
+
+- SQLite: an FTS5 table ``blog_post_fts`` keyed by post id, ranked with
+  ``bm25()`` (title weighted above body), Porter stemming.
+- PostgreSQL: ``blog_post_search`` with a weighted ``tsvector`` per post
+  and a GIN index, ranked with ``ts_rank()``.
+
+Other databases have no index; ``PostQuerySet.search`` falls back to
+``icontains`` there. ``blog.signals`` keeps the index in step with Post
+saves and deletes, ``PostQuerySet.bulk_create`` indexes bulk imports and
+``manage.py rebuild_search_index`` rebuilds it from scratch.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from . import text
+
+# Longer queries are cut to this many words.
+MAX_TERMS = 16
+
+_WORD = re.compile(r'\w+')
+
+
+def terms(query):
+    """
+    The words of a user's query, without any search syntax.
+    """
+    return _WORD.findall(query or '')[:MAX_TERMS]
+
+
+def document(title, content):
+    """
+    ``(title, body)`` as indexed for a post.
+    """
+    return title or '', text.plain_text(content)
+
+
+class SQLiteSearch:
+    vendor = 'sqlite'
+    # bm25() column weights: title, body.
+    weights = (10.0, 1.0)
+
+    def install(self, cursor):
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+            "USING fts5(title, body, tokenize = 'porter unicode61')")
+
+    def uninstall(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS blog_post_fts")
+
+    def index(self, cursor, rows):
+        rows = list(rows)
+        self.remove(cursor, [post_id for post_id, _, _ in rows])
+        cursor.executemany(
+            "INSERT INTO blog_post_fts (rowid, title, body) "
+            "VALUES (%s, %s, %s)", rows)
+
+    def remove(self, cursor, post_ids):
+        cursor.executemany(
+            "DELETE FROM blog_post_fts WHERE rowid = %s",
+            [(post_id,) for post_id in post_ids])
+
+    def clear(self, cursor):
+        cursor.execute("DELETE FROM blog_post_fts")
+
+    def match(self, words):
+        # Quoted, every word is a plain token: no column filters or
+        # operators from user input. Implicit AND between them.
+        return ' '.join('"%s"' % word for word in words)
+
+    def matching(self, words):
+        return ("SELECT rowid FROM blog_post_fts "
+                "WHERE blog_post_fts MATCH %s", [self.match(words)])
+
+    def search(self, cursor, words, published, limit, offset):
+        cursor.execute(
+            "SELECT p.id FROM blog_post_fts "
+            "JOIN blog_post p ON p.id = blog_post_fts.rowid "
+            "WHERE blog_post_fts MATCH %s"
+            + (" AND p.status = 1" if published else "")
+            + " ORDER BY bm25(blog_post_fts, %s, %s), p.id DESC "
+            "LIMIT %s OFFSET %s",
+            [self.match(words), *self.weights,
+             -1 if limit is None else limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearch:
+    vendor = 'postgresql'
+    config = 'english'
+
+    def install(self, cursor):
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS blog_post_search ("
+            "post_id bigint PRIMARY KEY "
+            "REFERENCES blog_post (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS blog_post_search_document_gin "
+            "ON blog_post_search USING GIN (document)")
+
+    def uninstall(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS blog_post_search")
+
+    def index(self, cursor, rows):
+        cursor.executemany(
+            "INSERT INTO blog_post_search (post_id, document) VALUES ("
+            "%s, setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+            "ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document",
+            [(post_id, self.config, title, self.config, body)
+             for post_id, title, body in rows])
+
+    def remove(self, cursor, post_ids):
+        cursor.execute(
+            "DELETE FROM blog_post_search WHERE post_id = ANY(%s)",
+            [list(post_ids)])
+
+    def clear(self, cursor):
+        cursor.execute("TRUNCATE blog_post_search")
+
+    def matching(self, words):
+        return ("SELECT post_id FROM blog_post_search "
+                "WHERE document @@ plainto_tsquery(%s::regconfig, %s)",
+                [self.config, ' '.join(words)])
+
+    def search(self, cursor, words, published, limit, offset):
+        cursor.execute(
+            "SELECT p.id FROM blog_post_search s "
+            "JOIN blog_post p ON p.id = s.post_id, "
+            "plainto_tsquery(%s::regconfig, %s) q "
+            "WHERE s.document @@ q"
+            + (" AND p.status = 1" if published else "")
+            + " ORDER BY ts_rank(s.document, q) DESC, p.id DESC "
+            "LIMIT %s OFFSET %s",
+            [self.config, ' '.join(words), limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {backend.vendor: backend for backend in (
+    SQLiteSearch(), PostgresSearch())}
+
+
+def backend(using=None):
+    """
+    The search backend for ``using`` (default connection), or None if
+    its database has no full-text index here.
+    """
+    return BACKENDS.get((using or connection).vendor)
+
+
+def index_posts(posts, using=None):
+    """
+    Add or refresh ``posts`` (with pk, title and content) in the index.
+    """
+    engine = backend(using)
+    posts = [post for post in posts if post.pk is not None]
+    if engine is None or not posts:
+        return
+    with (using or connection).cursor() as cursor:
+        engine.index(cursor, [
+            (post.pk, *document(post.title, post.content)) for post in posts
+        ])
+
+
+def remove_posts(post_ids, using=None):
+    engine = backend(using)
+    post_ids = list(post_ids)
+    if engine is None or not post_ids:
+        return
+    with (using or connection).cursor() as cursor:
+        engine.remove(cursor, post_ids)
+
+
+def post_ids(query, published=True, limit=None, offset=0, using=None):
+    """
+    Ids of the posts matching ``query``, best match first. Only
+    published posts unless ``published`` is False. None if the database
+    has no index; [] if the query has no words.
+    """
+    engine = backend(using)
+    if engine is None:
+        return None
+    words = terms(query)
+    if not words:
+        return []
+    with (using or connection).cursor() as cursor:
+        return engine.search(cursor, words, published, limit, offset)
+
+
+def matching(query, using=None):
+    """
+    Subquery of the ids of all posts matching ``query``, drafts
+    included, for ``filter(pk__in=...)``: the ids stay in the database
+    however many match. None if the database has no index or the query
+    has no words.
+    """
+    engine = backend(using)
+    words = terms(query)
+    if engine is None or not words:
+        return None
+    return RawSQL(*engine.matching(words))
@@ -0,0 +1,205 @@
+# blog/signals.py
+"""
+Keep the denormalized counters and trending score (``blog.trending``) on
+Post in step with likes and comments, and purge the anonymous page cache
+when the content behind a page changes. Counter updates run inside the
+transaction that made the change.
+Saving or deleting a post also drops its slug from ``blog.slug_cache``,
+refreshes its entry in the search index (``blog.search``) and the
+archive counts (``blog.archive``) and, once committed, in the title
+suggestions (``blog.autocomplete``) and the "read next" lists
+(``blog.related``).
+"""
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+
+from . import (
+    archive, autocomplete, page_cache, related, search, slug_cache,
+    trending)
+from .models import Comment, Post
+
+
+def purge_post_pages(*slugs):
+    """
+    Drop cached copies of the post list and the given post pages.
+    """
+    page_cache.purge_on_commit(
+        'post-list', *(f'post:{slug}' for slug in set(slugs) if slug))
+
+
+def _slugs_for(post_ids):
+    return list(Post.objects.filter(pk__in=post_ids)
+                .values_list('slug', flat=True))
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def update_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Adjust Post.like_count when likes are added, removed or cleared,
+    from either side of the relation.
+    """
+    if action == 'pre_clear' and reverse:
+        # user.post_likes.clear(): remember which posts lose a like.
+        instance._cleared_post_ids = list(
+            instance.post_likes.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        posts = Post.objects.filter(pk=instance.pk)
+    elif action == 'post_clear':
+        posts = Post.objects.filter(
+            pk__in=getattr(instance, '_cleared_post_ids', []))
+    else:
+        posts = Post.objects.filter(pk__in=pk_set or [])
+
+    if action == 'post_add' and not reverse:
+        # pk_set only holds the users that were actually inserted.
+        added = len(pk_set or ())
+        posts.touch(like_count=F('like_count') + added,
+                    trend_score=trending.bump(likes=added))
+        purge_post_pages(instance.slug)
+    else:
+        # Likes each post gained or lost, for the trending score;
+        # cleared likes are not taken back. A removed like is taken
+        # back at today's weight (see ``blog.trending``).
+        change = {'post_add': 1, 'post_remove': -1}.get(action, 0)
+        if not reverse:
+            change *= len(pk_set or ())
+        posts.recount_likes(trend_score=trending.bump(likes=change))
+        purge_post_pages(*_slugs_for(posts.values('pk')))
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count_on_save(sender, instance, created, **kwargs):
+    """
+    Recount approved comments when a comment's approval changes, and
+    mark the post changed either way (authors see their pending comments).
+    """
+    was_approved = False if created else getattr(
+        instance, '_loaded_approved', None)
+    posts = Post.objects.filter(pk=instance.post_id)
+    if instance.approved != was_approved:
+        posts.recount_comments(trend_score=trending.bump(
+            comments=1 if instance.approved else -1))
+    else:
+        posts.touch()
+    if instance.approved or was_approved:
+        # Anonymous visitors only ever see approved comments.
+        purge_post_pages(*_slugs_for([instance.post_id]))
+    instance._loaded_approved = instance.approved
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_count_on_delete(sender, instance, **kwargs):
+    posts = Post.objects.filter(pk=instance.post_id)
+    if instance.approved:
+        posts.recount_comments(trend_score=trending.bump(comments=-1))
+        purge_post_pages(*_slugs_for([instance.post_id]))
+    else:
+        posts.touch()
+
+
+@receiver(post_save, sender=Post)
+def purge_pages_on_post_save(sender, instance, **kwargs):
+    old_slug = getattr(instance, '_loaded_slug', None)
+    slug_cache.post_ids.invalidate(instance.slug, old_slug)
+    purge_post_pages(instance.slug, old_slug)
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_save, sender=Post)
+def index_post_on_save(sender, instance, update_fields=None, using=None,
+                       **kwargs):
+    if update_fields is None or {'title', 'content'} & set(update_fields):
+        search.index_posts([instance], using=connections[using])
+
+
+def _counts_change(update_fields):
+    return update_fields is None or bool(
+        {'status', 'author', 'created_on'} & set(update_fields))
+
+
+@receiver(pre_save, sender=Post)
+def load_listing_on_save(sender, instance, update_fields=None, **kwargs):
+    # Where the post is counted now, if it was not loaded with the
+    # instance (built by hand, or with those fields deferred).
+    if (instance.pk is not None and _counts_change(update_fields)
+            and not hasattr(instance, '_loaded_listing')):
+        instance._loaded_listing = archive.stored_listing(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def count_post_on_save(sender, instance, created, update_fields=None,
+                       **kwargs):
+    if not _counts_change(update_fields):
+        return
+    old = None if created else getattr(instance, '_loaded_listing', None)
+    new = archive.listing(instance)
+    archive.moved(old, new)
+    instance._loaded_listing = new
+
+
+@receiver(post_save, sender=Post)
+def suggest_title_on_save(sender, instance, update_fields=None, using=None,
+                          **kwargs):
+    if update_fields is not None and not (
+            {'title', 'slug', 'status'} & set(update_fields)):
+        return
+    post_id, title, slug = instance.pk, instance.title, instance.slug
+    if instance.status == 1:
+        transaction.on_commit(
+            lambda: autocomplete.titles.add(post_id, title, slug), using)
+    else:
+        transaction.on_commit(
+            lambda: autocomplete.titles.remove(post_id), using)
+
+
+@receiver(post_save, sender=Post)
+def refresh_related_on_save(sender, instance, update_fields=None,
+                            using=None, **kwargs):
+    if update_fields is not None and not (
+            {'title', 'content', 'status'} & set(update_fields)):
+        return
+    post_id = instance.pk
+    transaction.on_commit(lambda: related.schedule(post_id), using)
+
+
+@receiver(post_delete, sender=Post)
+def refresh_related_on_delete(sender, instance, using=None, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: related.schedule(post_id), using)
+
+
+@receiver(post_delete, sender=Post)
+def unsuggest_title_on_delete(sender, instance, using=None, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(
+        lambda: autocomplete.titles.remove(post_id), using)
+
+
+@receiver(pre_delete, sender=Post)
+def load_listing_on_delete(sender, instance, **kwargs):
+    # Before the row goes, as for saves.
+    if not hasattr(instance, '_loaded_listing'):
+        instance._loaded_listing = archive.stored_listing(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_on_delete(sender, instance, **kwargs):
+    archive.moved(instance._loaded_listing, None)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_on_delete(sender, instance, using=None, **kwargs):
+    search.remove_posts([instance.pk], using=connections[using])
+
+
+@receiver(post_delete, sender=Post)
+def purge_pages_on_post_delete(sender, instance, **kwargs):
+    slug_cache.post_ids.invalidate(instance.slug)
+    purge_post_pages(instance.slug)
@@ -0,0 +1,146 @@
+"""
+sitemap.xml for crawlers, streamed from the database.
+
+Published posts are split into sections by primary key:
+``/sitemap-posts-<n>.xml`` lists the posts with ``n * SECTION_SIZE <=
+id < (n + 1) * SECTION_SIZE``, so a section keeps its URL as posts come
+and go and reading it is a range scan of the primary key, without
+OFFSET. While every post falls in section 0, ``/sitemap.xml`` is a
+single urlset of the site's pages and posts; past that it is a sitemap
+index of ``/sitemap-pages.xml`` and the post sections, each with the
+newest ``updated_on`` it covers as ``lastmod``.
+
+Urlsets are written to the response a row at a time, in constant
+memory however large the archive, and answer revisits with 304 Not
+Modified (``blog.conditional``). Streamed responses are not kept in the
+page cache; the (small) sitemap index is, until a post changes.
+"""
+from xml.sax.saxutils import escape
+
+from django.db.models import Count, F, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .conditional import conditional_page, page_etag, post_list_validators
+from .models import Post
+from .page_cache import cache_anonymous_page
+
+# Post ids per section: under the protocol's limit of 50,000 URLs per
+# file, with room for the site's own pages in the single-file sitemap.
+SECTION_SIZE = 45_000
+PAGES = ('home', 'trending', 'about', 'contact')
+CHUNK_SIZE = 2000
+CONTENT_TYPE = 'application/xml; charset=utf-8'
+XML = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _lastmod(when):
+    return when.replace(microsecond=0).isoformat()
+
+
+def _url(loc, lastmod=None):
+    if lastmod is None:
+        return f'<url><loc>{escape(loc)}</loc></url>\n'
+    return (f'<url><loc>{escape(loc)}</loc>'
+            f'<lastmod>{_lastmod(lastmod)}</lastmod></url>\n')
+
+
+def _section_posts(section):
+    start = section * SECTION_SIZE
+    return Post.objects.filter(
+        status=1, pk__gte=start, pk__lt=start + SECTION_SIZE)
+
+
+def sections():
+    """
+    ``[(section, lastmod)]`` for every section holding a published post,
+    in order: one grouped scan of the published posts.
+    """
+    return [
+        (row['section'], row['lastmod'])
+        for row in Post.objects.filter(status=1)
+        .annotate(section=F('pk') / SECTION_SIZE)
+        .values('section')
+        .annotate(lastmod=Max('updated_on'))
+        .order_by('section')
+    ]
+
+
+def _page_urls(request):
+    for name in PAGES:
+        yield _url(request.build_absolute_uri(reverse(name)))
+
+
+def _post_urls(request, section):
+    # One reverse() for the whole file, not one per post.
+    placeholder = '--slug--'
+    template = request.build_absolute_uri(
+        reverse('post_detail', args=[placeholder]))
+    rows = (
+        _section_posts(section)
+        .order_by('pk')
+        .values_list('slug', 'updated_on')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for slug, updated_on in rows:
+        yield _url(template.replace(placeholder, slug), updated_on)
+
+
+def _urlset(parts):
+    yield XML
+    yield f'<urlset xmlns="{NAMESPACE}">\n'
+    for part in parts:
+        yield from part
+    yield '</urlset>\n'
+
+
+def _stream(chunks):
+    return StreamingHttpResponse(chunks, content_type=CONTENT_TYPE)
+
+
+@cache_anonymous_page('post-list')
+def _index(request):
+    lines = [XML, f'<sitemapindex xmlns="{NAMESPACE}">\n']
+    locations = [(reverse('sitemap_pages'), None)] + [
+        (reverse('sitemap_posts', args=[section]), lastmod)
+        for section, lastmod in sections()]
+    for location, lastmod in locations:
+        loc = escape(request.build_absolute_uri(location))
+        lines.append(
+            f'<sitemap><loc>{loc}</loc>'
+            + (f'<lastmod>{_lastmod(lastmod)}</lastmod>' if lastmod else '')
+            + '</sitemap>\n')
+    lines.append('</sitemapindex>\n')
+    return HttpResponse(''.join(lines), content_type=CONTENT_TYPE)
+
+
+@conditional_page(post_list_validators)
+def sitemap(request):
+    if Post.objects.filter(status=1, pk__gte=SECTION_SIZE).exists():
+        return _index(request)
+    return _stream(_urlset([_page_urls(request), _post_urls(request, 0)]))
+
+
+def sitemap_pages(request):
+    return _stream(_urlset([_page_urls(request)]))
+
+
+def section_validators(request, section):
+    state = _section_posts(section).aggregate(
+        last=Max('updated_on'), published=Count('pk'))
+    if state['last'] is None:
+        return None
+    return (page_etag(request, 'sitemap', section,
+                      state['last'].isoformat(), state['published']),
+            state['last'])
+
+
+@conditional_page(section_validators)
+def sitemap_posts(request, section):
+    # No validators: the section is empty, unless they were skipped for
+    # a flash message.
+    if request._page_validators == (None, None) and not (
+            _section_posts(section).exists()):
+        raise Http404("No such sitemap section.")
+    return _stream(_urlset([_post_urls(request, section)]))
@@ -0,0 +1,59 @@
+"""
+In-process LRU cache of published post slug -> post id.
+
+Comment actions arrive with a slug in the URL. The first lookup for a
+slug filters on the post's slug and status and remembers its id; later
+ones look the comment up by ``post_id`` instead. Entries are dropped
+when a post is saved or deleted in this process (``blog.signals``).
+Other processes may briefly hold a stale id, so callers check the slug
+and status of the post they load and look again by slug on a mismatch.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class SlugCache:
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._ids = OrderedDict()
+
+    def _maxsize(self):
+        if self.maxsize is not None:
+            return self.maxsize
+        return getattr(settings, 'POST_SLUG_CACHE_SIZE', 1024)
+
+    def get(self, slug):
+        """
+        The cached id for ``slug``, or None.
+        """
+        with self._lock:
+            post_id = self._ids.get(slug)
+            if post_id is not None:
+                self._ids.move_to_end(slug)
+            return post_id
+
+    def set(self, slug, post_id):
+        with self._lock:
+            self._ids[slug] = post_id
+            self._ids.move_to_end(slug)
+            while len(self._ids) > self._maxsize():
+                self._ids.popitem(last=False)
+
+    def invalidate(self, *slugs):
+        with self._lock:
+            for slug in slugs:
+                self._ids.pop(slug, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def __len__(self):
+        return len(self._ids)
+
+
+post_ids = SlugCache()
@@ -0,0 +1,172 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import AuthorPostCount, MonthlyPostCount, Post
+
+
+def at(year, month, day=15):
+    return datetime(year, month, day, 12, tzinfo=dt_timezone.utc)
+
+
+class ArchiveTestCase(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+        self.other = User.objects.create_user(username="guest.writer")
+
+    def make_post(self, slug, when, status=1, author=None):
+        with mock.patch('django.utils.timezone.now', return_value=when):
+            return Post.objects.create(
+                title=slug.title(), slug=slug, author=author or self.author,
+                content="Content", status=status)
+
+    def months(self):
+        return {row.month: row.count for row in
+                MonthlyPostCount.objects.filter(count__gt=0)}
+
+    def authors(self):
+        return {row.author.username: row.count for row in
+                AuthorPostCount.objects.filter(count__gt=0)}
+
+
+class TestArchiveCounts(ArchiveTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.march = date(2026, 3, 1)
+        self.april = date(2026, 4, 1)
+        self.post = self.make_post("timket", at(2026, 3))
+        self.make_post("meskel", at(2026, 3, 30))
+        self.make_post("genna", at(2026, 4), author=self.other)
+        self.draft = self.make_post("draft", at(2026, 4), status=0)
+
+    def test_published_posts_are_counted(self):
+        self.assertEqual(self.months(), {self.march: 2, self.april: 1})
+        self.assertEqual(self.authors(), {'writer': 2, 'guest.writer': 1})
+
+    def test_publishing_and_unpublishing(self):
+        self.draft.status = 1
+        self.draft.save()
+        self.assertEqual(self.months()[self.april], 2)
+        self.assertEqual(self.authors()['writer'], 3)
+
+        self.post.status = 0
+        self.post.save()
+        self.assertEqual(self.months()[self.march], 1)
+        self.assertEqual(self.authors()['writer'], 2)
+
+    def test_edits_leave_counts_alone(self):
+        self.post.title = "Timket in Gondar"
+        self.post.save()
+        self.post.save(update_fields=['title'])
+        self.assertEqual(self.months(), {self.march: 2, self.april: 1})
+
+    def test_new_author(self):
+        self.post.author = self.other
+        self.post.save()
+        self.assertEqual(self.authors(), {'writer': 1, 'guest.writer': 2})
+        self.assertEqual(self.months(), {self.march: 2, self.april: 1})
+
+    def test_deleting(self):
+        self.post.delete()
+        self.draft.delete()
+        self.assertEqual(self.months(), {self.march: 1, self.april: 1})
+        self.assertEqual(self.authors(), {'writer': 1, 'guest.writer': 1})
+
+    def test_deferred_save(self):
+        post = Post.objects.only('pk', 'status').get(pk=self.post.pk)
+        post.status = 0
+        post.save()
+        self.assertEqual(self.months(), {self.march: 1, self.april: 1})
+        self.assertEqual(self.authors(), {'writer': 1, 'guest.writer': 1})
+
+    def test_deferred_save_touches_one_month_and_author(self):
+        post = Post.objects.only('pk', 'status').get(pk=self.post.pk)
+        post.status = 0
+        with mock.patch('blog.archive.recount') as recount, \
+                mock.patch('blog.archive.record') as record:
+            post.save()
+        recount.assert_not_called()
+        record.assert_called_once_with({(self.march, self.author.pk): -1})
+
+    def test_deleting_a_deferred_post(self):
+        Post.objects.only('pk', 'slug').get(pk=self.post.pk).delete()
+        self.assertEqual(self.months(), {self.march: 1, self.april: 1})
+        self.assertEqual(self.authors(), {'writer': 1, 'guest.writer': 1})
+
+    def test_bulk_create(self):
+        Post.objects.bulk_create([
+            Post(title=f"Bulk {i}", slug=f"bulk-{i}", author=self.other,
+                 content="Content", status=i % 2)
+            for i in range(4)])
+        self.assertEqual(self.authors()['guest.writer'], 3)
+
+    def test_recount_command(self):
+        Post.objects.filter(pk=self.post.pk).update(status=0)
+        out = StringIO()
+        call_command('recount_archive', stdout=out)
+        self.assertIn('2 month(s) and 2 author(s)', out.getvalue())
+        self.assertEqual(self.months(), {self.march: 1, self.april: 1})
+        self.assertEqual(self.authors(), {'writer': 1, 'guest.writer': 1})
+
+
+class TestArchivePages(ArchiveTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_post("timket", at(2026, 1, 19))
+        self.make_post("adwa", at(2026, 3, 2))
+        self.make_post("meskel", at(2026, 3, 27), author=self.other)
+        self.make_post("fasika", at(2026, 4, 12))
+        self.make_post("draft", at(2026, 3, 5), status=0)
+
+    def slugs(self, response):
+        return [post.slug for post in response.context['post_list']]
+
+    def test_month(self):
+        url = reverse('archive_month', args=[2026, 3])
+        self.assertEqual(url, '/archive/2026/03/')
+        response = self.client.get(url)
+        self.assertEqual(self.slugs(response), ['meskel', 'adwa'])
+        self.assertContains(response, 'Posts from March 2026')
+
+    def test_no_such_month(self):
+        response = self.client.get('/archive/2026/13/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_author(self):
+        url = reverse('author_posts', args=['writer'])
+        response = self.client.get(url)
+        self.assertEqual(self.slugs(response), ['fasika', 'adwa', 'timket'])
+        self.assertContains(response, 'Posts by writer')
+        response = self.client.get(reverse('author_posts', args=['nobody']))
+        self.assertEqual(response.status_code, 404)
+
+    @mock.patch('blog.views.AuthorList.paginate_by', 2)
+    def test_pages_continue_by_cursor(self):
+        url = reverse('author_posts', args=['writer'])
+        response = self.client.get(url)
+        self.assertEqual(self.slugs(response), ['fasika', 'adwa'])
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(url, {'cursor': cursor})
+        self.assertEqual(self.slugs(response), ['timket'])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_sidebar_reads_the_stored_counts(self):
+        """Validators, author, posts, then one query per sidebar list"""
+        with self.assertNumQueries(5):
+            response = self.client.get(
+                reverse('author_posts', args=['writer']))
+        self.assertContains(
+            response, '<a href="/archive/2026/03/">March 2026</a> (2)',
+            html=True)
+        self.assertContains(
+            response, '<a href="/author/guest.writer/">guest.writer</a> (1)',
+            html=True)
+        self.assertNotContains(response, 'February 2026')
@@ -0,0 +1,178 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .autocomplete import TitleIndex, normalize, titles
+from .models import Post
+
+
+class TestTitleIndex(TestCase):
+
+    def setUp(self):
+        self.index = TitleIndex()
+        self.index.build([
+            (1, "Coffee Ceremony in Addis", "coffee"),
+            (2, "Café culture", "cafe"),
+            (3, "Addis Ababa after dark", "addis"),
+            (4, "Timket", "timket"),
+        ])
+
+    def ids(self, prefix, limit=10):
+        return [post_id for post_id, _, _ in self.index.search(prefix, limit)]
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Café,  CULTURE! "), "cafe culture")
+
+    def test_matches_start_of_any_word(self):
+        # Alphabetical by the matched text: "addis" ends title 1.
+        self.assertEqual(self.ids("addis"), [1, 3])
+        self.assertEqual(self.ids("cer"), [1])
+        self.assertEqual(self.ids("AD"), [1, 3])
+        self.assertEqual(self.ids("dis"), [])
+
+    def test_several_words_match_in_sequence(self):
+        self.assertEqual(self.ids("addis ab"), [3])
+        self.assertEqual(self.ids("ceremony in"), [1])
+        self.assertEqual(self.ids("ceremony ab"), [])
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.ids("cafe"), [2])
+        self.assertEqual(self.ids("CAFÉ"), [2])
+
+    def test_limit_and_duplicates(self):
+        self.index.add(5, "Addis Addis Addis", "three")
+        self.assertEqual(len(self.ids("addis")), 3)
+        self.assertEqual(len(self.ids("addis", limit=2)), 2)
+        self.assertEqual(self.ids(""), [])
+        self.assertEqual(self.ids("!!"), [])
+
+    def test_add_rename_and_remove(self):
+        self.index.add(6, "Lalibela churches", "lalibela")
+        self.assertEqual(self.ids("lali"), [6])
+
+        self.index.add(6, "Rock churches", "rock")
+        self.assertEqual(self.ids("lali"), [])
+        self.assertEqual(self.ids("rock"), [6])
+        self.assertEqual(self.ids("church"), [6])
+
+        self.index.add(6, "ROCK churches!", "rock-2")
+        self.assertEqual(self.index.search("rock"),
+                         [(6, "ROCK churches!", "rock-2")])
+
+        self.index.remove(6)
+        self.assertEqual(self.ids("rock"), [])
+        self.assertEqual(len(self.index), 4)
+
+    def test_prefix_longer_than_the_sort_key(self):
+        long_title = "word " * 20 + "ending"
+        self.index.add(7, long_title, "long")
+        self.index.add(8, "word " * 20 + "other", "other")
+        self.assertEqual(self.ids("word " * 20 + "end"), [7])
+
+
+class TestTitleSuggestions(TestCase):
+
+    def setUp(self):
+        titles.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.post = Post.objects.create(
+            title="Axum obelisks", slug="axum", author=self.author,
+            content="Content", status=1)
+        Post.objects.create(
+            title="Axum draft", slug="axum-draft", author=self.author,
+            content="Content", status=0)
+        self.url = reverse('search_titles')
+
+    def tearDown(self):
+        titles.clear()
+
+    def suggest(self, q, **params):
+        return self.client.get(self.url, {'q': q, **params}).json()['results']
+
+    def test_published_titles_only(self):
+        self.assertEqual(self.suggest('axu'), [{
+            'title': "Axum obelisks", 'slug': 'axum',
+            'url': reverse('post_detail', args=['axum']),
+        }])
+
+    def test_no_query_per_keystroke(self):
+        """Only the first request loads the index from the database"""
+        self.suggest('a')
+        with self.assertNumQueries(0):
+            for q in ('ax', 'axu', 'axum', 'axum o'):
+                self.suggest(q)
+
+    def test_follows_committed_saves_and_deletes(self):
+        self.suggest('a')
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                title="Gondar castles", slug="gondar", author=self.author,
+                content="Content", status=1)
+        self.assertEqual(len(self.suggest('gon')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = "Fasil Ghebbi"
+            post.save()
+        self.assertEqual(self.suggest('gon'), [])
+        self.assertEqual(len(self.suggest('fasil')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.status = 0
+            post.save()
+        self.assertEqual(self.suggest('fasil'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.suggest('axum'), [])
+
+    def test_counter_updates_do_not_touch_the_index(self):
+        self.suggest('a')
+        with mock.patch.object(titles, 'add') as add, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.post.save(update_fields=['content'])
+            self.post.save(update_fields=['title'])
+        self.assertEqual(add.call_count, 1)
+
+    def test_limit(self):
+        for i in range(25):
+            Post.objects.create(
+                title=f"Lake {i}", slug=f"lake-{i}", author=self.author,
+                content="Content", status=1)
+        self.assertEqual(len(self.suggest('lake')), 8)
+        self.assertEqual(len(self.suggest('lake', limit=3)), 3)
+        self.assertEqual(len(self.suggest('lake', limit=500)), 20)
+        self.assertEqual(len(self.suggest('lake', limit='x')), 8)
+
+
+class TestTitleReload(TransactionTestCase):
+    """
+    The background reload reads through its own connection, so the rows
+    have to be committed.
+    """
+
+    def setUp(self):
+        titles.clear()
+        author = User.objects.create_user(username="writer")
+        self.post = Post.objects.create(
+            title="Axum obelisks", slug="axum", author=author,
+            content="Content", status=1)
+
+    def tearDown(self):
+        titles.clear()
+
+    @override_settings(AUTOCOMPLETE_REFRESH=1)
+    def test_reloads_in_background_when_stale(self):
+        self.assertEqual(len(titles.suggest('axum')), 1)
+        # Written without signals, as a change from another process.
+        Post.objects.filter(pk=self.post.pk).update(title="Aksum stelae")
+        titles.loaded_at -= 5
+        titles.suggest('axum')
+        for _ in range(100):
+            if titles.search('aksum'):
+                break
+            time.sleep(0.02)
+        self.assertEqual(len(titles.search('aksum')), 1)
+        self.assertEqual(titles.search('axum'), [])
@@ -0,0 +1,133 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from about.models import About
+
+from .admin import CommentAdmin
+from .conditional import post_list_validators
+from .models import Comment, Post
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123")
+        self.post = Post.objects.create(
+            title="Validated Post", slug="validated-post", author=self.user,
+            content="Content", status=1)
+        self.url = reverse('post_detail', args=['validated-post'])
+
+    def revisit(self, url, response):
+        return self.client.get(url, headers={
+            'If-None-Match': response['ETag'],
+            'If-Modified-Since': response['Last-Modified'],
+        })
+
+    def assertNotModified(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        second = self.revisit(url, first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        return first
+
+    def test_post_page_revisit_is_not_modified(self):
+        """A 304 costs one query and renders nothing"""
+        first = self.client.get(self.url)
+        self.assertTrue(first['ETag'].startswith('W/"'))
+        with self.assertNumQueries(1):
+            response = self.revisit(self.url, first)
+        self.assertEqual(response.status_code, 304)
+
+    def test_home_and_about_pages_support_revisits(self):
+        About.objects.create(title="About", content="Hello")
+        self.assertNotModified(reverse('home'))
+        self.assertNotModified(reverse('about'))
+
+    def test_last_modified_alone(self):
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, headers={
+            'If-Modified-Since': first['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_comment_approval_changes_validator(self):
+        first = self.assertNotModified(self.url)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Pending")
+        self.post.refresh_from_db()
+        CommentAdmin(Comment, AdminSite()).approve_comments(
+            RequestFactory().post('/'), Comment.objects.filter(pk=comment.pk))
+
+        response = self.revisit(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Pending')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_like_changes_post_and_list_validators(self):
+        home = reverse('home')
+        first_post = self.assertNotModified(self.url)
+        first_home = self.assertNotModified(home)
+
+        self.post.likes.add(self.user)
+
+        self.assertEqual(self.revisit(self.url, first_post).status_code, 200)
+        self.assertEqual(self.revisit(home, first_home).status_code, 200)
+
+    def test_deleting_a_post_changes_list_validator(self):
+        Post.objects.create(
+            title="Older", slug="older", author=self.user,
+            content="Content", status=1)
+        first = self.assertNotModified(reverse('home'))
+        Post.objects.filter(slug='older').delete()
+        self.assertEqual(
+            self.revisit(reverse('home'), first).status_code, 200)
+
+    def test_list_revisit_is_one_query(self):
+        first = self.client.get(reverse('home'))
+        with self.assertNumQueries(1):
+            response = self.revisit(reverse('home'), first)
+        self.assertEqual(response.status_code, 304)
+
+    def test_deleting_a_post_moves_list_last_modified(self):
+        """Clients sending only If-Modified-Since see the deletion too"""
+        Post.objects.create(
+            title="Draft", slug="draft", author=self.user,
+            content="Content", status=0)
+        request = RequestFactory().get('/')
+        _, before = post_list_validators(request)
+        self.post.delete()
+        _, after = post_list_validators(request)
+        self.assertGreater(after, before)
+
+    def test_validator_is_per_user(self):
+        """Logging in never reuses the anonymous copy of the page"""
+        first = self.client.get(self.url)
+        self.client.login(username='testuser', password='testpass123')
+        response = self.revisit(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_own_pending_comment_changes_validator(self):
+        """Authors see their unapproved comments, so those count too"""
+        self.client.login(username='testuser', password='testpass123')
+        first = self.assertNotModified(self.url)
+        Comment.objects.create(
+            post=self.post, author=self.user, body="Awaiting approval")
+        response = self.revisit(self.url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Awaiting approval')
+
+    def test_stale_date_is_modified(self):
+        response = self.client.get(self.url, headers={
+            'If-Modified-Since': http_date(0)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_post_is_still_404(self):
+        response = self.client.get(
+            reverse('post_detail', args=['missing']),
+            headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+
+from .context_processors import WORLD_ZONES, world_time
+from .time_sources import WorldTimeAPISource, ZoneInfoTimeSource
+
+
+class FailingTimeSource:
+    def now(self, tz_name):
+        raise ConnectionError("offline")
+
+
+class CountingTimeSource(ZoneInfoTimeSource):
+    calls = 0
+
+    def now(self, tz_name):
+        CountingTimeSource.calls += 1
+        return super().now(tz_name)
+
+
+class TestWorldTime(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_default_source_does_no_network_io(self):
+        """The default source never touches requests"""
+        with mock.patch('blog.time_sources.requests.get') as get:
+            context = world_time(self.request)
+            self.assertFalse(context['time_error'])
+            self.assertEqual(context['ireland_timezone'], 'Europe/Dublin')
+            self.assertEqual(
+                context['ethiopia_timezone'], 'Africa/Addis_Ababa')
+        get.assert_not_called()
+
+    def test_zoneinfo_source_returns_local_time(self):
+        """Times are computed in the right zone"""
+        dt = ZoneInfoTimeSource().now('Africa/Addis_Ababa')
+        self.assertEqual(dt.utcoffset().total_seconds(), 3 * 3600)
+
+    def test_time_difference_follows_dublin_dst(self):
+        """Difference is 3 hours in winter and 2 hours in summer"""
+        for month, hours in ((1, 3), (7, 2)):
+            fixed = datetime(2026, month, 15, 12, tzinfo=timezone.utc)
+
+            class FixedSource:
+                def now(self, tz_name):
+                    return fixed.astimezone(ZoneInfo(tz_name))
+
+            with mock.patch(
+                    'blog.context_processors.get_time_source',
+                    return_value=FixedSource()):
+                context = world_time(RequestFactory().get('/'))
+                self.assertEqual(
+                    context['time_difference'],
+                    f"Ethiopia is {hours} hours ahead")
+
+    @override_settings(
+        WORLD_TIME_SOURCE='blog.test_context_processors.FailingTimeSource')
+    def test_failing_source_falls_back_to_estimate(self):
+        """A broken source falls back to local times marked as estimated"""
+        context = world_time(self.request)
+        with self.assertLogs('blog.context_processors', 'ERROR'):
+            self.assertTrue(context['time_error'])
+        self.assertEqual(
+            context['ireland_timezone'], 'Europe/Dublin (est.)')
+        self.assertIsNotNone(context['ethiopia_time'])
+
+    def test_remote_source_parses_api_response(self):
+        """The optional remote source reads the offset from the API"""
+        response = mock.Mock()
+        response.json.return_value = {
+            'datetime': '2026-03-01T15:30:00.000000+03:00'}
+        with mock.patch(
+                'blog.time_sources.requests.get',
+                return_value=response) as get:
+            offset = WorldTimeAPISource(
+                base_url='http://stub/api/timezone/').fetch(
+                    'Africa/Addis_Ababa')
+        get.assert_called_once_with(
+            'http://stub/api/timezone/Africa/Addis_Ababa', timeout=3)
+        self.assertEqual(offset.total_seconds(), 3 * 3600)
+
+
+@override_settings(
+    WORLD_TIME_SOURCE='blog.test_context_processors.CountingTimeSource')
+class TestWorldTimeLaziness(TestCase):
+
+    def setUp(self):
+        CountingTimeSource.calls = 0
+        self.request = RequestFactory().get('/')
+
+    def render(self, source):
+        template = engines['django'].from_string(source)
+        return template.render({}, self.request)
+
+    def test_render_without_clock_does_no_lookup(self):
+        """A template that never reads the clock costs nothing"""
+        self.assertEqual(self.render('no clock here'), 'no clock here')
+        self.assertEqual(CountingTimeSource.calls, 0)
+
+    def test_lookup_happens_once_per_request(self):
+        """Reading several keys, in several renders, looks up each zone once"""
+        source = ('{% if not time_error %}{{ ireland_time }} '
+                  '{{ ethiopia_time }} {{ time_difference }}{% endif %}')
+        first = self.render(source)
+        self.render(source)
+        self.assertIn('Ethiopia is', first)
+        self.assertEqual(CountingTimeSource.calls, len(WORLD_ZONES))
+
+    def test_new_request_looks_up_again(self):
+        """The memoized values do not leak across requests"""
+        self.render('{{ ireland_time }}')
+        self.request = RequestFactory().get('/')
+        self.render('{{ ireland_time }}')
+        self.assertEqual(CountingTimeSource.calls, 2 * len(WORLD_ZONES))
@@ -0,0 +1,198 @@
+import threading
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    Client, RequestFactory, TestCase, TransactionTestCase)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .admin import CommentAdmin
+from .models import Comment, Post
+
+
+class TestPostCounters(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123")
+        self.other_user = User.objects.create_user(
+            username="otheruser", password="otherpass123")
+        self.post = Post.objects.create(
+            title="Counted Post",
+            slug="counted-post",
+            author=self.user,
+            content="Content",
+            status=1
+        )
+
+    def assertCounts(self, likes, comments):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, likes)
+        self.assertEqual(self.post.comment_count, comments)
+
+    def test_like_view_updates_like_count(self):
+        """post_like keeps like_count in step and returns it"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('post_like', args=['counted-post']))
+        self.assertEqual(response.json()['like_count'], 1)
+        self.assertCounts(likes=1, comments=0)
+
+        response = self.client.post(reverse('post_like', args=['counted-post']))
+        self.assertEqual(response.json()['like_count'], 0)
+        self.assertCounts(likes=0, comments=0)
+
+    def test_unlike_with_drifted_count_stays_at_zero(self):
+        self.post.likes.add(self.user)
+        Post.objects.update(like_count=0)
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.post(reverse('post_like', args=['counted-post']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['like_count'], 0)
+        self.assertCounts(likes=0, comments=0)
+
+    def test_likes_from_either_side_of_the_relation(self):
+        """Adding twice, reverse adds and clears are all counted right"""
+        self.post.likes.add(self.user)
+        self.post.likes.add(self.user)
+        self.other_user.post_likes.add(self.post)
+        self.assertCounts(likes=2, comments=0)
+
+        self.other_user.post_likes.clear()
+        self.assertCounts(likes=1, comments=0)
+        self.post.likes.remove(self.other_user)
+        self.assertCounts(likes=1, comments=0)
+        self.post.likes.clear()
+        self.assertCounts(likes=0, comments=0)
+
+    def test_only_approved_comments_are_counted(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Pending")
+        self.assertCounts(likes=0, comments=0)
+
+        comment.approved = True
+        comment.save()
+        self.assertCounts(likes=0, comments=1)
+
+        Comment.objects.create(
+            post=self.post, author=self.other_user, body="Hi", approved=True)
+        self.assertCounts(likes=0, comments=2)
+
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.approved = False
+        comment.save()
+        self.assertCounts(likes=0, comments=1)
+
+    def test_editing_body_does_not_recount(self):
+        """Saving without an approval change issues no counter update"""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Hi", approved=True)
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.body = "Edited"
+        with CaptureQueriesContext(connection) as queries:
+            comment.save()
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()])
+
+    def test_deleting_comments_updates_count(self):
+        approved = Comment.objects.create(
+            post=self.post, author=self.user, body="A", approved=True)
+        Comment.objects.create(
+            post=self.post, author=self.user, body="B", approved=True)
+        approved.delete()
+        self.assertCounts(likes=0, comments=1)
+        Comment.objects.filter(post=self.post).delete()
+        self.assertCounts(likes=0, comments=0)
+
+    def test_admin_approve_action_updates_count(self):
+        """approve_comments uses queryset.update but still recounts"""
+        for i in range(3):
+            Comment.objects.create(
+                post=self.post, author=self.user, body=f"C{i}")
+        admin = CommentAdmin(Comment, AdminSite())
+        admin.approve_comments(
+            RequestFactory().post('/'), Comment.objects.all())
+        self.assertCounts(likes=0, comments=3)
+
+    def test_repair_command_fixes_drift(self):
+        self.post.likes.add(self.user)
+        Comment.objects.create(
+            post=self.post, author=self.user, body="A", approved=True)
+        Post.objects.update(like_count=7, comment_count=0)
+
+        out = StringIO()
+        call_command('repair_post_counters', '--dry-run', stdout=out)
+        self.assertIn('1 post(s) need repair', out.getvalue())
+        self.assertCounts(likes=7, comments=0)
+
+        call_command('repair_post_counters', stdout=out)
+        self.assertIn('1 post(s) repaired', out.getvalue())
+        self.assertCounts(likes=1, comments=1)
+        self.assertFalse(Post.objects.with_counter_drift().exists())
+
+
+class TestConcurrentLikes(TransactionTestCase):
+    """
+    Many threads toggling likes at once. Each thread has its own database
+    connection, so the toggles really do overlap.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author")
+        self.post = Post.objects.create(
+            title="Contended", slug="contended", author=self.author,
+            content="Content", status=1)
+        self.url = reverse('post_like', args=['contended'])
+
+    def hammer(self, users, clicks_per_user):
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        start = threading.Barrier(len(clients))
+        errors = []
+
+        def click(client):
+            start.wait()
+            try:
+                for _ in range(clicks_per_user):
+                    response = client.post(self.url)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=click, args=(client,))
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertCountIsExact(self, expected):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, self.post.likes.count())
+        self.assertEqual(self.post.like_count, expected)
+
+    def test_many_users_liking_at_once(self):
+        users = [
+            User.objects.create_user(username=f"fan{i}") for i in range(12)
+        ]
+        self.hammer(users, clicks_per_user=1)
+        self.assertCountIsExact(12)
+
+    def test_double_clicks_from_one_user(self):
+        """Concurrent toggles by one user never double count"""
+        fan = User.objects.create_user(username="fan")
+        self.hammer([fan] * 8, clicks_per_user=3)
+        # 24 toggles in all: an even number leaves the post unliked.
+        self.assertCountIsExact(0)
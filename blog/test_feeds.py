@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import feeds
+from .models import Post
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class TestFeeds(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.post = self.make_post(
+            "timket", content="<p>Epiphany in <b>Gondar</b>.</p>")
+        self.make_post("draft", status=0)
+
+    def make_post(self, slug, status=1, content="Content"):
+        return Post.objects.create(
+            title=slug.title(), slug=slug, author=self.author,
+            content=content, status=status)
+
+    def test_rss_lists_published_posts_with_excerpts(self):
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(
+            response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        content = response.content.decode()
+        self.assertIn('<title>Timket</title>', content)
+        self.assertIn('Epiphany in Gondar.', content)
+        self.assertIn('/post/timket/', content)
+        self.assertNotIn('Draft', content)
+
+    def test_atom(self):
+        response = self.client.get(reverse('atom_feed'))
+        self.assertEqual(
+            response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, '<name>writer</name>')
+        self.assertContains(response, 'Epiphany in Gondar.')
+
+    def test_newest_posts_only(self):
+        for i in range(feeds.FEED_ITEMS):
+            self.make_post(f"post-{i}")
+        content = self.client.get(reverse('feed')).content.decode()
+        self.assertEqual(content.count('<item>'), feeds.FEED_ITEMS)
+        self.assertNotIn('/post/timket/', content)
+
+    def test_cached_until_a_post_changes(self):
+        url = reverse('feed')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+
+        self.post.title = "Timket in Gondar"
+        self.post.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Timket in Gondar')
+
+    def test_revisit_is_not_modified(self):
+        url = reverse('feed')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.make_post("meskel")
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,150 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .like_buffer import LikeBuffer
+from .models import Post
+
+
+@override_settings(LIKE_WRITE_MODE='buffered', LIKE_FLUSH_INTERVAL=0)
+class TestBufferedLikes(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="fan", password="x")
+        self.post = Post.objects.create(
+            title="Viral", slug="viral", author=self.user,
+            content="Content", status=1)
+        self.post.likes.add(
+            *[User.objects.create_user(username=f"early{i}")
+              for i in range(3)])
+        self.url = reverse('post_like', args=['viral'])
+        self.client.login(username='fan', password='x')
+        self.buffer = LikeBuffer()
+        patcher = mock.patch('blog.like_buffer.buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertStored(self, like_count, liked):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, like_count)
+        self.assertEqual(
+            self.post.likes.filter(pk=self.user.pk).exists(), liked)
+
+    def test_like_is_visible_to_the_user_before_flush(self):
+        data = self.client.post(self.url).json()
+        self.assertEqual((data['liked'], data['like_count']), (True, 4))
+        self.assertStored(like_count=3, liked=False)
+
+        response = self.client.get(reverse('post_detail', args=['viral']))
+        self.assertTrue(response.context['user_has_liked'])
+        self.assertEqual(response.context['post'].like_count, 4)
+
+    def test_liked_state_includes_buffered_likes(self):
+        self.client.post(self.url)
+        response = self.client.get(
+            reverse('liked_posts'), {'slug': 'viral'})
+        self.assertEqual(response.json(), {'liked': {'viral': True}})
+
+    def test_flush_writes_likes_and_recounts(self):
+        self.client.post(self.url)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertStored(like_count=4, liked=True)
+        self.assertEqual(self.buffer.flush(), 0)
+
+        data = self.client.post(self.url).json()
+        self.assertEqual((data['liked'], data['like_count']), (False, 3))
+        self.buffer.flush()
+        self.assertStored(like_count=3, liked=False)
+
+    def test_repeated_toggles_collapse_before_writing(self):
+        """An even number of clicks leaves nothing to write"""
+        for expected in (True, False, True, False):
+            self.assertEqual(self.client.post(self.url).json()['liked'],
+                             expected)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertStored(like_count=3, liked=False)
+
+    def test_unlike_of_a_stored_like(self):
+        early = User.objects.get(username='early0')
+        self.client.force_login(early)
+        data = self.client.post(self.url).json()
+        self.assertEqual((data['liked'], data['like_count']), (False, 2))
+        self.buffer.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+
+    def flush_blocked(self, during):
+        """
+        Flush, running ``during()`` after the batch is swapped out but
+        before anything is written.
+        """
+        atomic = transaction.atomic
+        results = []
+
+        def blocked(*args, **kwargs):
+            if not results:
+                results.append(during())
+            return atomic(*args, **kwargs)
+
+        with mock.patch('blog.like_buffer.transaction.atomic', blocked):
+            self.buffer.flush()
+        return results[0]
+
+    def test_toggle_during_flush_starts_from_the_batch(self):
+        """An unlike while the like is being written stays an unlike"""
+        self.client.post(self.url)
+        data = self.flush_blocked(lambda: self.client.post(self.url).json())
+        self.assertEqual((data['liked'], data['like_count']), (False, 3))
+        self.assertStored(like_count=4, liked=True)
+        self.assertFalse(self.buffer.pending_state(self.post.pk, self.user.pk))
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertStored(like_count=3, liked=False)
+
+    def test_failed_flush_keeps_a_toggle_made_during_it(self):
+        self.client.post(self.url)
+
+        def toggle_then_fail():
+            self.client.post(self.url)
+            raise RuntimeError("database went away")
+
+        with self.assertRaises(RuntimeError):
+            self.flush_blocked(toggle_then_fail)
+        # Liked then unliked, and nothing was written: nothing to do.
+        self.assertIsNone(
+            self.buffer.pending_state(self.post.pk, self.user.pk))
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertStored(like_count=3, liked=False)
+
+    def test_likes_on_deleted_posts_are_dropped(self):
+        self.client.post(self.url)
+        Post.objects.all().delete()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertFalse(Post.likes.through.objects.exists())
+
+
+@override_settings(LIKE_WRITE_MODE='buffered', LIKE_FLUSH_INTERVAL=0.05)
+class TestLikeFlusher(TransactionTestCase):
+
+    def test_background_thread_flushes(self):
+        user = User.objects.create_user(username="fan", password="x")
+        post = Post.objects.create(
+            title="Viral", slug="viral", author=user,
+            content="Content", status=1)
+        buffer = LikeBuffer()
+        with mock.patch('blog.like_buffer.buffer', buffer):
+            self.client.force_login(user)
+            self.client.post(reverse('post_like', args=['viral']))
+
+            deadline = time.monotonic() + 5
+            while buffer.pending_state(post.pk, user.pk) is not None:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.02)
+            buffer.stop()
+
+        post.refresh_from_db()
+        self.assertEqual(post.like_count, 1)
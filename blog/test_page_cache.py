@@ -0,0 +1,219 @@
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages import add_message, INFO
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from about.models import About
+
+from . import page_cache
+from .admin import CommentAdmin
+from .models import Comment, Post
+from .views import post_detail
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class TestAnonymousPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="writer", password="x")
+        self.post = self.make_post("first")
+        self.other = self.make_post("second")
+
+    def make_post(self, slug, status=1):
+        return Post.objects.create(
+            title=slug.title(), slug=slug, author=self.user,
+            content="Content", status=status)
+
+    def assertCached(self, url, hit=True):
+        response = self.client.get(url)
+        self.assertEqual(
+            response['X-Page-Cache'], 'HIT' if hit else 'MISS', url)
+        return response
+
+    def test_second_anonymous_request_is_served_from_cache(self):
+        """A cache hit only looks up the page's validators"""
+        url = reverse('post_detail', args=['first'])
+        self.assertCached(url, hit=False)
+        with self.assertNumQueries(1):
+            response = self.assertCached(url)
+        self.assertContains(response, 'First')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.get(reverse('home'))
+        self.client.login(username='writer', password='x')
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_pending_messages_bypass_the_cache(self):
+        """A page carrying a flash message is never stored or served"""
+        request = RequestFactory().get(
+            reverse('post_detail', args=['first']))
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        add_message(request, INFO, 'Comment submitted')
+        self.assertTrue(page_cache.has_pending_messages(request))
+
+        response = post_detail(request, slug='first')
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertCached(reverse('post_detail', args=['first']), hit=False)
+
+    def test_publishing_purges_list_but_not_other_posts(self):
+        """Saving a post only drops the list and that post's page"""
+        urls = [reverse('home'), reverse('post_detail', args=['first']),
+                reverse('post_detail', args=['second'])]
+        for url in urls:
+            self.client.get(url)
+
+        self.post.title = "First, edited"
+        self.post.save()
+
+        self.assertCached(urls[0], hit=False)
+        response = self.assertCached(urls[1], hit=False)
+        self.assertContains(response, 'First, edited')
+        self.assertCached(urls[2])
+
+    def test_renaming_slug_purges_old_url(self):
+        old_url = reverse('post_detail', args=['first'])
+        self.client.get(old_url)
+        self.post.slug = 'renamed'
+        self.post.save()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+
+    def test_comment_approval_purges_post_page(self):
+        url = reverse('post_detail', args=['first'])
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Pending remark")
+        self.assertNotContains(self.client.get(url), 'Pending remark')
+
+        CommentAdmin(Comment, AdminSite()).approve_comments(
+            RequestFactory().post('/'), Comment.objects.filter(pk=comment.pk))
+        self.assertContains(
+            self.assertCached(url, hit=False), 'Pending remark')
+
+    def test_pending_comment_does_not_purge(self):
+        """Unapproved comments are invisible, so the page stays cached"""
+        url = reverse('post_detail', args=['first'])
+        self.client.get(url)
+        Comment.objects.create(post=self.post, author=self.user, body="Hi")
+        self.assertCached(url)
+
+    def test_like_purges_post_page(self):
+        url = reverse('post_detail', args=['first'])
+        self.client.get(url)
+        self.post.likes.add(self.user)
+        self.assertCached(url, hit=False)
+
+    def test_purge_also_runs_after_commit(self):
+        """A page cached while the change was uncommitted is dropped too"""
+        url = reverse('post_detail', args=['first'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.likes.add(self.user)
+            self.client.get(url)
+        self.assertCached(url, hit=False)
+
+    def test_about_save_purges_about_page(self):
+        About.objects.create(title="Original", content="Hello")
+        url = reverse('about')
+        self.client.get(url)
+        self.assertCached(url)
+        newer = About.objects.create(title="Newer", content="Hello")
+        response = self.assertCached(url, hit=False)
+        self.assertEqual(response.context['about'], newer)
+
+    def test_hit_ratio(self):
+        url = reverse('home')
+        for _ in range(4):
+            self.client.get(url)
+        self.assertEqual(
+            page_cache.stats(), {'hits': 3, 'misses': 1, 'hit_ratio': 0.75})
+
+        out = StringIO()
+        call_command('page_cache_stats', '--reset', stdout=out)
+        self.assertIn('hit_ratio=75.0%', out.getvalue())
+        self.assertEqual(page_cache.stats()['hits'], 0)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_can_be_disabled(self):
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class TestHolePunchedPostPage(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.writer = User.objects.create_user(username="writer", password="x")
+        self.reader = User.objects.create_user(username="reader", password="x")
+        self.post = Post.objects.create(
+            title="Shared", slug="shared", author=self.writer,
+            content="Content", status=1)
+        self.url = reverse('post_detail', args=['shared'])
+        self.holes_url = reverse('post_holes', args=['shared'])
+
+    def test_logged_in_readers_share_one_public_page(self):
+        self.client.login(username='writer', password='x')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, f'data-holes-url="{self.holes_url}"')
+        self.assertNotContains(response, 'Welcome, writer')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+        self.client.login(username='reader', password='x')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertNotContains(response, 'Welcome, writer')
+
+    def test_anonymous_page_has_no_holes(self):
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'data-holes-url')
+
+    @override_settings(PAGE_CACHE_MEMBERS=False)
+    def test_can_be_turned_off(self):
+        self.client.login(username='reader', password='x')
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Welcome, reader')
+
+    def test_holes_are_two_queries(self):
+        """Session and user, then the post with liked state, comments"""
+        self.client.login(username='reader', password='x')
+        for i in range(3):
+            Comment.objects.create(
+                post=self.post, author=self.reader, body=f"Mine {i}",
+                approved=bool(i))
+        with self.assertNumQueries(4):
+            self.client.get(self.holes_url)
+
+    def test_holes_carry_the_readers_own_parts(self):
+        self.post.likes.add(self.reader)
+        pending = Comment.objects.create(
+            post=self.post, author=self.reader, body="Waiting")
+        Comment.objects.create(
+            post=self.post, author=self.writer, body="Not mine",
+            approved=True)
+        self.client.login(username='reader', password='x')
+
+        data = self.client.get(self.holes_url).json()
+        self.assertIn('Welcome, reader', data['holes']['nav'])
+        self.assertIn('btn-danger', data['holes']['like'])
+        self.assertIn('csrfmiddlewaretoken', data['holes']['comment-form'])
+        self.assertEqual([c['id'] for c in data['comments']], [pending.id])
+        self.assertIn('Only you can see this', data['comments'][0]['html'])
+        self.assertIn(
+            reverse('comment_edit', args=['shared', pending.id]),
+            data['comments'][0]['html'])
+
+    def test_holes_for_anonymous_visitors_are_empty(self):
+        data = self.client.get(self.holes_url).json()
+        self.assertEqual(data, {'holes': {}, 'comments': []})
@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Post
+from .pagination import CursorPaginator, InvalidCursor
+
+
+class PaginationTestMixin:
+
+    def create_posts(self, count, same_time=False):
+        author = User.objects.create_user(username="author", password="x")
+        now = timezone.now()
+        for i in range(count):
+            post = Post.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", author=author,
+                content="Content", status=1)
+            created_on = now if same_time else now - timedelta(minutes=i)
+            Post.objects.filter(pk=post.pk).update(created_on=created_on)
+        return list(Post.objects.order_by('-created_on', '-id'))
+
+
+class TestCursorPaginator(PaginationTestMixin, TestCase):
+
+    def walk(self, paginator):
+        seen, page = [], paginator.page()
+        seen.extend(page.object_list)
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            seen.extend(page.object_list)
+        return seen, page
+
+    def test_walks_every_post_once_in_order(self):
+        """Following next cursors visits each post exactly once"""
+        posts = self.create_posts(14)
+        seen, last = self.walk(CursorPaginator(Post.objects.all(), 6))
+        self.assertEqual(seen, posts)
+        self.assertEqual(len(last), 2)
+        self.assertFalse(last.has_next())
+
+    def test_ties_on_created_on_are_broken_by_id(self):
+        """Posts sharing a timestamp are neither skipped nor repeated"""
+        posts = self.create_posts(7, same_time=True)
+        seen, _ = self.walk(CursorPaginator(Post.objects.all(), 3))
+        self.assertEqual(seen, posts)
+
+    def test_previous_cursor_returns_to_earlier_page(self):
+        """previous_cursor gives back the page we came from"""
+        self.create_posts(10)
+        paginator = CursorPaginator(Post.objects.all(), 4)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_first_page_has_no_previous(self):
+        self.create_posts(3)
+        page = CursorPaginator(Post.objects.all(), 6).page()
+        self.assertFalse(page.has_other_pages())
+
+    def test_invalid_cursor_raises(self):
+        paginator = CursorPaginator(Post.objects.all(), 6)
+        tampered = [
+            base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            for values in (['n', 'yesterday', 1], ['n', '2026-01-01', 'x'],
+                           ['n', None, None])]
+        for cursor in ['garbage', 'WyJ4Il0', 'eyJhIjogMX0'] + tampered:
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+
+    def test_deep_page_is_a_single_query(self):
+        """Any page is one query, with no COUNT"""
+        self.create_posts(12)
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        page = paginator.page()
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                page = paginator.page(page.next_cursor)
+
+
+@override_settings(POST_LIST_PAGINATION='cursor')
+class TestPostListCursorMode(PaginationTestMixin, TestCase):
+
+    def test_home_page_renders_cursor_links(self):
+        """Index template links to the next page by cursor"""
+        self.create_posts(8)
+        response = self.client.get(reverse('home'))
+        page = response.context['page_obj']
+        self.assertTrue(response.context['is_paginated'])
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+        self.assertNotContains(response, '?page=')
+
+        response = self.client.get(
+            reverse('home'), {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['post_list']), 2)
+        self.assertContains(
+            response, f'?cursor={response.context["page_obj"].previous_cursor}')
+
+    def test_home_page_skips_count_query(self):
+        """Cursor mode runs a single query for the list"""
+        self.create_posts(8)
+        # The list, the ETag / Last-Modified lookup and the sidebar's
+        # month and author counts; no COUNT(*).
+        with self.assertNumQueries(4):
+            self.client.get(reverse('home'))
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(reverse('home'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,121 @@
+"""
+EXPLAIN-based checks that the hot queries are served by their indexes.
+
+Runs on SQLite by default and on PostgreSQL when the suite is pointed at
+one (``TEST_DATABASE_URL``). Tables are nearly empty, so on PostgreSQL
+sequential scans and sorts are disabled for the check; the assertion is
+that an index plan exists, not that the planner would pick it for ten
+rows.
+"""
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+
+from about.models import About
+from contact.models import ContactMessage
+
+from .models import Comment, Post
+from . import archive
+from .views import PostList, TrendingList, _comment_paginator
+
+
+class QueryPlanAssertions:
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name, ordered=True):
+        """
+        ``queryset`` is read through ``index_name`` and, if ``ordered``,
+        comes back in index order without a separate sort step.
+        """
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan, plan)
+        if not ordered:
+            return
+        if connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan, plan)
+        elif connection.vendor == 'postgresql':
+            self.assertNotRegex(plan, r'\bSort\b', plan)
+
+
+class TestHotQueryPlans(QueryPlanAssertions, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="x")
+        cls.post = Post.objects.create(
+            title="Indexed", slug="indexed", author=cls.user,
+            content="Content", status=1)
+
+    def test_published_feed_offset_page(self):
+        page = PostList.queryset[12:18]
+        self.assertUsesIndex(page, 'blog_post_published_idx')
+
+    def test_published_feed_cursor_order(self):
+        feed = PostList.queryset.order_by('-created_on', '-id')[:7]
+        self.assertUsesIndex(feed, 'blog_post_published_idx')
+
+    def test_trending_feed(self):
+        feed = TrendingList.queryset[:7]
+        self.assertUsesIndex(feed, 'blog_post_trending_idx')
+
+    def test_post_list_validators(self):
+        newest = Post.objects.order_by('-updated_on')[:1]
+        self.assertUsesIndex(newest, 'blog_post_updated_on_47ae824e')
+
+    def test_month_archive(self):
+        start, end = archive.month_range(2026, 3)
+        page = PostList.queryset.filter(
+            created_on__gte=start, created_on__lt=end,
+        ).order_by('-created_on', '-id')[:7]
+        self.assertUsesIndex(page, 'blog_post_published_idx')
+
+    def test_author_page(self):
+        page = self.user.blog_posts.filter(status=1).order_by(
+            '-created_on', '-id')[:7]
+        self.assertUsesIndex(page, 'blog_post_author_idx')
+
+    def test_comment_thread(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        thread = _comment_paginator(request, self.post)._ordered(False)
+        self.assertUsesIndex(thread[:21], 'blog_comment_thread_idx')
+
+    def test_comment_thread_signed_in(self):
+        """Approved and own pending comments each come in thread order"""
+        request = RequestFactory().get('/')
+        request.user = self.user
+        paginator = _comment_paginator(request, self.post)
+        approved, pending = paginator.querysets
+        key = [self.post.created_on, self.post.pk]
+        self.assertUsesIndex(
+            paginator._slice(approved, key, False), 'blog_comment_thread_idx')
+        self.assertUsesIndex(
+            paginator._slice(pending, key, False), 'blog_comment_pending_idx')
+
+    def test_comment_recount(self):
+        approved = Comment.objects.filter(post=self.post, approved=True)
+        self.assertUsesIndex(
+            approved.values('pk'), 'blog_comment_thread_idx', ordered=False)
+
+    def test_own_pending_comments(self):
+        pending = Comment.objects.filter(
+            post=self.post, author=self.user, approved=False)
+        self.assertUsesIndex(
+            pending, 'blog_comment_pending_idx', ordered=False)
+
+    def test_latest_about_entry(self):
+        latest = About.objects.order_by('-updated_on')[:1]
+        self.assertUsesIndex(latest, 'about_updated_idx')
+
+    def test_contact_inbox(self):
+        unread = ContactMessage.objects.filter(is_read=False)
+        self.assertUsesIndex(unread, 'contact_msg_unread_idx')
+        unresolved = ContactMessage.objects.filter(resolved=False)
+        self.assertUsesIndex(unresolved, 'contact_msg_open_idx')
@@ -0,0 +1,195 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import related
+from .models import Post, RelatedPost
+
+COFFEE = "<p>Roasting coffee beans, grinding coffee, brewing coffee.</p>"
+RUNNING = "<p>Running shoes, marathon training, running intervals.</p>"
+
+
+def rows():
+    return [
+        (1, "Coffee at dawn", COFFEE),
+        (2, "Coffee ceremony", COFFEE + "<p>Incense and popcorn.</p>"),
+        (3, "Marathon week", RUNNING),
+        (4, "Running in Addis", RUNNING + "<p>Altitude.</p>"),
+        (5, "Coffee and running", "<p>Coffee before running.</p>"),
+        (6, "Nothing shared", "<p>Zebra quilt.</p>"),
+    ]
+
+
+class TestRelatedIndex(TestCase):
+
+    def setUp(self):
+        self.index = related.build(rows())
+
+    def ids(self, post_id):
+        return [related_id for related_id, _ in self.index.lists()[post_id]]
+
+    def test_terms(self):
+        counts = related.terms("The Coffee", "<p>coffee &amp; 2 cups</p>")
+        self.assertEqual(counts, {'coffee': 1 + related.TITLE_WEIGHT,
+                                  'cups': 1})
+
+    def test_similar_posts_first_and_never_itself(self):
+        self.assertEqual(self.ids(1)[0], 2)
+        self.assertEqual(self.ids(3)[0], 4)
+        for post_id in range(1, 7):
+            self.assertNotIn(post_id, self.ids(post_id))
+        scores = [score for _, score in self.index.lists()[1]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_unrelated_posts_are_left_out(self):
+        self.assertEqual(self.ids(6), [])
+        self.assertNotIn(3, self.ids(1))
+
+    def test_edit_recomputes_affected_lists(self):
+        recomputed = self.index.update(
+            [(2, "Marathon ceremony", RUNNING)])
+        self.assertIn(2, recomputed)
+        # Post 1 had post 2 first; post 3 now has a closer match.
+        self.assertIn(1, recomputed)
+        self.assertIn(3, recomputed)
+        self.assertNotIn(2, self.ids(1))
+        self.assertIn(2, self.ids(3))
+
+    def test_unchanged_text_is_not_recomputed(self):
+        self.assertEqual(self.index.update(rows()[:2]), set())
+
+    def test_new_and_removed_posts(self):
+        recomputed = self.index.update(
+            [(7, "Coffee again", COFFEE)], removed=[2])
+        self.assertEqual(list(self.index.ids), [1, 3, 4, 5, 6, 7])
+        self.assertIn(1, recomputed)
+        self.assertEqual(self.ids(1)[0], 7)
+        self.assertEqual(self.ids(7)[0], 1)
+        self.assertNotIn(2, self.ids(5))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'related.npz')
+            self.index.save(path)
+            loaded = related.Index.load(path)
+        self.assertEqual(loaded.lists(), self.index.lists())
+        loaded.update([(7, "Coffee again", COFFEE)])
+        self.assertIn(loaded.lists()[7][0][0], (1, 2))
+
+    def test_empty(self):
+        index = related.build([])
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.lists(), {})
+
+
+class TestRelatedPosts(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'related.npz')
+        settings = override_settings(RELATED_POSTS_INDEX=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author = User.objects.create_user(username="writer")
+        self.posts = {
+            post_id: Post.objects.create(
+                title=title, slug=f"post-{post_id}", author=self.author,
+                content=content, status=1)
+            for post_id, title, content in rows()
+        }
+
+    def read_next(self, post):
+        return [p.title for p in Post.objects.get(pk=post.pk).read_next()]
+
+    def test_rebuild_stores_lists(self):
+        written = related.rebuild()
+        self.assertEqual(written, 5)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(self.read_next(self.posts[1])[0], "Coffee ceremony")
+        self.assertEqual(RelatedPost.objects.filter(
+            post=self.posts[6]).count(), 0)
+        # Nothing changed, nothing written.
+        self.assertEqual(related.rebuild(), 0)
+
+    def test_post_page_shows_read_next_in_one_query(self):
+        related.rebuild()
+        post = self.posts[1]
+        with self.assertNumQueries(1):
+            read_next = post.read_next()
+        self.assertEqual(read_next[0].author.username, "writer")
+        response = self.client.get(reverse('post_detail', args=[post.slug]))
+        self.assertContains(response, 'Read next')
+        self.assertContains(
+            response, reverse('post_detail', args=['post-2']))
+
+    def test_refresh_follows_edits_and_unpublishing(self):
+        related.rebuild()
+        post = self.posts[2]
+        post.title = "Marathon ceremony"
+        post.content = RUNNING
+        post.save()
+        related.refresh([post.pk])
+        self.assertNotIn("Marathon ceremony", self.read_next(self.posts[1]))
+        self.assertIn("Marathon ceremony", self.read_next(self.posts[3]))
+
+        post.status = 0
+        post.save()
+        related.refresh([post.pk])
+        self.assertNotIn("Marathon ceremony", self.read_next(self.posts[3]))
+        self.assertFalse(RelatedPost.objects.filter(post=post).exists())
+
+    def test_unpublished_posts_are_hidden_before_refresh(self):
+        related.rebuild()
+        Post.objects.filter(pk=self.posts[2].pk).update(status=0)
+        self.assertNotIn("Coffee ceremony", self.read_next(self.posts[1]))
+
+    def test_refresh_without_index_does_nothing(self):
+        self.assertEqual(related.refresh([self.posts[1].pk]), 0)
+        self.assertFalse(RelatedPost.objects.exists())
+
+    def test_incremental_command_picks_up_changes(self):
+        call_command('build_related_posts', stdout=StringIO())
+        Post.objects.filter(pk=self.posts[2].pk).touch(
+            title="Marathon ceremony", content=RUNNING)
+        self.posts[5].delete()
+        out = StringIO()
+        call_command('build_related_posts', '--incremental', stdout=out)
+        self.assertIn('Updated related posts of', out.getvalue())
+        self.assertIn("Marathon ceremony", self.read_next(self.posts[3]))
+
+    def test_incremental_command_needs_an_index(self):
+        with self.assertRaises(CommandError):
+            call_command('build_related_posts', '--incremental')
+
+    def test_saves_schedule_a_refresh_once_committed(self):
+        post = self.posts[1]
+        with mock.patch.object(related, 'schedule') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save(update_fields=['like_count'])
+            schedule.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                post.content = RUNNING
+                post.save()
+            schedule.assert_called_once_with(post.pk)
+
+    @override_settings(RELATED_POSTS_DELAY=60)
+    def test_schedule_batches_changes(self):
+        related.rebuild()
+        with mock.patch('threading.Timer') as timer:
+            related.schedule(1)
+            related.schedule(2)
+        timer.assert_called_once()
+        self.assertEqual(related._pending, {1, 2})
+        with mock.patch.object(related, 'refresh') as refresh, \
+                mock.patch.object(related, 'connection'):
+            related._refresh_pending()
+        refresh.assert_called_once_with({1, 2})
+        self.assertIsNone(related._timer)
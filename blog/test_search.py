@@ -0,0 +1,170 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import search
+from .admin import PostAdmin
+from .models import Post
+
+
+@skipUnless(search.backend() is not None, "no full-text index here")
+class TestFullTextSearch(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="writer")
+
+    def make_post(self, title, content, status=1):
+        return Post.objects.create(
+            title=title, slug=title.lower().replace(' ', '-'),
+            author=self.author, content=content, status=status)
+
+    def titles(self, query, **kwargs):
+        return [post.title for post in Post.objects.search(query, **kwargs)]
+
+    def test_finds_words_in_title_and_body(self):
+        self.make_post("Coffee Ceremony", "<p>Roasting beans at home</p>")
+        self.make_post("Injera", "<p>Teff flour and <b>patience</b></p>")
+        self.assertEqual(self.titles("coffee"), ["Coffee Ceremony"])
+        self.assertEqual(self.titles("patience"), ["Injera"])
+        self.assertEqual(self.titles("roasted bean"), ["Coffee Ceremony"])
+
+    def test_markup_is_not_indexed(self):
+        """Tags, attributes and entities from Summernote never match"""
+        self.make_post(
+            "Painted", '<p style="color:red">Plain&nbsp;words</p>')
+        self.assertEqual(self.titles("color"), [])
+        self.assertEqual(self.titles("nbsp"), [])
+        self.assertEqual(self.titles("words"), ["Painted"])
+
+    def test_title_matches_rank_first(self):
+        self.make_post("Addis nights", "<p>City walks</p>")
+        self.make_post(
+            "City walks", "<p>Addis in the morning and Addis at dusk</p>")
+        self.assertEqual(
+            self.titles("addis"), ["Addis nights", "City walks"])
+
+    def test_drafts_are_not_searchable(self):
+        self.make_post("Secret", "<p>Unpublished coffee</p>", status=0)
+        self.assertEqual(self.titles("coffee"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = self.make_post("Edited", "<p>Before</p>")
+        post.content = "<p>After</p>"
+        post.save()
+        self.assertEqual(self.titles("before"), [])
+        self.assertEqual(self.titles("after"), ["Edited"])
+
+        post.delete()
+        self.assertEqual(self.titles("after"), [])
+
+    def test_bulk_created_posts_are_indexed(self):
+        Post.objects.bulk_create([
+            Post(title=f"Bulk {i}", slug=f"bulk-{i}", author=self.author,
+                 content="<p>Imported</p>", status=1)
+            for i in range(3)
+        ])
+        self.assertEqual(len(self.titles("imported")), 3)
+
+    def test_query_syntax_is_ignored(self):
+        """Operators and quotes from users are just words"""
+        self.make_post("Quotes", "<p>Said NOT so</p>")
+        for query in ('"', 'title:said', 'said AND', 'NOT', '*', '-so'):
+            self.titles(query)
+        self.assertEqual(self.titles('"said"'), ["Quotes"])
+        self.assertEqual(self.titles('!!!'), [])
+
+    def test_limit_and_offset(self):
+        for i in range(5):
+            self.make_post(f"Tea {i}", "<p>Tea</p>")
+        first = self.titles("tea", limit=2)
+        rest = self.titles("tea", limit=10, offset=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(rest), 3)
+        self.assertFalse(set(first) & set(rest))
+
+    def test_rebuild_command(self):
+        self.make_post("Lost", "<p>Missing from the index</p>")
+        with connection.cursor() as cursor:
+            search.backend().clear(cursor)
+        self.assertEqual(self.titles("missing"), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 1 post(s)', out.getvalue())
+        self.assertEqual(self.titles("missing"), ["Lost"])
+
+    def test_admin_search_uses_index(self):
+        self.make_post("Draft tea", "<p>Spiced</p>", status=0)
+        self.make_post("Other", "<p>Plain</p>")
+        admin = PostAdmin(Post, AdminSite())
+        results, may_have_duplicates = admin.get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'spiced')
+        self.assertEqual([post.title for post in results], ["Draft tea"])
+        self.assertFalse(may_have_duplicates)
+
+    def test_admin_search_filters_in_the_database(self):
+        """Matching ids are a subquery, not a list of bound parameters"""
+        for i in range(20):
+            self.make_post(f"Tea {i}", "<p>Spiced</p>", status=i % 2)
+        admin = PostAdmin(Post, AdminSite())
+        results, _ = admin.get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'spiced')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(results), 20)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('IN (SELECT', queries[0]['sql'])
+
+        results, _ = admin.get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), '!!')
+        self.assertEqual(list(results), [])
+
+
+class TestSearchView(TestCase):
+
+    def setUp(self):
+        author = User.objects.create_user(username="writer")
+        for i in range(12):
+            Post.objects.create(
+                title=f"Harar {i}", slug=f"harar-{i}", author=author,
+                content="<p>Walled city</p>", status=1)
+        self.url = reverse('search')
+
+    def test_results_page(self):
+        response = self.client.get(self.url, {'q': 'walled'})
+        self.assertEqual(len(response.context['results']), 10)
+        self.assertTrue(response.context['has_next'])
+        self.assertContains(response, 'q=walled&amp;page=2')
+
+        response = self.client.get(self.url, {'q': 'walled', 'page': 2})
+        self.assertEqual(len(response.context['results']), 2)
+        self.assertFalse(response.context['has_next'])
+
+    def test_empty_query_runs_no_search(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_results_are_one_query_for_ids_and_one_for_posts(self):
+        with self.assertNumQueries(2 if search.backend() else 1):
+            self.client.get(self.url, {'q': 'walled'})
+
+    def test_no_match(self):
+        response = self.client.get(self.url, {'q': 'axum'})
+        self.assertContains(response, 'No posts match')
+
+    def test_page_beyond_limit_is_404(self):
+        response = self.client.get(self.url, {'q': 'walled', 'page': 51})
+        self.assertEqual(response.status_code, 404)
+
+    def test_falls_back_to_icontains_without_index(self):
+        with mock.patch.object(search, 'backend', return_value=None):
+            response = self.client.get(self.url, {'q': 'walled city'})
+        self.assertEqual(len(response.context['results']), 10)
+        self.assertEqual(response.context['results'][0].title, 'Harar 11')
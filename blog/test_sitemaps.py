@@ -0,0 +1,105 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import sitemaps
+from .models import Post
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class TestSitemap(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer")
+        self.posts = [self.make_post(f"post-{i}") for i in range(5)]
+        self.make_post("draft", status=0)
+
+    def make_post(self, slug, status=1):
+        return Post.objects.create(
+            title=slug.title(), slug=slug, author=self.author,
+            content="Content", status=status)
+
+    def get(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        if response.streaming:
+            response.xml = b''.join(response.streaming_content).decode()
+        return response
+
+    def test_single_urlset_with_lastmod(self):
+        response = self.get(reverse('sitemap'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/xml; charset=utf-8')
+        post = self.posts[0]
+        self.assertIn(
+            '<url><loc>http://testserver/post/post-0/</loc><lastmod>'
+            f'{post.updated_on.replace(microsecond=0).isoformat()}'
+            '</lastmod></url>', response.xml)
+        self.assertIn('<loc>http://testserver/about/</loc>', response.xml)
+        self.assertEqual(response.xml.count('<url>'),
+                         len(self.posts) + len(sitemaps.PAGES))
+        self.assertNotIn('draft', response.xml)
+
+    def test_urlset_is_one_query_for_the_posts(self):
+        """Validators, the one-file check, then the posts streamed by id"""
+        with self.assertNumQueries(3):
+            self.get(reverse('sitemap'))
+
+    def test_revisit_is_not_modified(self):
+        etag = self.get(reverse('sitemap'))['ETag']
+        response = self.get(reverse('sitemap'), If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @mock.patch('blog.sitemaps.SECTION_SIZE', 2)
+    def test_index_of_sections_past_one_file(self):
+        response = self.get(reverse('sitemap'))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        text = response.content.decode()
+        self.assertIn('<sitemapindex', text)
+        self.assertIn('<loc>http://testserver/sitemap-pages.xml</loc>', text)
+
+        sections = {}
+        for post in self.posts:
+            sections.setdefault(post.pk // 2, []).append(post)
+        listed = []
+        for section, posts in sections.items():
+            lastmod = max(post.updated_on for post in posts)
+            self.assertIn(
+                f'<sitemap><loc>http://testserver/sitemap-posts-{section}'
+                f'.xml</loc><lastmod>'
+                f'{lastmod.replace(microsecond=0).isoformat()}</lastmod>',
+                text)
+            urlset = self.get(reverse('sitemap_posts', args=[section]))
+            self.assertTrue(urlset.streaming)
+            listed += [post.slug for post in posts
+                       if f'/post/{post.slug}/' in urlset.xml]
+            self.assertEqual(urlset.xml.count('<url>'), len(posts))
+        self.assertEqual(sorted(listed), [post.slug for post in self.posts])
+
+        pages = self.get(reverse('sitemap_pages'))
+        self.assertEqual(pages.xml.count('<url>'), len(sitemaps.PAGES))
+
+        self.assertEqual(
+            self.get(reverse('sitemap'))['X-Page-Cache'], 'HIT')
+        self.make_post("meskel")
+        self.assertEqual(
+            self.get(reverse('sitemap'))['X-Page-Cache'], 'MISS')
+
+    @mock.patch('blog.sitemaps.SECTION_SIZE', 2)
+    def test_section_revisit_and_missing_section(self):
+        section = self.posts[0].pk // 2
+        url = reverse('sitemap_posts', args=[section])
+        etag = self.get(url)['ETag']
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 304)
+
+        self.posts[0].title = "Edited"
+        self.posts[0].save()
+        self.assertEqual(self.get(url, If_None_Match=etag).status_code, 200)
+
+        empty = reverse('sitemap_posts', args=[self.posts[-1].pk // 2 + 5])
+        self.assertEqual(self.get(empty).status_code, 404)
@@ -0,0 +1,141 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Comment, Post
+from .slug_cache import SlugCache, post_ids
+from .views import _comment_for
+
+
+class TestSlugCache(TestCase):
+
+    def test_least_recently_used_slug_is_dropped(self):
+        cache = SlugCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate(self):
+        cache = SlugCache()
+        cache.set('a', 1)
+        cache.invalidate('a', None, 'missing')
+        self.assertIsNone(cache.get('a'))
+
+
+class TestCommentLookup(TestCase):
+
+    def setUp(self):
+        post_ids.clear()
+        self.user = User.objects.create_user(
+            username="writer", password="writerpass123")
+        self.other = User.objects.create_user(username="other")
+        self.post = Post.objects.create(
+            title="Lookups", slug="lookups", author=self.user,
+            content="Content", status=1)
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Mine")
+
+    def tearDown(self):
+        post_ids.clear()
+
+    def test_lookup_is_one_joined_query(self):
+        """Comment, post and author arrive together; the slug is cached"""
+        with self.assertNumQueries(1):
+            comment = _comment_for('lookups', self.comment.id)
+            self.assertEqual(comment.post.slug, 'lookups')
+            self.assertEqual(comment.author.username, 'writer')
+        self.assertEqual(post_ids.get('lookups'), self.post.pk)
+
+    def test_cached_id_replaces_the_slug_filter(self):
+        """By primary key and post id; slug and status checked in Python"""
+        _comment_for('lookups', self.comment.id)
+        with CaptureQueriesContext(connection) as queries:
+            comment = _comment_for('lookups', self.comment.id)
+        self.assertEqual(comment, self.comment)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertIn('"blog_comment"."post_id" = %d' % self.post.pk, sql)
+        self.assertNotIn('"slug" =', sql)
+        self.assertNotIn('"status" =', sql)
+
+    def test_cached_id_of_an_unpublished_post_is_404(self):
+        """Unpublished by another process: the cached id is not trusted"""
+        _comment_for('lookups', self.comment.id)
+        Post.objects.filter(pk=self.post.pk).update(status=0)
+        with self.assertRaises(Http404):
+            _comment_for('lookups', self.comment.id)
+        self.assertIsNone(post_ids.get('lookups'))
+
+    def test_wrong_post_or_draft_is_404(self):
+        Post.objects.create(
+            title="Other", slug="other", author=self.user, content="C",
+            status=1)
+        with self.assertRaises(Http404):
+            _comment_for('other', self.comment.id)
+        self.post.status = 0
+        self.post.save()
+        with self.assertRaises(Http404):
+            _comment_for('lookups', self.comment.id)
+        self.assertIsNone(post_ids.get('lookups'))
+
+    def test_saving_a_post_drops_old_and_new_slug(self):
+        _comment_for('lookups', self.comment.id)
+        self.post.slug = 'renamed'
+        self.post.save()
+        self.assertIsNone(post_ids.get('lookups'))
+        with self.assertRaises(Http404):
+            _comment_for('lookups', self.comment.id)
+        self.assertEqual(
+            _comment_for('renamed', self.comment.id), self.comment)
+
+    def test_deleting_a_post_drops_its_slug(self):
+        _comment_for('lookups', self.comment.id)
+        self.post.delete()
+        self.assertIsNone(post_ids.get('lookups'))
+
+    def test_stale_id_falls_back_to_the_join(self):
+        """An id cached by another process before a rename is not trusted"""
+        post_ids.set('lookups', self.post.pk + 100)
+        self.assertEqual(
+            _comment_for('lookups', self.comment.id), self.comment)
+        self.assertEqual(post_ids.get('lookups'), self.post.pk)
+
+    def test_stale_id_of_another_post_is_rechecked(self):
+        """The cached id now belongs to a post with a different slug"""
+        other = Post.objects.create(
+            title="Other", slug="other", author=self.user, content="C",
+            status=1)
+        post_ids.set('other', self.post.pk)
+        with self.assertRaises(Http404):
+            _comment_for('other', self.comment.id)
+        self.assertIsNone(post_ids.get('other'))
+        mine = Comment.objects.create(post=other, author=self.user, body="B")
+        self.assertEqual(_comment_for('other', mine.id), mine)
+
+    def test_edit_page_queries(self):
+        """Session, user and the one comment lookup"""
+        self.client.login(username='writer', password='writerpass123')
+        url = reverse('comment_edit', args=['lookups', self.comment.id])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Mine')
+
+    def test_ownership_check_needs_no_extra_query(self):
+        """Someone else's comment is refused straight after the lookup"""
+        theirs = Comment.objects.create(
+            post=self.post, author=self.other, body="Theirs")
+        self.client.login(username='writer', password='writerpass123')
+        url = reverse('comment_delete', args=['lookups', theirs.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                url, headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(Comment.objects.filter(pk=theirs.pk).exists())
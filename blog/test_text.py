@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Post
+from .text import plain_text, reading_time
+
+SUMMERNOTE_HTML = (
+    '<p>Coffee&nbsp;ceremony <b>in</b> Addis</p>'
+    '<ul><li>one</li><li>two</li></ul>'
+)
+
+
+class TestPostTextFields(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="x")
+
+    def make_post(self, content, slug="post", **kwargs):
+        return Post.objects.create(
+            title=slug, slug=slug, author=self.user, content=content,
+            status=1, **kwargs)
+
+    def test_plain_text_strips_html(self):
+        self.assertEqual(
+            plain_text(SUMMERNOTE_HTML), 'Coffee ceremony in Addis one two')
+
+    def test_save_stores_excerpt_and_word_count(self):
+        """Excerpt and word count are computed once, on save"""
+        post = self.make_post(SUMMERNOTE_HTML)
+        self.assertEqual(post.excerpt, 'Coffee ceremony in Addis one two')
+        self.assertEqual(post.word_count, 6)
+
+        post.content = '<p>' + 'word ' * 40 + '</p>'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 40)
+        self.assertEqual(post.excerpt, 'word ' * 29 + 'word…')
+
+    def test_bulk_create_fills_text_fields(self):
+        """Bulk imports get the derived fields as well"""
+        Post.objects.bulk_create([
+            Post(title=f"t{i}", slug=f"t{i}", author=self.user,
+                 content=f"<p>{'x ' * (i + 1)}</p>")
+            for i in range(3)
+        ])
+        self.assertEqual(
+            list(Post.objects.order_by('slug')
+                 .values_list('word_count', flat=True)),
+            [1, 2, 3])
+
+    def test_reading_time(self):
+        self.assertEqual(reading_time(0), 1)
+        self.assertEqual(reading_time(200), 1)
+        self.assertEqual(reading_time(201), 2)
+        self.assertEqual(reading_time(1000), 5)
+
+    def test_list_view_does_not_load_content(self):
+        """Home page cards render the excerpt without loading bodies"""
+        self.make_post(SUMMERNOTE_HTML)
+        response = self.client.get(reverse('home'))
+        post = response.context['post_list'][0]
+        self.assertIn('content', post.get_deferred_fields())
+        self.assertContains(response, 'ceremony in Addis')
+
+    def test_detail_view_shows_reading_time(self):
+        self.make_post('<p>' + 'word ' * 450 + '</p>')
+        response = self.client.get(reverse('post_detail', args=['post']))
+        self.assertContains(response, '3 min read')
+
+    def test_backfill_command(self):
+        """Existing rows without derived fields are filled in"""
+        post = self.make_post(SUMMERNOTE_HTML)
+        Post.objects.update(excerpt='', word_count=0)
+
+        out = StringIO()
+        call_command('backfill_post_text', stdout=out)
+        self.assertIn('1 post(s)', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.word_count, 6)
+
+        call_command('backfill_post_text', stdout=out)
+        self.assertIn('0 post(s)', out.getvalue())
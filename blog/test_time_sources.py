@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from .context_processors import world_time
+from .time_sources import TimeSourceUnavailable, WorldTimeAPISource
+
+
+class StubWorldTimeHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for worldtimeapi.org"""
+    status = 200
+    offset_hours = 3
+    hits = []
+
+    def do_GET(self):
+        StubWorldTimeHandler.hits.append(self.path)
+        if self.status != 200:
+            self.send_response(self.status)
+            self.end_headers()
+            return
+        now = datetime.now(timezone(timedelta(hours=self.offset_hours)))
+        body = json.dumps({'datetime': now.isoformat()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWorldTimeAPISource(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), StubWorldTimeHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}/api/timezone/'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        StubWorldTimeHandler.status = 200
+        StubWorldTimeHandler.offset_hours = 3
+        StubWorldTimeHandler.hits = []
+        self.source = WorldTimeAPISource(base_url=self.url, timeout=1)
+
+    def test_offset_is_cached(self):
+        """Repeated lookups within the TTL hit the API once"""
+        for _ in range(5):
+            dt = self.source.now('Africa/Addis_Ababa')
+        self.assertEqual(dt.utcoffset(), timedelta(hours=3))
+        self.assertEqual(len(StubWorldTimeHandler.hits), 1)
+
+    def test_cache_is_shared_between_instances(self):
+        """A second worker reuses the offset fetched by the first"""
+        self.source.now('Europe/Dublin')
+        other_worker = WorldTimeAPISource(base_url=self.url, timeout=1)
+        other_worker.now('Europe/Dublin')
+        self.assertEqual(StubWorldTimeHandler.hits, [
+            '/api/timezone/Europe/Dublin'])
+
+    def test_stale_entry_is_served_and_refreshed_in_background(self):
+        """Near expiry the cached offset is returned and refreshed async"""
+        cache.set('world_time:offset:Europe/Dublin',
+                  (0, time.time() - 3500), 3600)
+        StubWorldTimeHandler.offset_hours = 1
+
+        dt = self.source.now('Europe/Dublin')
+        self.assertEqual(dt.utcoffset(), timedelta(0))
+
+        self.source.last_refresh.join(timeout=5)
+        self.assertEqual(len(StubWorldTimeHandler.hits), 1)
+        seconds, _ = cache.get('world_time:offset:Europe/Dublin')
+        self.assertEqual(seconds, 3600)
+        self.assertIsNone(cache.get('world_time:refreshing:Europe/Dublin'))
+
+    def test_only_one_background_refresh_at_a_time(self):
+        """Concurrent stale reads trigger a single refresh"""
+        cache.set('world_time:offset:Europe/Dublin',
+                  (0, time.time() - 3500), 3600)
+        cache.set('world_time:refreshing:Europe/Dublin', 1, 10)
+        self.source.now('Europe/Dublin')
+        self.assertIsNone(self.source.last_refresh)
+        self.assertEqual(StubWorldTimeHandler.hits, [])
+
+    @override_settings(WORLD_TIME_FAILURE_THRESHOLD=3)
+    def test_circuit_opens_after_repeated_failures(self):
+        """After the threshold the API is no longer called"""
+        StubWorldTimeHandler.status = 503
+        with self.assertLogs('blog.time_sources', 'WARNING') as logs:
+            for _ in range(3):
+                with self.assertRaises(Exception):
+                    self.source.now('Europe/Dublin')
+        self.assertIn('not calling it', logs.output[-1])
+        self.assertTrue(self.source.circuit_open())
+
+        for _ in range(10):
+            with self.assertRaises(TimeSourceUnavailable):
+                self.source.now('Europe/Dublin')
+        self.assertEqual(len(StubWorldTimeHandler.hits), 3)
+
+    def test_circuit_closes_after_cooldown(self):
+        """Once the cool-down key expires the API is tried again"""
+        cache.set('world_time:circuit_open', True, 300)
+        with self.assertRaises(TimeSourceUnavailable):
+            self.source.now('Europe/Dublin')
+        cache.delete('world_time:circuit_open')
+        self.source.now('Europe/Dublin')
+        self.assertEqual(len(StubWorldTimeHandler.hits), 1)
+
+    def test_outage_does_not_flood_logs(self):
+        """During an outage world_time logs at most once per failure
+        until the circuit opens, then stays quiet"""
+        StubWorldTimeHandler.status = 500
+        with override_settings(
+                WORLD_TIME_SOURCE='blog.time_sources.WorldTimeAPISource',
+                WORLD_TIME_API_URL=self.url,
+                WORLD_TIME_FAILURE_THRESHOLD=2):
+            with self.assertLogs('blog', 'INFO') as logs:
+                for _ in range(20):
+                    context = world_time(RequestFactory().get('/'))
+                    self.assertTrue(context['time_error'])
+        self.assertEqual(len(StubWorldTimeHandler.hits), 2)
+        self.assertLessEqual(len(logs.records), 5)
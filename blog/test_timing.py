@@ -0,0 +1,116 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import context_processors, timing
+from .models import Post
+
+
+def durations(response):
+    """``{metric: (ms, desc)}`` from the Server-Timing header"""
+    metrics = {}
+    for part in response['Server-Timing'].split(', '):
+        name, *params = part.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(values['dur']), values.get('desc'))
+    return metrics
+
+
+class TestTimings(TestCase):
+
+    def test_nested_spans_count_exclusive_time(self):
+        timings = timing.Timings()
+        clock = iter([0.0, 1.0, 3.0, 4.0, 4.5, 6.0])
+        with mock.patch('blog.timing.time.perf_counter',
+                        side_effect=lambda: next(clock)):
+            with timings.span('tpl'):
+                with timings.span('db'):
+                    pass
+                with timings.span('cp'):
+                    pass
+        self.assertEqual(timings.totals['db'], 2.0)
+        self.assertEqual(timings.totals['cp'], 0.5)
+        self.assertEqual(timings.totals['tpl'], 3.5)
+
+    def test_span_outside_a_request_does_nothing(self):
+        with timing.span('db'):
+            pass
+
+    def test_header(self):
+        timings = timing.Timings()
+        timings.totals['db'] = 0.0031
+        timings.queries = 4
+        self.assertEqual(
+            timing.header(timings, 0.0125),
+            'db;dur=3.1;desc="4 queries", cp;dur=0.0, tpl;dur=0.0, '
+            'media;dur=0.0, total;dur=12.5')
+
+
+class TestServerTimingMiddleware(TestCase):
+
+    def setUp(self):
+        author = User.objects.create_user(username="writer")
+        for i in range(3):
+            Post.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", author=author,
+                content="Content", status=1)
+
+    def test_off_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            timing.ServerTimingMiddleware(lambda request: HttpResponse())
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_and_log_line(self):
+        with CaptureQueriesContext(connection) as queries, \
+                self.assertLogs('blog.timing', 'INFO') as logs:
+            response = self.client.get(reverse('home'))
+        metrics = durations(response)
+        self.assertEqual(
+            list(metrics), [*timing.METRICS, 'total'])
+        self.assertEqual(metrics['db'][1], f'"{len(queries)} queries"')
+        self.assertGreater(metrics['tpl'][0], 0)
+        self.assertLessEqual(
+            sum(metrics[name][0] for name in timing.METRICS),
+            metrics['total'][0] + 0.5)
+
+        record, = logs.records
+        self.assertEqual(record.timing['path'], '/')
+        self.assertEqual(record.timing['status'], 200)
+        self.assertEqual(record.timing['db_queries'], len(queries))
+        self.assertRegex(
+            record.getMessage(),
+            r'^method=GET path=/ status=200 total_ms=[\d.]+ db_queries=\d+')
+
+    @override_settings(SERVER_TIMING=True)
+    def test_lazy_world_time_counts_as_context_processor(self):
+        compute = context_processors._compute_world_time
+
+        def slow():
+            time.sleep(0.05)
+            return compute()
+
+        with mock.patch(
+                'blog.context_processors._compute_world_time', slow), \
+                self.assertLogs('blog.timing', 'INFO'):
+            response = self.client.get(reverse('home'))
+        metrics = durations(response)
+        self.assertGreaterEqual(metrics['cp'][0], 50)
+        self.assertLess(metrics['tpl'][0], 50)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_hooks_are_idle_between_requests(self):
+        with self.assertLogs('blog.timing', 'INFO'):
+            self.client.get(reverse('home'))
+        self.assertIsNone(timing._current.get())
+        template = engines['django'].from_string('{{ count }}')
+        self.assertEqual(template.render({'count': 3}), '3')
@@ -0,0 +1,181 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from . import trending
+from .admin import CommentAdmin
+from .like_buffer import LikeBuffer
+from .models import Comment, Post, TrendingEpoch
+
+EPOCH = 1_700_000_000.0
+HOUR = 60 * 60
+
+
+@override_settings(TRENDING_HALF_LIFE=HOUR)
+class TestTrendingScore(TestCase):
+
+    def setUp(self):
+        TrendingEpoch.objects.update(epoch=EPOCH)
+        self.at(EPOCH)
+        self.author = User.objects.create_user(username="writer")
+        self.readers = [
+            User.objects.create_user(username=f"reader{i}")
+            for i in range(3)]
+        self.post = self.make_post("Timket")
+
+    def at(self, now):
+        patcher = mock.patch('blog.trending.time.time', return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_post(self, title, status=1):
+        return Post.objects.create(
+            title=title, slug=title.lower(), author=self.author,
+            content="Content", status=status)
+
+    def score(self, post=None):
+        post = post or self.post
+        post.refresh_from_db()
+        return post.trend_score
+
+    def test_like_adds_and_unlike_takes_back(self):
+        self.post.toggle_like(self.readers[0])
+        self.assertAlmostEqual(self.score(), trending.LIKE_WEIGHT)
+        self.post.toggle_like(self.readers[0])
+        self.assertAlmostEqual(self.score(), 0)
+
+    def test_likes_added_from_either_side(self):
+        self.post.likes.add(*self.readers[:2])
+        self.assertAlmostEqual(self.score(), 2 * trending.LIKE_WEIGHT)
+        self.readers[0].post_likes.remove(self.post)
+        self.assertAlmostEqual(self.score(), trending.LIKE_WEIGHT)
+
+    def test_later_events_weigh_more(self):
+        """Two half-lives later a like counts four times as much"""
+        self.post.toggle_like(self.readers[0])
+        self.at(EPOCH + 2 * HOUR)
+        self.post.toggle_like(self.readers[1])
+        self.assertAlmostEqual(self.score(), 5 * trending.LIKE_WEIGHT)
+
+    def test_late_unlike_is_clamped_at_zero(self):
+        """
+        An unlike weighs as much as a like made now, more than the old
+        like it takes back: the score stops at zero instead of below it.
+        """
+        other = self.make_post("Meskel")
+        self.post.toggle_like(self.readers[0])
+        self.at(EPOCH + 2 * HOUR)
+        other.toggle_like(self.readers[1])
+        self.post.toggle_like(self.readers[0])
+        self.assertEqual(self.score(), 0)
+        self.assertEqual(
+            list(Post.objects.trending().values_list('pk', flat=True)),
+            [other.pk])
+
+    def test_approved_comments_count(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.readers[0], body="Hi")
+        self.assertEqual(self.score(), 0)
+        comment.approved = True
+        comment.save()
+        self.assertAlmostEqual(self.score(), trending.COMMENT_WEIGHT)
+        comment.delete()
+        self.assertAlmostEqual(self.score(), 0)
+
+    def test_admin_approval_counts(self):
+        for reader in self.readers:
+            Comment.objects.create(
+                post=self.post, author=reader, body="Hi")
+        CommentAdmin(Comment, AdminSite()).approve_comments(
+            RequestFactory().get('/'), Comment.objects.all())
+        self.assertAlmostEqual(self.score(), 3 * trending.COMMENT_WEIGHT)
+
+    @override_settings(LIKE_WRITE_MODE='buffered', LIKE_FLUSH_INTERVAL=0)
+    def test_buffered_likes_count_when_flushed(self):
+        buffer = LikeBuffer()
+        other = self.make_post("Meskel")
+        buffer.toggle(self.post, self.readers[0])
+        buffer.toggle(self.post, self.readers[1])
+        buffer.toggle(other, self.readers[0])
+        buffer.flush()
+        self.assertAlmostEqual(self.score(), 2 * trending.LIKE_WEIGHT)
+        self.assertAlmostEqual(self.score(other), trending.LIKE_WEIGHT)
+
+    def test_decay_moves_the_epoch_and_keeps_the_order(self):
+        hot = self.make_post("Hot")
+        hot.likes.add(*self.readers)
+        self.post.likes.add(self.readers[0])
+        faded = self.make_post("Faded")
+        faded.likes.add(self.readers[0])
+        Post.objects.filter(pk=faded.pk).update(trend_score=0.1)
+        faded.refresh_from_db()
+        updated_on = faded.updated_on
+
+        dropped = trending.decay(now=EPOCH + 4 * HOUR)
+        self.assertEqual(dropped, 1)
+        self.assertEqual(TrendingEpoch.objects.get().epoch, EPOCH + 4 * HOUR)
+        self.assertAlmostEqual(self.score(hot), 3 / 16)
+        self.assertAlmostEqual(self.score(), 1 / 16)
+        self.assertEqual(self.score(faded), 0)
+        self.assertNotEqual(faded.updated_on, updated_on)
+        self.assertEqual(
+            list(Post.objects.trending()), [hot, self.post])
+
+        # A like now counts 1 in the new epoch's units.
+        self.at(EPOCH + 4 * HOUR)
+        self.post.toggle_like(self.readers[1])
+        self.assertAlmostEqual(self.score(), 1 + 1 / 16)
+
+    def test_decay_command(self):
+        out = StringIO()
+        call_command('decay_trending', stdout=out)
+        self.assertIn('0 post(s) dropped out', out.getvalue())
+
+
+class TestTrendingPage(TestCase):
+
+    def setUp(self):
+        author = User.objects.create_user(username="writer")
+        self.scores = {'warm': 2.0, 'hot': 5.0, 'cold': 0.0, 'tepid': 1.0}
+        for slug in self.scores:
+            Post.objects.create(
+                title=slug.title(), slug=slug, author=author,
+                content="Content", status=1)
+        Post.objects.create(
+            title="Draft", slug="draft", author=author, content="Content",
+            status=0)
+        for slug, score in {**self.scores, 'draft': 9.0}.items():
+            Post.objects.filter(slug=slug).update(trend_score=score)
+        self.url = reverse('trending')
+
+    def slugs(self, response):
+        return [post.slug for post in response.context['post_list']]
+
+    def test_hottest_published_posts_first(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.slugs(response), ['hot', 'warm', 'tepid'])
+        self.assertContains(response, 'Trending')
+
+    def test_one_query_for_the_posts(self):
+        """Validators, the posts with their authors, sidebar counts"""
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    @mock.patch('blog.views.TrendingList.paginate_by', 2)
+    def test_pages_continue_by_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(self.slugs(response), ['hot', 'warm'])
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(self.url, {'cursor': cursor})
+        self.assertEqual(self.slugs(response), ['tepid'])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_empty(self):
+        Post.objects.update(trend_score=0)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Nothing is trending right now.')
@@ -1,7 +1,17 @@
-from django.contrib.auth.models import User
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
 from django.urls import reverse
-from django.test import TestCase
+from django.utils import timezone
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from .models import Post, Comment
+from .pagination import CursorPaginator
+from .views import PostList, _comment_paginator, liked_post_ids
 
 
 class TestBlogViews(TestCase):
@@ -395,3 +405,406 @@ class TestBlogViews(TestCase):
 
         # Comment should still exist
         self.assertTrue(Comment.objects.filter(id=comment.id).exists())
+
+
+class TestPostListQueries(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", password="authorpass123")
+        self.readers = [
+            User.objects.create_user(username=f"reader{i}", password="x")
+            for i in range(3)
+        ]
+
+    def create_posts(self, count):
+        for i in range(Post.objects.count(), count):
+            post = Post.objects.create(
+                title=f"Post {i}",
+                slug=f"post-{i}",
+                author=self.author,
+                content="Some content",
+                status=1
+            )
+            post.likes.add(*self.readers[:i % 4])
+            Comment.objects.create(
+                post=post, author=self.readers[0], body="Yes", approved=True)
+            Comment.objects.create(
+                post=post, author=self.readers[1], body="No", approved=False)
+
+    def test_home_page_query_count_is_constant(self):
+        """Home page runs the same number of queries for 1 or 6 posts"""
+        self.create_posts(1)
+        # COUNT, the page of posts, the ETag / Last-Modified lookup and
+        # the sidebar's month and author counts.
+        with self.assertNumQueries(5):
+            self.client.get(reverse('home'))
+
+        self.create_posts(6)
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['post_list']), 6)
+
+    def test_home_page_query_count_ignores_page_size(self):
+        """A larger page size does not add queries"""
+        self.create_posts(20)
+        with mock.patch.object(PostList, 'paginate_by', 20):
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['post_list']), 20)
+
+    def test_home_page_counts_match_related_rows(self):
+        """Like and approved-comment counts match the related rows"""
+        self.create_posts(4)
+        response = self.client.get(reverse('home'))
+        for post in response.context['post_list']:
+            self.assertEqual(post.like_count, post.likes.count())
+            self.assertEqual(post.comment_count, 1)
+
+
+class TestPostDetailQueries(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", password="authorpass123")
+        self.post = Post.objects.create(
+            title="Busy Thread", slug="busy-thread", author=self.author,
+            content="Some content", status=1)
+        self.url = reverse('post_detail', args=['busy-thread'])
+
+    def add_comments(self, count):
+        for i in range(count):
+            reader = User.objects.create_user(
+                username=f"commenter{self.post.comments.count()}",
+                password="x")
+            Comment.objects.create(
+                post=self.post, author=reader, body=f"Comment {i}",
+                approved=True)
+        Comment.objects.create(
+            post=self.post, author=self.author, body="Mine, pending")
+        Comment.objects.create(
+            post=self.post, author=reader, body="Theirs, pending")
+
+    def test_anonymous_query_count_is_constant(self):
+        """Validators, post with author, comments with authors, read next"""
+        self.add_comments(1)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+        self.add_comments(10)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['comments']), 11)
+        self.assertContains(response, '11 comments')
+
+    def test_logged_in_query_count_is_constant(self):
+        """
+        Session and user, then the same queries plus the reader's pending
+        comments and the liked check
+        """
+        self.client.login(username='author', password='authorpass123')
+        self.add_comments(1)
+        with self.assertNumQueries(8):
+            self.client.get(self.url)
+
+        self.add_comments(10)
+        with self.assertNumQueries(8):
+            response = self.client.get(self.url)
+        bodies = [c.body for c in response.context['comments']]
+        self.assertEqual(len(bodies), 13)
+        self.assertIn("Mine, pending", bodies)
+        self.assertNotIn("Theirs, pending", bodies)
+
+
+class TestCommentFragments(TestCase):
+    """
+    Script callers get just the changed comment back; plain form posts
+    still redirect to the post page.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="writer", password="writerpass123")
+        self.other = User.objects.create_user(
+            username="other", password="otherpass123")
+        self.post = Post.objects.create(
+            title="Fragments", slug="fragments", author=self.user,
+            content="Content", status=1)
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Original", approved=True)
+        self.client.login(username='writer', password='writerpass123')
+
+    def ajax_post(self, url, data=None):
+        return self.client.post(
+            url, data or {}, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    def edit_url(self, comment):
+        return reverse('comment_edit', args=['fragments', comment.id])
+
+    def delete_url(self, comment):
+        return reverse('comment_delete', args=['fragments', comment.id])
+
+    def test_add_returns_new_comment_card(self):
+        response = self.ajax_post(
+            reverse('add_comment', args=['fragments']), {'body': 'Fresh'})
+        comment = Comment.objects.get(body='Fresh')
+        self.assertEqual(response.status_code, 201)
+        self.assertContains(
+            response, f'id="comment-{comment.id}"', status_code=201)
+        self.assertContains(response, 'Awaiting approval', status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+        # Nothing is left queued for the next full page.
+        response = self.client.get(reverse('post_detail', args=['fragments']))
+        self.assertEqual(len(response.context['messages']), 0)
+
+    def test_add_is_cheaper_than_redirect(self):
+        """The fragment skips the post page's comment and like queries"""
+        url = reverse('add_comment', args=['fragments'])
+        with CaptureQueriesContext(connection) as fragment:
+            self.ajax_post(url, {'body': 'One'})
+        with CaptureQueriesContext(connection) as full:
+            self.client.post(url, {'body': 'Two'}, follow=True)
+        self.assertLess(len(fragment), len(full))
+
+    def test_edit_and_delete_skip_the_post_body(self):
+        for url, data, status in (
+                (self.edit_url(self.comment), {'body': 'Edited'}, 200),
+                (self.delete_url(self.comment), None, 204)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.ajax_post(url, data)
+            self.assertEqual(response.status_code, status)
+            for query in queries:
+                self.assertNotIn('"blog_post"."content"', query['sql'])
+
+    def test_add_empty_returns_error_fragment(self):
+        response = self.ajax_post(
+            reverse('add_comment', args=['fragments']), {'body': '  '})
+        self.assertContains(
+            response, 'Comment cannot be empty.', status_code=400)
+        self.assertContains(response, 'alert-danger', status_code=400)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_edit_returns_updated_card(self):
+        response = self.ajax_post(
+            self.edit_url(self.comment), {'body': 'Changed'})
+        self.assertContains(response, 'Changed')
+        self.assertContains(response, 'Awaiting approval')
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.body, 'Changed')
+        self.assertFalse(self.comment.approved)
+
+    def test_edit_empty_returns_error_fragment(self):
+        response = self.ajax_post(self.edit_url(self.comment), {'body': ''})
+        self.assertContains(
+            response, 'Comment cannot be empty.', status_code=400)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.body, 'Original')
+
+    def test_edit_and_delete_others_comment_forbidden(self):
+        theirs = Comment.objects.create(
+            post=self.post, author=self.other, body="Theirs")
+        response = self.ajax_post(self.edit_url(theirs), {'body': 'Mine'})
+        self.assertContains(
+            response, 'only edit your own', status_code=403)
+        response = self.ajax_post(self.delete_url(theirs))
+        self.assertContains(
+            response, 'only delete your own', status_code=403)
+        self.assertTrue(
+            Comment.objects.filter(pk=theirs.pk, body='Theirs').exists())
+
+    def test_delete_returns_no_content(self):
+        response = self.ajax_post(self.delete_url(self.comment))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+        self.assertFalse(Comment.objects.filter(pk=self.comment.pk).exists())
+
+    def test_delete_by_get_is_refused(self):
+        response = self.client.get(
+            self.delete_url(self.comment),
+            headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertContains(response, 'delete button', status_code=405)
+        self.assertTrue(Comment.objects.filter(pk=self.comment.pk).exists())
+
+    def test_form_posts_still_redirect(self):
+        """Without the header every action falls back to the redirect"""
+        detail = reverse('post_detail', args=['fragments'])
+        response = self.client.post(
+            reverse('add_comment', args=['fragments']), {'body': 'Plain'})
+        self.assertRedirects(response, detail)
+        response = self.client.post(
+            self.edit_url(self.comment), {'body': 'Plain edit'})
+        self.assertRedirects(response, detail)
+        response = self.client.post(self.delete_url(self.comment))
+        self.assertRedirects(response, detail)
+
+
+@mock.patch('blog.views.COMMENTS_PER_PAGE', 3)
+class TestCommentPages(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", password="authorpass123")
+        self.post = Post.objects.create(
+            title="Long Thread", slug="long-thread", author=self.author,
+            content="Some content", status=1)
+        self.comments = [
+            Comment.objects.create(
+                post=self.post, author=self.author, body=f"Comment {i}",
+                approved=True)
+            for i in range(7)
+        ]
+        self.url = reverse('post_comments', args=['long-thread'])
+
+    def test_detail_renders_first_page_only(self):
+        response = self.client.get(
+            reverse('post_detail', args=['long-thread']))
+        self.assertEqual(response.context['comments'], self.comments[:3])
+        self.assertContains(response, 'Comment 2')
+        self.assertNotContains(response, 'Comment 3')
+        self.assertContains(response, 'id="load-more-comments"')
+        self.assertContains(
+            response, response.context['comment_page'].next_cursor)
+
+    def test_endpoint_walks_thread_oldest_first(self):
+        """Following next_cursor returns every comment once, in order"""
+        seen, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            data = self.client.get(self.url, params).json()
+            seen.extend(c['id'] for c in data['comments'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [c.id for c in self.comments])
+
+    def test_endpoint_returns_rendered_cards(self):
+        first = self.client.get(reverse('post_detail', args=['long-thread']))
+        cursor = first.context['comment_page'].next_cursor
+        data = self.client.get(self.url, {'cursor': cursor}).json()
+        self.assertEqual(
+            [c['body'] for c in data['comments']],
+            ['Comment 3', 'Comment 4', 'Comment 5'])
+        self.assertIn('Comment 5', data['html'])
+        self.assertNotIn('Comment 6', data['html'])
+
+    def test_pending_comments_only_for_their_author(self):
+        pending = Comment.objects.create(
+            post=self.post, author=self.author, body="Pending")
+        data = self.client.get(self.url, {'cursor': self.cursor_after(6)})
+        self.assertEqual(data.json()['comments'], [])
+
+        self.client.login(username='author', password='authorpass123')
+        data = self.client.get(self.url, {'cursor': self.cursor_after(6)})
+        self.assertEqual(
+            [c['id'] for c in data.json()['comments']], [pending.id])
+
+    def test_pending_comments_are_merged_in_order(self):
+        """Pages walk approved and own pending comments as one thread"""
+        reader = User.objects.create_user(
+            username="reader", password="readerpass123")
+        start = timezone.now()
+        for i, comment in enumerate(self.comments):
+            comment.created_on = start + timedelta(minutes=2 * i)
+            comment.save()
+        for i in (0, 3, 4, 6):
+            Comment.objects.create(
+                post=self.post, author=reader, body=f"Pending {i}")
+            Comment.objects.filter(body=f"Pending {i}").update(
+                created_on=start + timedelta(minutes=2 * i + 1))
+        Comment.objects.create(
+            post=self.post, author=self.author, body="Someone else's")
+        thread = list(
+            Comment.objects.exclude(body="Someone else's")
+            .order_by('created_on', 'id').values_list('body', flat=True))
+
+        self.client.login(username='reader', password='readerpass123')
+        seen, cursor = [], None
+        while True:
+            params = {'cursor': cursor} if cursor else {}
+            data = self.client.get(self.url, params).json()
+            seen.extend(c['body'] for c in data['comments'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, thread)
+
+        request = RequestFactory().get(self.url)
+        request.user = reader
+        paginator = _comment_paginator(request, self.post)
+        last = paginator.page(paginator.encode('n', Comment.objects.get(
+            body=thread[-4])))
+        back = paginator.page(last.previous_cursor)
+        self.assertEqual([c.body for c in back], thread[-6:-3])
+        self.assertTrue(back.has_previous())
+
+    def test_page_is_one_query_at_any_depth(self):
+        """Validators, post, and one page of comments with authors"""
+        for index in (None, 2, 5):
+            params = {'cursor': self.cursor_after(index)} if index else {}
+            with self.assertNumQueries(3):
+                self.client.get(self.url, params)
+
+    def test_bad_cursor_is_400(self):
+        response = self.client.get(self.url, {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tampered_cursor_is_400(self):
+        """Well-formed tokens with values the key fields reject"""
+        for values in (['n', 'yesterday', 1], ['n', None, None]):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(values).encode()).decode()
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, values)
+
+    def cursor_after(self, index):
+        paginator = CursorPaginator(
+            Comment.objects.all(), 3, ordering=('created_on', 'id'))
+        return paginator.encode('n', self.comments[index])
+
+
+class TestLikedByMe(TestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(
+            username="reader", password="readerpass123")
+        self.author = User.objects.create_user(username="author")
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", author=self.author,
+                content="Some content", status=1)
+            for i in range(6)
+        ]
+        for post in self.posts[::2]:
+            post.likes.add(self.reader)
+
+    def test_helper_is_one_query(self):
+        posts = Post.objects.filter(pk__in=[p.pk for p in self.posts])
+        with self.assertNumQueries(1):
+            liked = liked_post_ids(self.reader, posts)
+        self.assertEqual(liked, {p.pk for p in self.posts[::2]})
+
+    def test_anonymous_needs_no_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                liked_post_ids(AnonymousUser(), Post.objects.all()), set())
+
+    def test_home_page_marks_liked_cards(self):
+        self.client.login(username='reader', password='readerpass123')
+        # Session, user, COUNT, posts, validators, liked state, sidebar.
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(
+            response.context['liked_post_ids'],
+            {p.pk for p in self.posts[::2]})
+        self.assertContains(response, 'bi-heart-fill', count=3)
+
+    def test_endpoint_reports_liked_state_by_slug(self):
+        self.client.login(username='reader', password='readerpass123')
+        response = self.client.get(reverse('liked_posts'), {
+            'slug': ['post-0', 'post-1', 'missing']})
+        self.assertEqual(
+            response.json(), {'liked': {'post-0': True, 'post-1': False}})
+
+    def test_endpoint_for_anonymous_users(self):
+        response = self.client.get(reverse('liked_posts'), {'slug': 'post-0'})
+        self.assertEqual(response.json(), {'liked': {'post-0': False}})
@@ -0,0 +1,39 @@
+# blog/text.py
+"""
+Plain-text helpers for Summernote HTML post bodies.
+"""
+import html
+import math
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 30
+WORDS_PER_MINUTE = 200
+
+# Block-level tags end a word even when there is no whitespace around them.
+_BLOCK_TAG = re.compile(
+    r'<(/?(?:p|div|br|li|ul|ol|h[1-6]|blockquote|pre|tr|td|th)\b)', re.I)
+
+
+def plain_text(content):
+    """
+    Strip tags and entities from ``content`` and collapse whitespace.
+    """
+    spaced = _BLOCK_TAG.sub(r' <\1', content or '')
+    return ' '.join(html.unescape(strip_tags(spaced)).split())
+
+
+def excerpt(text, words=EXCERPT_WORDS):
+    """
+    First ``words`` words of ``text``, like the ``truncatewords`` filter.
+    """
+    return Truncator(text).words(words)
+
+
+def reading_time(word_count):
+    """
+    Estimated minutes to read ``word_count`` words (at least one).
+    """
+    return max(1, math.ceil(word_count / WORDS_PER_MINUTE))
@@ -0,0 +1,201 @@
+# blog/time_sources.py
+"""
+Pluggable sources for the world clock shown in the site footer.
+
+The active source is chosen with the ``WORLD_TIME_SOURCE`` setting (a
+dotted path). Every source exposes ``now(tz_name)`` which returns an
+aware ``datetime`` for the given IANA zone, or raises on failure.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIME_SOURCE = 'blog.time_sources.ZoneInfoTimeSource'
+
+
+class TimeSourceUnavailable(Exception):
+    """
+    Raised when a source refuses to answer (e.g. its circuit is open).
+    Callers should fall back quietly; the outage has already been logged.
+    """
+
+
+class ZoneInfoTimeSource:
+    """
+    Computes local times from the system tz database. No network I/O.
+    """
+
+    def now(self, tz_name):
+        return datetime.now(timezone.utc).astimezone(_zone(tz_name))
+
+
+class WorldTimeAPISource:
+    """
+    Asks worldtimeapi.org for the UTC offset of a zone.
+
+    Offsets are kept in the Django cache (``WORLD_TIME_CACHE``) so all
+    workers share one lookup per zone per ``WORLD_TIME_CACHE_TTL``. Once
+    an entry is older than ``WORLD_TIME_REFRESH_AFTER`` seconds it is
+    refreshed in a background thread while the cached offset keeps being
+    served. After ``WORLD_TIME_FAILURE_THRESHOLD`` consecutive failures
+    the circuit opens and the API is not called again until
+    ``WORLD_TIME_COOLDOWN`` seconds have passed.
+    """
+    key_prefix = 'world_time'
+
+    def __init__(self, base_url=None, timeout=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.last_refresh = None
+
+    def now(self, tz_name):
+        offset = self.utc_offset(tz_name)
+        return datetime.now(timezone.utc).astimezone(timezone(offset))
+
+    def utc_offset(self, tz_name):
+        entry = self.cache.get(self._offset_key(tz_name))
+        if entry is not None:
+            seconds, fetched_at = entry
+            if time.time() - fetched_at >= self.refresh_after:
+                self._refresh_in_background(tz_name)
+            return timedelta(seconds=seconds)
+        return self._refresh(tz_name)
+
+    def fetch(self, tz_name):
+        """
+        Call the API and return the zone's current UTC offset.
+        """
+        base_url = self.base_url or getattr(
+            settings, 'WORLD_TIME_API_URL',
+            'https://worldtimeapi.org/api/timezone/')
+        response = requests.get(
+            base_url.rstrip('/') + '/' + tz_name,
+            timeout=self.timeout or getattr(
+                settings, 'WORLD_TIME_API_TIMEOUT', 3)
+        )
+        response.raise_for_status()
+        dt_str = response.json()['datetime']
+        return datetime.fromisoformat(dt_str.replace('Z', '+00:00')).utcoffset()
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'WORLD_TIME_CACHE', 'default')]
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'WORLD_TIME_CACHE_TTL', 3600)
+
+    @property
+    def refresh_after(self):
+        return getattr(settings, 'WORLD_TIME_REFRESH_AFTER', self.ttl * 0.8)
+
+    def circuit_open(self):
+        return self.cache.get(self._key('circuit_open')) is not None
+
+    def _refresh(self, tz_name):
+        if self.circuit_open():
+            raise TimeSourceUnavailable(
+                f"worldtimeapi circuit open, skipping {tz_name}")
+        try:
+            offset = self.fetch(tz_name)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self.cache.delete(self._key('failures'))
+        self.cache.set(
+            self._offset_key(tz_name),
+            (offset.total_seconds(), time.time()),
+            self.ttl
+        )
+        return offset
+
+    def _refresh_in_background(self, tz_name):
+        # One refresh per zone across all workers sharing the cache.
+        lock_key = self._key('refreshing', tz_name)
+        with self._lock:
+            if tz_name in self._refreshing:
+                return
+            if not self.cache.add(lock_key, 1, self._timeout_seconds() * 2):
+                return
+            self._refreshing.add(tz_name)
+
+        def run():
+            try:
+                self._refresh(tz_name)
+            except Exception:
+                # Failure already counted; keep serving the cached offset.
+                pass
+            finally:
+                self.cache.delete(lock_key)
+                with self._lock:
+                    self._refreshing.discard(tz_name)
+
+        thread = threading.Thread(
+            target=run, name=f'world-time-refresh-{tz_name}', daemon=True)
+        self.last_refresh = thread
+        thread.start()
+
+    def _record_failure(self, error):
+        failures_key = self._key('failures')
+        cooldown = getattr(settings, 'WORLD_TIME_COOLDOWN', 300)
+        self.cache.add(failures_key, 0, cooldown)
+        try:
+            failures = self.cache.incr(failures_key)
+        except ValueError:
+            failures = 1
+        threshold = getattr(settings, 'WORLD_TIME_FAILURE_THRESHOLD', 3)
+        if failures >= threshold:
+            self.cache.set(self._key('circuit_open'), True, cooldown)
+            self.cache.delete(failures_key)
+            logger.warning(
+                f"worldtimeapi failed {failures} times in a row ({error}); "
+                f"not calling it for {cooldown}s")
+        else:
+            logger.info(f"worldtimeapi request failed: {error}")
+
+    def _timeout_seconds(self):
+        return int(self.timeout or getattr(
+            settings, 'WORLD_TIME_API_TIMEOUT', 3)) + 1
+
+    def _key(self, *parts):
+        return ':'.join((self.key_prefix,) + parts)
+
+    def _offset_key(self, tz_name):
+        return self._key('offset', tz_name)
+
+
+@lru_cache(maxsize=None)
+def _zone(tz_name):
+    return ZoneInfo(tz_name)
+
+
+@lru_cache(maxsize=None)
+def _load_source(path):
+    return import_string(path)()
+
+
+def get_time_source():
+    """
+    Return the configured time source instance.
+    """
+    return _load_source(
+        getattr(settings, 'WORLD_TIME_SOURCE', DEFAULT_TIME_SOURCE))
+
+
+def local_now(tz_name):
+    """
+    Current time in ``tz_name`` straight from the tz database.
+    """
+    return ZoneInfoTimeSource().now(tz_name)
@@ -0,0 +1,187 @@
+"""
+Per-request timings, sent as a ``Server-Timing`` header and logged.
+
+With ``SERVER_TIMING = True`` the middleware times each request and
+splits the time into:
+
+- ``db``: SQL queries, through ``connection.execute_wrapper()``, with
+  their count;
+- ``cp``: context processors, including the world clock's lazy lookup
+  (``blog.context_processors``) whenever a template first reads it;
+- ``tpl``: template rendering;
+- ``media``: building Cloudinary image URLs;
+- ``total``: the whole request, as seen by the middleware.
+
+Times are exclusive: a query run while a template renders counts as
+``db``, not ``tpl``, so the parts add up to no more than ``total``.
+Streamed responses are timed up to the point the view returns them.
+
+Turned off (the default), the middleware removes itself with
+``MiddlewareNotUsed`` and nothing is patched, so requests pay nothing.
+Turned on, the template and Cloudinary hooks stay installed for the
+process but do nothing outside a timed request.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Server-Timing metric names, in header order.
+METRICS = ('db', 'cp', 'tpl', 'media')
+
+_current = ContextVar('blog_timing', default=None)
+
+
+class Timings:
+    """Exclusive time per metric for one request, plus the query count."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(METRICS, 0.0)
+        self.queries = 0
+        # [metric, start, time spent in nested spans] per open span.
+        self._stack = []
+
+    @contextmanager
+    def span(self, metric):
+        entry = [metric, time.perf_counter(), 0.0]
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - entry[1]
+            self.totals[metric] += elapsed - entry[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+
+@contextmanager
+def span(metric):
+    """
+    Count the enclosed block towards ``metric`` for the current request;
+    does nothing outside a timed request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+    else:
+        with timings.span(metric):
+            yield
+
+
+def _timed(metric, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return func(*args, **kwargs)
+        with timings.span(metric):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _timed_bind_template(bind_template):
+    # Context processors run when the context is bound, before the
+    # template renders.
+    @contextmanager
+    def wrapper(self, template):
+        with ExitStack() as stack:
+            with span('cp'):
+                stack.enter_context(bind_template(self, template))
+            yield
+    return wrapper
+
+
+_installed = False
+
+
+def install():
+    """Hook template rendering and Cloudinary URLs, once per process."""
+    global _installed
+    if _installed:
+        return
+    from django.template.base import Template
+    from django.template.context import RequestContext
+
+    Template.render = _timed('tpl', Template.render)
+    RequestContext.bind_template = _timed_bind_template(
+        RequestContext.bind_template)
+    try:
+        from cloudinary import CloudinaryResource
+    except ImportError:
+        pass
+    else:
+        CloudinaryResource.build_url = _timed(
+            'media', CloudinaryResource.build_url)
+    _installed = True
+
+
+def _query_wrapper(timings):
+    def wrapper(execute, sql, params, many, context):
+        timings.queries += 1
+        with timings.span('db'):
+            return execute(sql, params, many, context)
+    return wrapper
+
+
+def header(timings, total):
+    """The ``Server-Timing`` value for ``timings`` and ``total`` seconds"""
+    parts = []
+    for metric in METRICS:
+        part = f'{metric};dur={timings.totals[metric] * 1e3:.1f}'
+        if metric == 'db':
+            part += f';desc="{timings.queries} queries"'
+        parts.append(part)
+    parts.append(f'total;dur={total * 1e3:.1f}')
+    return ', '.join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Time each request (see the module docstring) and report it in a
+    ``Server-Timing`` header and a ``blog.timing`` log line. Put it first
+    in ``MIDDLEWARE`` so ``total`` covers the other middleware too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        timings = Timings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                wrapper = _query_wrapper(timings)
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = header(timings, total)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1e3, 1),
+            'db_queries': timings.queries,
+            **{f'{metric}_ms': round(timings.totals[metric] * 1e3, 1)
+               for metric in METRICS},
+        }
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'timing': fields})
+        return response
@@ -0,0 +1,86 @@
+"""
+Trending posts: recent likes and approved comments, each counting for
+less as it ages, halving every ``TRENDING_HALF_LIFE`` seconds.
+
+Scores use forward decay. An event at time ``t`` adds ``weight * 2 **
+((t - epoch) / half_life)`` to ``Post.trend_score``, ``epoch`` being the
+moment stored in ``TrendingEpoch``. A post's decayed score at ``now`` is
+its ``trend_score * 2 ** (-(now - epoch) / half_life)``; that factor is
+the same for every post, so ``trend_score`` orders posts by their score
+at any moment and the trending feed is an indexed scan in stored order.
+Nothing is recomputed from the likes or comments tables.
+
+Taking an event back (an unlike, an approved comment deleted) subtracts
+its weight as of now: when it happened is not stored. An old like undone
+later takes back more than it added, so the score can end below its
+true value; ``bump()`` clamps it at zero. This is accepted: the error
+only ever cools a post, and is gone once its remaining events fade.
+
+New events weigh more the further ``now`` is from the epoch, so
+``manage.py decay_trending`` periodically moves the epoch to the present
+and scales every score down to match, in one transaction, and zeroes
+the scores that have faded so those posts leave the trending index.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Power
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 3.0
+# Decayed scores below this (a single like about seven half-lives ago)
+# are zeroed by the decay job.
+FADED = 0.01
+
+
+def half_life():
+    return float(getattr(settings, 'TRENDING_HALF_LIFE', 24 * 60 * 60))
+
+
+def bump(likes=0, comments=0):
+    """
+    Expression for ``trend_score`` after ``likes`` likes and ``comments``
+    approved comments happening now (negative to take them back, never
+    below zero), for ``update()``. The epoch is read by the UPDATE
+    itself rather than cached per process.
+    """
+    from .models import TrendingEpoch
+
+    weight = likes * LIKE_WEIGHT + comments * COMMENT_WEIGHT
+    if not weight:
+        return F('trend_score')
+    now = time.time()
+    epoch = Coalesce(
+        Subquery(TrendingEpoch.objects.values('epoch')[:1]), Value(now))
+    scale = Power(Value(2.0), (Value(now) - epoch) / Value(half_life()))
+    return Greatest(F('trend_score') + Value(float(weight)) * scale,
+                    Value(0.0))
+
+
+def decay(now=None):
+    """
+    Move the epoch to ``now``, scale every score to the new epoch and
+    zero the ones that have faded, purging the feed's cached pages if
+    any post dropped out. Returns the number of posts dropped.
+    """
+    from .models import Post, TrendingEpoch
+    from .signals import purge_post_pages
+
+    now = time.time() if now is None else now
+    with transaction.atomic():
+        epoch = TrendingEpoch.objects.select_for_update().first()
+        if epoch is None:
+            TrendingEpoch.objects.create(epoch=now)
+            return 0
+        factor = 2 ** (-(now - epoch.epoch) / half_life())
+        scored = Post.objects.filter(trend_score__gt=0)
+        scored.update(trend_score=F('trend_score') * factor)
+        # Touched, so the feed's validators change too.
+        dropped = scored.filter(trend_score__lt=FADED).touch(trend_score=0)
+        epoch.epoch = now
+        epoch.save(update_fields=['epoch'])
+        if dropped:
+            purge_post_pages()
+    return dropped
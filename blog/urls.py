@@ -1,14 +1,34 @@
-from django.urls import path
-from . import views
+from django.urls import path, register_converter
+from . import converters, feeds, sitemaps, views
+
+register_converter(converters.YearConverter, 'yyyy')
+register_converter(converters.MonthConverter, 'mm')
 
 urlpatterns = [
     path('', views.PostList.as_view(), name='home'),
+    path('trending/', views.TrendingList.as_view(), name='trending'),
+    path('archive/<yyyy:year>/<mm:month>/',
+         views.ArchiveList.as_view(), name='archive_month'),
+    path('author/<str:username>/',
+         views.AuthorList.as_view(), name='author_posts'),
     path('post/<slug:slug>/', views.post_detail, name='post_detail'),
     path('post/<slug:slug>/comment/', views.add_comment, name='add_comment'),
+    path('post/<slug:slug>/comments/',
+         views.post_comments, name='post_comments'),
+    path('post/<slug:slug>/me/', views.post_holes, name='post_holes'),
     path('post/<slug:slug>/edit/<int:comment_id>/',
          views.comment_edit, name='comment_edit'),
     path('post/<slug:slug>/delete/<int:comment_id>/',
          views.comment_delete, name='comment_delete'),
     path('post/<slug:slug>/like/', views.post_like, name='post_like'),
+    path('likes/', views.liked_posts, name='liked_posts'),
+    path('search/', views.search, name='search'),
+    path('search/titles/', views.search_titles, name='search_titles'),
+    path('feed/', feeds.rss, name='feed'),
+    path('feed/atom/', feeds.atom, name='atom_feed'),
+    path('sitemap.xml', sitemaps.sitemap, name='sitemap'),
+    path('sitemap-pages.xml', sitemaps.sitemap_pages, name='sitemap_pages'),
+    path('sitemap-posts-<int:section>.xml',
+         sitemaps.sitemap_posts, name='sitemap_posts'),
 
 ]
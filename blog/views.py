@@ -1,80 +1,422 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.context import make_context
+from django.template.loader import get_template, render_to_string
 from django.views import generic
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.urls import reverse
+from django.views.decorators.cache import cache_control, never_cache
 from django.views.decorators.http import require_POST
-from .models import Post, Comment
+from . import archive, autocomplete, like_buffer, slug_cache
+from .conditional import (
+    conditional_page, post_detail_validators, post_list_validators)
+from .models import AuthorPostCount, MonthlyPostCount, Post, Comment
+from .page_cache import cache_anonymous_page
+from .pagination import CursorPaginator, InvalidCursor, MergedCursorPaginator
+from .signals import purge_post_pages
 
 
+COMMENTS_PER_PAGE = 20
+MAX_LIKED_SLUGS = 100
+SEARCH_RESULTS_PER_PAGE = 10
+MAX_SEARCH_PAGES = 50
+SIDEBAR_AUTHORS = 10
+
+
+def _buffered_likes():
+    return getattr(settings, 'LIKE_WRITE_MODE', 'direct') == 'buffered'
+
+
+def _with_pending_like(request, post, user_has_liked):
+    """
+    Show the user their own not-yet-flushed like (buffered mode).
+    """
+    post.like_count += like_buffer.buffer.pending_delta(post.pk)
+    pending = like_buffer.buffer.pending_state(post.pk, request.user.pk)
+    return user_has_liked if pending is None else pending
+
+
+def liked_post_ids(user, posts):
+    """
+    Set of the pks in ``posts`` (a Post queryset) that ``user`` has
+    liked: one query on the likes table, plus any of the user's likes
+    still waiting in the write-behind buffer.
+    """
+    liked = posts.liked_ids(user)
+    if user.is_authenticated and _buffered_likes():
+        for post_id, now in like_buffer.buffer.pending_for_user(
+                user.pk).items():
+            if now:
+                liked.add(post_id)
+            else:
+                liked.discard(post_id)
+    return liked
+
+
+@method_decorator([
+    conditional_page(post_list_validators),
+    cache_anonymous_page('post-list'),
+], name='dispatch')
 class PostList(generic.ListView):
     """
     View to display list of all published posts.
+    Authors come back in the same query as the posts and like/comment
+    counts are stored on Post, so the page costs the same number of
+    queries at any size. Cards use the stored excerpt, so the full
+    post body is never loaded.
+
+    With ``POST_LIST_PAGINATION = 'cursor'`` pages are addressed by an
+    opaque ``?cursor=`` token instead of ``?page=n``: no COUNT(*) and no
+    OFFSET scan, so deep pages cost the same as the first one.
+
+    Revisits are answered with 304 Not Modified when no post changed
+    (``blog.conditional``).
     """
     model = Post
-    queryset = Post.objects.filter(status=1).order_by('-created_on')
+    queryset = (
+        Post.objects.filter(status=1)
+        .select_related('author')
+        .defer('content')
+        .order_by('-created_on')
+    )
     template_name = "blog/index.html"
     context_object_name = 'post_list'
     paginate_by = 6
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Which cards the user has liked, for the whole page at once.
+        context['liked_post_ids'] = liked_post_ids(
+            self.request.user,
+            Post.objects.filter(
+                pk__in=[post.pk for post in context['post_list']]),
+        )
+        # Sidebar links with their stored counts (blog.archive).
+        context['archive_months'] = MonthlyPostCount.objects.filter(
+            count__gt=0)
+        context['top_authors'] = (
+            AuthorPostCount.objects.filter(count__gt=0)
+            .select_related('author')[:SIDEBAR_AUTHORS])
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        if getattr(settings, 'POST_LIST_PAGINATION', 'offset') != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        return self.cursor_page(queryset, page_size)
+
+    def cursor_page(self, queryset, page_size,
+                    ordering=('-created_on', '-id')):
+        paginator = CursorPaginator(queryset, page_size, ordering)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page.")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class TrendingList(PostList):
+    """
+    Published posts with the most recent likes and comments first. The
+    time-decayed score is stored on Post and kept up to date as readers
+    like and comment (``blog.trending``), so a page is one scan of a
+    partial index in score order, without counting likes or comments.
+
+    Always paginated by cursor on ``(trend_score, id)``: no COUNT(*),
+    and since scores keep moving, a cursor picks up after the last post
+    seen rather than at a page number whose contents have shifted.
+    """
+    queryset = (
+        Post.objects.trending()
+        .select_related('author')
+        .defer('content')
+    )
+    extra_context = {'trending': True}
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.cursor_page(
+            queryset, page_size, ordering=('-trend_score', '-id'))
+
+
+class ArchiveList(PostList):
+    """
+    Published posts from one calendar month, newest first: a range scan
+    of the published-posts index. Paginated by cursor.
+    """
+
+    def get_queryset(self):
+        try:
+            self.start, end = archive.month_range(
+                self.kwargs['year'], self.kwargs['month'])
+        except ValueError:
+            raise Http404("No such month.")
+        return super().get_queryset().filter(
+            created_on__gte=self.start, created_on__lt=end)
 
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            heading=f"Posts from {self.start:%B %Y}", **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.cursor_page(queryset, page_size)
+
+
+class AuthorList(PostList):
+    """
+    An author's published posts, newest first, read in order from the
+    per-author partial index. Paginated by cursor.
+    """
+
+    def get_queryset(self):
+        self.author = get_object_or_404(
+            User, username=self.kwargs['username'])
+        return (
+            self.author.blog_posts.filter(status=1)
+            .select_related('author')
+            .defer('content')
+            .order_by('-created_on')
+        )
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            heading=f"Posts by {self.author.username}", **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.cursor_page(queryset, page_size)
+
+
+def _comment_paginator(request, post):
+    """
+    Oldest-first keyset paginator over the comments ``request.user`` may
+    see: approved ones, plus their own unapproved ones. Authors come in
+    the same query. The two are read separately, each in order from its
+    own partial index, and merged: one filter matching both would make
+    the database sort the whole thread for every page.
+    """
+    ordering = ('created_on', 'id')
+    approved = post.comments.filter(approved=True).select_related('author')
+    if not request.user.is_authenticated:
+        return CursorPaginator(approved, COMMENTS_PER_PAGE, ordering)
+    pending = post.comments.filter(
+        author=request.user, approved=False).select_related('author')
+    return MergedCursorPaginator(
+        [approved, pending], COMMENTS_PER_PAGE, ordering)
+
+
+@conditional_page(post_detail_validators)
+@cache_anonymous_page('post:{slug}', holes='post_holes')
 def post_detail(request, slug):
     """
     View to display individual post with comments.
+    The post comes with its author, the first page of visible comments
+    with theirs, and the precomputed "read next" posts, in one query
+    each. Later comment pages are fetched from ``post_comments`` as the
+    reader asks for them.
     """
     # Get the post by slug, or return 404 if not found
-    post = get_object_or_404(Post, slug=slug, status=1)
-
-    # Get comments for this post (show approved + user's unapproved comments)
-    comments = post.comments.filter(approved=True)
+    post = get_object_or_404(
+        Post.objects.select_related('author'), slug=slug, status=1)
 
-    # If user is logged in, also show their own unapproved comments
-    if request.user.is_authenticated:
-        user_unapproved = post.comments.filter(
-            author=request.user,
-            approved=False
-        )
-        comments = comments | user_unapproved
-        comments = comments.distinct().order_by('created_on')
+    comment_page = _comment_paginator(request, post).page()
+    comments = comment_page.object_list
 
     # Check if current user has liked the post
     user_has_liked = False
     if request.user.is_authenticated:
-        user_has_liked = post.likes.filter(id=request.user.id).exists()
+        user_has_liked = _with_pending_like(
+            request, post, None) if _buffered_likes() else None
+        if user_has_liked is None:
+            user_has_liked = post.likes.filter(id=request.user.id).exists()
 
     # Prepare context to pass to template
     context = {
         'post': post,
         'comments': comments,
+        'comment_page': comment_page,
         'user_has_liked': user_has_liked,
+        'read_next': post.read_next(),
     }
 
     return render(request, 'blog/post_detail.html', context)
 
 
+@never_cache
+def post_holes(request, slug):
+    """
+    The logged-in reader's own parts of the cached post page, as HTML
+    fragments for ``holes.js``: navbar, like button, comment form and
+    their own comments (with edit/delete menus and pending ones). One
+    query for the post and liked state, one for the comments.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'holes': {}, 'comments': []})
+
+    post = get_object_or_404(
+        Post.objects.only('pk', 'slug', 'like_count').annotate(
+            user_has_liked=Exists(Post.likes.through.objects.filter(
+                post=OuterRef('pk'), user_id=request.user.pk))),
+        slug=slug, status=1)
+    user_has_liked = post.user_has_liked
+    if _buffered_likes():
+        user_has_liked = _with_pending_like(request, post, user_has_liked)
+    own_comments = (
+        post.comments.filter(author=request.user)
+        .select_related('author')
+        .order_by('created_on', 'id')
+    )
+
+    # One context for every fragment, so the context processors run once
+    # rather than once per fragment and comment.
+    context = make_context(
+        {'post': post, 'user_has_liked': user_has_liked}, request)
+    nav, like, form, comment_card = (
+        get_template(name).template for name in (
+            'base.html#nav-user',
+            'blog/post_detail.html#like-section',
+            'blog/post_detail.html#comment-form',
+            'blog/post_detail.html#comment',
+        )
+    )
+    with context.bind_template(nav):
+        holes = {
+            'nav': nav.render(context),
+            'like': like.render(context),
+            'comment-form': form.render(context),
+        }
+        comments = []
+        for comment in own_comments:
+            with context.push(comment=comment):
+                html = comment_card.render(context)
+            comments.append({
+                'id': comment.id,
+                'created_on': int(comment.created_on.timestamp()),
+                'approved': comment.approved,
+                'html': html,
+            })
+    return JsonResponse({'holes': holes, 'comments': comments})
+
+
+@conditional_page(post_detail_validators)
+@cache_anonymous_page('post:{slug}')
+def post_comments(request, slug):
+    """
+    JSON page of a post's comments, oldest first, for "load more".
+    Pass the previous page's ``next_cursor`` as ``?cursor=``. ``html`` is
+    the comment cards as rendered on the post page.
+    """
+    post = get_object_or_404(
+        Post.objects.only('pk', 'slug'), slug=slug, status=1)
+    try:
+        page = _comment_paginator(request, post).page(
+            request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+
+    html = render_to_string(
+        'blog/post_detail.html#comment-page',
+        {'post': post, 'comments': page.object_list},
+        request=request,
+    )
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.id,
+                'author': comment.author.username,
+                'body': comment.body,
+                'created_on': comment.created_on.isoformat(),
+                'approved': comment.approved,
+            }
+            for comment in page.object_list
+        ],
+        'html': html,
+        'next_cursor': page.next_cursor,
+    })
+
+
+def _wants_fragment(request):
+    """
+    True for script callers (``comments.js``) that want just the changed
+    comment markup back rather than a redirect to the whole post page.
+    """
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def _comment_fragment(request, post, comment, status=200):
+    return render(
+        request, 'blog/post_detail.html#comment',
+        {'post': post, 'comment': comment}, status=status)
+
+
+def _error_fragment(request, message, status):
+    return render(
+        request, 'blog/post_detail.html#comment-error',
+        {'error': message}, status=status)
+
+
+def _comment_for(slug, comment_id):
+    """
+    Comment ``comment_id`` on the published post ``slug``, with its post
+    (less its body) and author joined in: one query, whose ``author_id``
+    is all the ownership checks need. Raises Http404 if there is no such
+    comment.
+
+    Once the slug's post id is cached (``blog.slug_cache``) the comment
+    is looked up by primary key and post id, and the joined post's slug
+    and status are checked here instead of filtered on in SQL.
+    """
+    comments = Comment.objects.select_related(
+        'post', 'author').defer('post__content')
+    post_id = slug_cache.post_ids.get(slug)
+    if post_id is not None:
+        comment = comments.filter(id=comment_id, post_id=post_id).first()
+        if comment is not None and (
+                comment.post.slug == slug and comment.post.status == 1):
+            return comment
+        # No such comment, or the id is stale (post renamed or
+        # unpublished in another process): look again by slug.
+        slug_cache.post_ids.invalidate(slug)
+    comment = comments.filter(
+        id=comment_id, post__slug=slug, post__status=1).first()
+    if comment is None:
+        raise Http404("No comment matches the given query.")
+    slug_cache.post_ids.set(slug, comment.post_id)
+    return comment
+
+
 @login_required
 def add_comment(request, slug):
     """
     View to handle comment submission.
+    Script callers get the new comment's card (or an error fragment)
+    instead of a redirect to the post.
     """
     post = get_object_or_404(Post, slug=slug, status=1)
+    fragment = _wants_fragment(request)
 
     if request.method == 'POST':
         body = request.POST.get('body', '').strip()
 
         if body:
             # Create comment but don't approve it yet
-            Comment.objects.create(
+            comment = Comment.objects.create(
                 post=post,
                 author=request.user,
                 body=body,
                 approved=False  # Requires admin approval
             )
 
+            if fragment:
+                return _comment_fragment(request, post, comment, status=201)
             messages.success(
                 request,
                 'Your comment has been submitted and is awaiting approval.'
             )
+        elif fragment:
+            return _error_fragment(request, 'Comment cannot be empty.', 400)
         else:
             messages.error(request, 'Comment cannot be empty.')
 
@@ -85,12 +427,17 @@ def add_comment(request, slug):
 def comment_edit(request, slug, comment_id):
     """
     View to edit a comment.
+    A script POST gets the updated card (or an error fragment) back.
     """
-    post = get_object_or_404(Post, slug=slug, status=1)
-    comment = get_object_or_404(Comment, id=comment_id, post=post)
+    comment = _comment_for(slug, comment_id)
+    post = comment.post
+    fragment = _wants_fragment(request)
 
     # Check if user owns the comment
-    if comment.author != request.user:
+    if comment.author_id != request.user.pk:
+        if fragment:
+            return _error_fragment(
+                request, 'You can only edit your own comments.', 403)
         messages.error(request, 'You can only edit your own comments.')
         return redirect('post_detail', slug=slug)
 
@@ -102,10 +449,14 @@ def comment_edit(request, slug, comment_id):
             comment.approved = False  # Needs re-approval after edit
             comment.save()
 
+            if fragment:
+                return _comment_fragment(request, post, comment)
             messages.success(
                 request,
                 'Comment updated successfully. It will need admin approval again.')
             return redirect('post_detail', slug=slug)
+        elif fragment:
+            return _error_fragment(request, 'Comment cannot be empty.', 400)
         else:
             messages.error(request, 'Comment cannot be empty.')
 
@@ -121,22 +472,32 @@ def comment_edit(request, slug, comment_id):
 def comment_delete(request, slug, comment_id):
     """
     View to delete a comment.
+    A script POST gets an empty 204 (or an error fragment) back.
     """
-    post = get_object_or_404(Post, slug=slug, status=1)
-    comment = get_object_or_404(Comment, id=comment_id, post=post)
+    comment = _comment_for(slug, comment_id)
+    fragment = _wants_fragment(request)
 
     # Check if user owns the comment
-    if comment.author != request.user:
+    if comment.author_id != request.user.pk:
+        if fragment:
+            return _error_fragment(
+                request, 'You can only delete your own comments.', 403)
         messages.error(request, 'You can only delete your own comments.')
         return redirect('post_detail', slug=slug)
 
     if request.method == 'POST':
         comment.delete()
+        if fragment:
+            return HttpResponse(status=204)
         messages.success(request, 'Comment deleted successfully.')
         return redirect('post_detail', slug=slug)
 
     # If GET request (like from direct URL access), redirect to post
     # This prevents accidental deletion via GET requests
+    if fragment:
+        return _error_fragment(
+            request, 'Please use the delete button in the comments section.',
+            405)
     messages.warning(
         request,
         'Please use the delete button in the comments section.')
@@ -148,36 +509,114 @@ def comment_delete(request, slug, comment_id):
 def post_like(request, slug):
     """
     View to handle post likes (AJAX).
+    The toggle and the new count come from one transaction, so double
+    clicks and concurrent requests cannot drift the counter. With
+    ``LIKE_WRITE_MODE = 'buffered'`` the toggle is queued instead and
+    written in batches (``blog.like_buffer``).
     """
-    post = get_object_or_404(Post, slug=slug, status=1)
+    post = get_object_or_404(
+        Post.objects.only('pk', 'slug', 'like_count'), slug=slug, status=1)
 
-    if post.likes.filter(id=request.user.id).exists():
-        post.likes.remove(request.user)
-        liked = False
-        message = "You unliked this post."
+    if _buffered_likes():
+        liked, like_count = like_buffer.buffer.toggle(post, request.user)
     else:
-        post.likes.add(request.user)
-        liked = True
-        message = "You liked this post."
+        liked, like_count = post.toggle_like(request.user)
+        purge_post_pages(post.slug)
+    message = "You liked this post." if liked else "You unliked this post."
 
     return JsonResponse({
         'liked': liked,
-        'like_count': post.likes.count(),
+        'like_count': like_count,
         'message': message
     })
 
 
+def liked_posts(request):
+    """
+    JSON ``{"liked": {slug: bool}}`` for the published posts named by
+    ``?slug=`` (repeatable, up to 100), so cached pages can show the
+    user's likes. Anonymous users get all false.
+    """
+    slugs = request.GET.getlist('slug')[:MAX_LIKED_SLUGS]
+    posts = Post.objects.filter(slug__in=slugs, status=1)
+    liked = liked_post_ids(request.user, posts)
+    return JsonResponse({
+        'liked': {
+            slug: pk in liked
+            for pk, slug in posts.values_list('pk', 'slug')
+        },
+    })
+
+
+def search(request):
+    """
+    Published posts matching ``?q=``, best match first, from the
+    full-text index (``blog.search``). Pages are ``?page=n``; no COUNT is
+    run, one extra row tells whether there is a next page.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    if page > MAX_SEARCH_PAGES:
+        raise Http404("Invalid page.")
+
+    results = []
+    if query:
+        results = (
+            Post.objects.select_related('author').defer('content')
+            .search(query, limit=SEARCH_RESULTS_PER_PAGE + 1,
+                    offset=(page - 1) * SEARCH_RESULTS_PER_PAGE)
+        )
+    context = {
+        'query': query,
+        'results': results[:SEARCH_RESULTS_PER_PAGE],
+        'page': page,
+        'has_next': (len(results) > SEARCH_RESULTS_PER_PAGE
+                     and page < MAX_SEARCH_PAGES),
+        'has_previous': page > 1,
+    }
+    return render(request, 'blog/search.html', context)
+
+
+@cache_control(max_age=30)
+def search_titles(request):
+    """
+    JSON title suggestions for search as you type: published posts with
+    a title word starting with ``?q=``, up to ``?limit=`` (default 8,
+    at most 20). Served from memory (``blog.autocomplete``), so a
+    keystroke costs no database query.
+    """
+    try:
+        limit = int(request.GET.get('limit', 8))
+    except ValueError:
+        limit = 8
+    limit = min(max(limit, 1), autocomplete.MAX_SUGGESTIONS)
+    matches = autocomplete.titles.suggest(request.GET.get('q', ''), limit)
+    return JsonResponse({
+        'results': [
+            {
+                'title': title,
+                'slug': slug,
+                'url': reverse('post_detail', args=[slug]),
+            }
+            for _, title, slug in matches
+        ],
+    })
+
+
 @login_required
 def comment_confirm_delete(request, slug, comment_id):
     """
     View to show confirmation page for comment deletion.
     This is optional if you want a separate confirmation page instead of modal.
     """
-    post = get_object_or_404(Post, slug=slug, status=1)
-    comment = get_object_or_404(Comment, id=comment_id, post=post)
+    comment = _comment_for(slug, comment_id)
+    post = comment.post
 
     # Check if user owns the comment
-    if comment.author != request.user:
+    if comment.author_id != request.user.pk:
         messages.error(request, 'You can only delete your own comments.')
         return redirect('post_detail', slug=slug)
 
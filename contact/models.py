@@ -16,6 +16,18 @@ class ContactMessage(models.Model):
         ordering = ['-created_on']
         verbose_name = 'Contact Message'
         verbose_name_plural = 'Contact Messages'
+        indexes = [
+            # The admin inbox: unread or unresolved messages, newest first.
+            # Partial, as the flags are filtered as bare boolean terms.
+            models.Index(
+                fields=['-created_on'],
+                condition=models.Q(is_read=False),
+                name='contact_msg_unread_idx'),
+            models.Index(
+                fields=['-created_on'],
+                condition=models.Q(resolved=False),
+                name='contact_msg_open_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.name}"